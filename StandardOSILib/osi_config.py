@@ -0,0 +1,120 @@
+"""Reloads the drawing config files while a program is running. The part number regex and product families are kept
+in one DrawingConfig that is swapped whole when the config csv files change, so a reader always sees a matching set.
+Programs that run for a long time call watch() once, or check() before work that depends on the prefixes
+    config = get_drawing_config()
+    config.part_num_pattern.search(file_name)"""
+
+import re
+from pathlib import Path
+from threading import Thread, Event, Lock
+from typing import NamedTuple, Callable
+
+from .osi_configfunctions import buildPartRegex, buildProductLines
+from .osi_directory import APPCONFIG, PART_NUM_REGEX, REV_REGEX, PROD_FAMILIES
+
+class DrawingConfig(NamedTuple):
+    part_num_regex: str
+    part_num_pattern: re.Pattern
+    rev_regex: str
+    prod_families: dict[str, list[str]]
+    generation: int             # Incremented on every reload, 0 is the config read when the program started
+
+class ConfigManager():
+    """Holds the current DrawingConfig and rebuilds it when the size or modified time of a config csv changes. A
+    config file that cannot be read, or that changes while it is read, leaves the current config in place
+
+    Args:
+        standard_csv (Path): Standard drawing prefixes
+        config_csv (Path): Configured product code prefixes
+        product_lines_csv (Path): Product families and their product lines
+    """
+
+    def _stamp(self) -> tuple[tuple[int, int]|None]:
+        stamps = list()
+        for csv_path in self.csv_paths:
+            try:
+                csv_stat = csv_path.stat()
+                stamps.append((csv_stat.st_size, csv_stat.st_mtime_ns))
+            except OSError:     # Missing while it is being saved
+                stamps.append(None)
+        return tuple(stamps)
+
+    def _build(self, generation: int) -> DrawingConfig:
+        standard_csv, config_csv, product_lines_csv = self.csv_paths
+        part_num_regex = buildPartRegex(config_csv, standard_csv)
+        return DrawingConfig(part_num_regex, re.compile(part_num_regex), REV_REGEX,
+                             buildProductLines(product_lines_csv), generation)
+
+    def check(self) -> bool:
+        """Reloads the config if a config csv changed since it was last read
+
+        Returns:
+            bool: True if a new config was swapped in
+        """
+        with self._lock:
+            stamps = self._stamp()
+            if stamps == self._stamps:
+                return False
+            old = self.config
+            try:
+                config = self._build(old.generation + 1)
+            except (OSError, ValueError, IndexError, re.error) as error:     # UnicodeDecodeError is a ValueError
+                print(f"Config files could not be read, keeping the current config: {error}")
+                return False
+            if self._stamp() != stamps:     # Changed while it was read, the next check reads it again
+                return False
+            self._stamps = stamps
+            self.config = config        # One assignment, readers see the old or the new config
+        for callback in list(self._subscribers):
+            try:
+                callback(old, config)
+            except Exception as error:      # One subscriber failing does not stop the others
+                print(f"Config reload subscriber {callback} failed: {error}")
+        return True
+
+    def subscribe(self, callback: Callable[[DrawingConfig, DrawingConfig], None]):
+        """Calls the callback with the old and new config after every reload, on the thread that ran the check.
+        Errors raised by the callback are printed"""
+        self._subscribers.append(callback)
+
+    def watch(self, interval: float = 10) -> Thread:
+        """Checks the config files in the background every interval seconds until stop is called"""
+        if self._watcher is not None and self._watcher.is_alive():
+            return self._watcher
+        self._stop.clear()
+        def _watch():
+            while not self._stop.wait(interval):
+                try:
+                    self.check()
+                except Exception as error:      # The watcher keeps running, the next check tries again
+                    print(f"Config check failed: {error}")
+        self._watcher = Thread(target=_watch, name="config-watcher", daemon=True)
+        self._watcher.start()
+        return self._watcher
+
+    def stop(self):
+        self._stop.set()
+
+    def __init__(self, standard_csv: Path = APPCONFIG.STANDA_DWG_CSV, config_csv: Path = APPCONFIG.CONFIG_DWG_CSV,
+                 product_lines_csv: Path = APPCONFIG.PRODUC_LINE_CSV):
+        self.csv_paths = (Path(standard_csv), Path(config_csv), Path(product_lines_csv))
+        self._lock = Lock()
+        self._stop = Event()
+        self._watcher: Thread = None
+        self._subscribers: list[Callable[[DrawingConfig, DrawingConfig], None]] = list()
+        self._stamps = self._stamp()
+        # The config read on import by osi_directory is the first generation, the files are not read twice
+        self.config = DrawingConfig(PART_NUM_REGEX, re.compile(PART_NUM_REGEX), REV_REGEX, PROD_FAMILIES, 0)
+
+_config_manager: ConfigManager = None     # Made on first use
+
+def get_config_manager() -> ConfigManager:
+    """Returns the config manager shared by the program"""
+    global _config_manager
+    if _config_manager is None:
+        _config_manager = ConfigManager()
+    return _config_manager
+
+def get_drawing_config() -> DrawingConfig:
+    """Returns the current drawing config, keep the result for the length of one task so it does not change part way"""
+    return get_config_manager().config
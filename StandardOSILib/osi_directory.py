@@ -1,49 +1,53 @@
 from dataclasses import dataclass
 from pathlib import Path
+from os import environ
 from .osi_configfunctions import buildPartRegex, buildProductLines, buildRevRegex
 
+# The engineering drive can be moved with the OSI_DRIVE environment variable, E.G. to a local copy for testing
+OSI_DRIVE: Path = Path(environ.get("OSI_DRIVE", "X:/"))
+
 @dataclass
 class OSIDIR:
     """Global Dataclass containing the Root Directories in the Engineering Drive"""
     
-    CATALOG: Path = Path('X:/OSI CATALOG')
-    SYSTEMS: Path = Path('X:/SYSTEMS')
+    CATALOG: Path = OSI_DRIVE.joinpath('OSI CATALOG')
+    SYSTEMS: Path = OSI_DRIVE.joinpath('SYSTEMS')
 
     #CATALOG: Path = Path(r'C:\Users\info\PythonProj\DirectoryProject\OSI CATALOG')
     #SYSTEMS: Path = Path(r'C:\Users\info\PythonProj\DirectoryProject\SYSTEMS')
     
-    FABPARTS: Path = Path('X:/FABRICATED PARTS')
-    MECHSUB: Path = Path('X:/SUBASSEMBLY/MECHANICAL SUBASSEMBLY')
-    ELECSUB: Path = Path('X:/SUBASSEMBLY/ELECTRICAL SUBASSEMBLY')
-    PLUMSUB: Path = Path('X:/SUBASSEMBLY/PLUMBING SUBASSEMBLY')
-    TANKASS: Path = Path('X:/SUBASSEMBLY/TANK ASSEMBLY')
-    TANKSUB: Path = Path('X:/SUBASSEMBLY/TANK SUBASSEMBLY')
+    FABPARTS: Path = OSI_DRIVE.joinpath('FABRICATED PARTS')
+    MECHSUB: Path = OSI_DRIVE.joinpath('SUBASSEMBLY/MECHANICAL SUBASSEMBLY')
+    ELECSUB: Path = OSI_DRIVE.joinpath('SUBASSEMBLY/ELECTRICAL SUBASSEMBLY')
+    PLUMSUB: Path = OSI_DRIVE.joinpath('SUBASSEMBLY/PLUMBING SUBASSEMBLY')
+    TANKASS: Path = OSI_DRIVE.joinpath('SUBASSEMBLY/TANK ASSEMBLY')
+    TANKSUB: Path = OSI_DRIVE.joinpath('SUBASSEMBLY/TANK SUBASSEMBLY')
     
-    COMPARTS: Path = Path('X:/PURCHASED PARTS/COMMERCIAL PARTS')
-    ELEPARTS: Path = Path('X:/PURCHASED PARTS/ELECTRCIAL PARTS')
-    HDWPARTS: Path = Path('X:/PURCHASED PARTS/HARDWARE')
-    MTRPARTS: Path = Path('X:/PURCHASED PARTS/MOTORS')
-    PKGPARTS: Path = Path('X:/PURCHASED PARTS/PACKAGING')
-    PLMPARTS: Path = Path('X:/PURCHASED PARTS/PIPE HOSE FITTINGS')
-    PMPPARTS: Path = Path('X:/PURCHASED PARTS/PUMPS')
+    COMPARTS: Path = OSI_DRIVE.joinpath('PURCHASED PARTS/COMMERCIAL PARTS')
+    ELEPARTS: Path = OSI_DRIVE.joinpath('PURCHASED PARTS/ELECTRCIAL PARTS')
+    HDWPARTS: Path = OSI_DRIVE.joinpath('PURCHASED PARTS/HARDWARE')
+    MTRPARTS: Path = OSI_DRIVE.joinpath('PURCHASED PARTS/MOTORS')
+    PKGPARTS: Path = OSI_DRIVE.joinpath('PURCHASED PARTS/PACKAGING')
+    PLMPARTS: Path = OSI_DRIVE.joinpath('PURCHASED PARTS/PIPE HOSE FITTINGS')
+    PMPPARTS: Path = OSI_DRIVE.joinpath('PURCHASED PARTS/PUMPS')
     
-    GRAITEMS: Path = Path('X:/GRAPHICS ITEMS')
-    KITS: Path = Path('X:/KITS')
-    MARKETING: Path = Path('X:/MARKETING')
-    RENDER: Path = Path('X:/RENDERING')
-    TOOLS: Path = Path('X:/TOOLS')
+    GRAITEMS: Path = OSI_DRIVE.joinpath('GRAPHICS ITEMS')
+    KITS: Path = OSI_DRIVE.joinpath('KITS')
+    MARKETING: Path = OSI_DRIVE.joinpath('MARKETING')
+    RENDER: Path = OSI_DRIVE.joinpath('RENDERING')
+    TOOLS: Path = OSI_DRIVE.joinpath('TOOLS')
     
     # Append these on during merge of proects
-    ECN_FOLDER: Path = Path(r"X:\ENGINEERING CHANGE NOTICE")
+    ECN_FOLDER: Path = OSI_DRIVE.joinpath("ENGINEERING CHANGE NOTICE")
     
 @dataclass
 class APPCONFIG:
     """ These are shared config files and structures that can be used to make changes to the program
         Without having to recompile the entire progrma """
-    STANDA_DWG_CSV: Path = Path('X:/PROGRAMS/DirectoryProject/config/StandardDrawingPrefixes.csv')
-    CONFIG_DWG_CSV: Path = Path('X:/PROGRAMS/DirectoryProject/config/ConfigDrawingPrefixes.csv')
-    PRODUC_LINE_CSV: Path = Path('X:/PROGRAMS/DirectoryProject/config/ProductLines.csv')
-    SYSTEM_FOLDER_STRUCT: Path = Path('X:/PROGRAMS/DirectoryProject/config/System')
+    STANDA_DWG_CSV: Path = OSI_DRIVE.joinpath('PROGRAMS/DirectoryProject/config/StandardDrawingPrefixes.csv')
+    CONFIG_DWG_CSV: Path = OSI_DRIVE.joinpath('PROGRAMS/DirectoryProject/config/ConfigDrawingPrefixes.csv')
+    PRODUC_LINE_CSV: Path = OSI_DRIVE.joinpath('PROGRAMS/DirectoryProject/config/ProductLines.csv')
+    SYSTEM_FOLDER_STRUCT: Path = OSI_DRIVE.joinpath('PROGRAMS/DirectoryProject/config/System')
     
 PART_NUM_REGEX = buildPartRegex(APPCONFIG.CONFIG_DWG_CSV, APPCONFIG.STANDA_DWG_CSV)
 REV_REGEX = buildRevRegex()
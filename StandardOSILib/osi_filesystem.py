@@ -0,0 +1,415 @@
+"""Filesystem backends for OSI programs. Drive listings, stats, copies, renames, and deletes go through
+get_filesystem so the real drive, an in memory drive for tests, or a metadata cache in front of either can be
+swapped in one place. File contents read by the pdf, excel, and hash readers, the config csv files, and the local
+pickle files still use the operating system directly"""
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Iterator, NamedTuple
+from shutil import copy2
+from threading import Lock
+from stat import S_ISDIR
+from time import monotonic, time_ns
+import os
+
+from .osi_trace import trace_count, is_tracing
+
+class FileEntry():
+    """ Directory entry of the memory and caching backends with the same interface as os.DirEntry, the path is a
+        string since most entries are filtered out before a Path is needed """
+    __slots__ = ("name", "path", "_is_dir")
+    
+    def is_dir(self) -> bool:
+        return self._is_dir
+    
+    def __init__(self, name: str, path: str, is_dir: bool):
+        self.name = name
+        self.path = path
+        self._is_dir = is_dir
+
+class FileStat(NamedTuple):
+    size: int
+    mtime_ns: int
+    is_dir: bool
+
+class FileSystem(ABC):
+    """ Interface every backend implements, paths may be any Pathlib Path or string """
+
+    @abstractmethod
+    def scandir(self, directory: Path) -> Iterator[FileEntry]:
+        """Entries of the directory with the os.DirEntry interface, name, path, and is_dir()"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def stat(self, path: Path) -> FileStat:
+        raise NotImplementedError
+
+    @abstractmethod
+    def copy(self, src: Path, dst: Path) -> Path:
+        """Copies the file data and modified time, dst may be a directory. Returns the new file path"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def replace(self, src: Path, dst: Path):
+        """Renames the file, overwriting dst if it exists"""
+        raise NotImplementedError
+
+    def rename(self, src: Path, dst: Path):
+        """Renames the file, dst must not exist"""
+        if Path(src) == Path(dst):
+            return
+        if self.exists(dst):
+            raise FileExistsError(f"Cannot rename {src}, {dst} already exists")
+        self.replace(src, dst)
+
+    @abstractmethod
+    def unlink(self, path: Path, missing_ok: bool = False):
+        raise NotImplementedError
+
+    @abstractmethod
+    def mkdir(self, path: Path, parents: bool = False, exist_ok: bool = False):
+        raise NotImplementedError
+
+    @abstractmethod
+    def rmdir(self, path: Path):
+        raise NotImplementedError
+
+    @abstractmethod
+    def read_bytes(self, path: Path) -> bytes:
+        raise NotImplementedError
+
+    @abstractmethod
+    def write_bytes(self, path: Path, data: bytes):
+        raise NotImplementedError
+
+    def listdir(self, directory: Path) -> list[str]:
+        return [entry.name for entry in self.scandir(directory)]
+
+    def exists(self, path: Path) -> bool:
+        try:
+            self.stat(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def is_dir(self, path: Path) -> bool:
+        try:
+            return self.stat(path).is_dir
+        except FileNotFoundError:
+            return False
+
+    def walk(self, top: Path) -> Iterator[tuple[Path, list[str], list[str]]]:
+        """Top down walk in the form of os.walk, folders that cannot be listed are skipped"""
+        pending = [Path(top)]
+        while pending:
+            folder = pending.pop()
+            try:
+                entries = list(self.scandir(folder))
+            except OSError:
+                continue
+            dirs: list[str] = list()
+            files: list[str] = list()
+            for entry in entries:
+                (dirs if entry.is_dir() else files).append(entry.name)
+            yield folder, dirs, files
+            pending.extend(folder.joinpath(name) for name in reversed(dirs))
+
+class OsFileSystem(FileSystem):
+    """ The operating system, every call is a round trip to the drive and is counted when tracing """
+
+    def scandir(self, directory: Path) -> Iterator[os.DirEntry]:
+        trace_count("dirs_listed")
+        with os.scandir(directory) as dir:
+            yield from dir
+
+    def walk(self, top: Path) -> Iterator[tuple[Path, list[str], list[str]]]:
+        for root, dirs, files in os.walk(top, True):
+            trace_count("dirs_listed")
+            yield Path(root), dirs, files
+
+    def stat(self, path: Path) -> FileStat:
+        trace_count("stats")
+        path_stat = os.stat(path)
+        return FileStat(path_stat.st_size, path_stat.st_mtime_ns, S_ISDIR(path_stat.st_mode))
+
+    def copy(self, src: Path, dst: Path) -> Path:
+        new_path = Path(copy2(src, dst))    # Keeps metadata
+        trace_count("files_copied")
+        if is_tracing():
+            trace_count("bytes_copied", new_path.stat().st_size)
+        return new_path
+
+    def replace(self, src: Path, dst: Path):
+        trace_count("renames")
+        os.replace(src, dst)
+
+    def rename(self, src: Path, dst: Path):
+        trace_count("renames")
+        os.rename(src, dst)     # Windows refuses to rename over a file
+
+    def unlink(self, path: Path, missing_ok: bool = False):
+        trace_count("unlinks")
+        Path(path).unlink(missing_ok=missing_ok)
+
+    def mkdir(self, path: Path, parents: bool = False, exist_ok: bool = False):
+        Path(path).mkdir(parents=parents, exist_ok=exist_ok)
+
+    def rmdir(self, path: Path):
+        Path(path).rmdir()
+
+    def read_bytes(self, path: Path) -> bytes:
+        return Path(path).read_bytes()
+
+    def write_bytes(self, path: Path, data: bytes):
+        Path(path).write_bytes(data)
+
+class MemoryFileSystem(FileSystem):
+    """ A drive held in memory for tests, folders get a new modified time when their entries change like a
+        real drive. Drive roots such as X:/ always exist """
+
+    def _now(self) -> int:
+        self._clock = max(time_ns(), self._clock + 1)
+        return self._clock
+
+    def _touch(self, folder: Path):
+        if folder in self.folders:
+            self.folders[folder] = self._now()
+
+    def _check_folder(self, folder: Path):
+        if folder not in self.folders and folder.parent != folder:
+            raise FileNotFoundError(f"No such directory: {folder}")
+
+    def _add(self, path: Path):
+        self.children.setdefault(path.parent, set()).add(path.name)
+        self._touch(path.parent)
+
+    def _remove(self, path: Path):
+        self.children[path.parent].discard(path.name)
+        self._touch(path.parent)
+
+    def scandir(self, directory: Path) -> Iterator[FileEntry]:
+        directory = Path(directory)
+        with self._lock:
+            if directory in self.files:
+                raise NotADirectoryError(f"Not a directory: {directory}")
+            self._check_folder(directory)
+            return iter([FileEntry(name, str(directory.joinpath(name)), directory.joinpath(name) in self.folders)
+                         for name in sorted(self.children.get(directory, ()))])
+
+    def stat(self, path: Path) -> FileStat:
+        path = Path(path)
+        with self._lock:
+            if path in self.files:
+                data, mtime = self.files[path]
+                return FileStat(data.__len__(), mtime, False)
+            if path in self.folders:
+                return FileStat(0, self.folders[path], True)
+            if path.parent == path:
+                return FileStat(0, 0, True)
+            raise FileNotFoundError(f"No such file or directory: {path}")
+
+    def copy(self, src: Path, dst: Path) -> Path:
+        src, dst = Path(src), Path(dst)
+        with self._lock:
+            if dst in self.folders:
+                dst = dst.joinpath(src.name)
+            if src not in self.files:
+                raise FileNotFoundError(f"No such file: {src}")
+            self._check_folder(dst.parent)
+            self.files[dst] = self.files[src]   # Bytes are immutable so the copy shares them
+            self._add(dst)
+        return dst
+
+    def replace(self, src: Path, dst: Path):
+        src, dst = Path(src), Path(dst)
+        with self._lock:
+            if src not in self.files:
+                raise FileNotFoundError(f"No such file: {src}")
+            self._check_folder(dst.parent)
+            self.files[dst] = self.files.pop(src)
+            self._remove(src)
+            self._add(dst)
+
+    def unlink(self, path: Path, missing_ok: bool = False):
+        path = Path(path)
+        with self._lock:
+            if path not in self.files:
+                if missing_ok:
+                    return
+                raise FileNotFoundError(f"No such file: {path}")
+            del self.files[path]
+            self._remove(path)
+
+    def mkdir(self, path: Path, parents: bool = False, exist_ok: bool = False):
+        path = Path(path)
+        with self._lock:
+            if path in self.folders or path.parent == path:
+                if exist_ok:
+                    return
+                raise FileExistsError(f"Directory exists: {path}")
+            if path in self.files:
+                raise FileExistsError(f"File exists: {path}")
+            missing = [path]
+            while missing[-1].parent not in self.folders and missing[-1].parent != missing[-1].parent.parent:
+                if not parents:
+                    raise FileNotFoundError(f"No such directory: {missing[-1].parent}")
+                missing.append(missing[-1].parent)
+            for folder in reversed(missing):
+                self.folders[folder] = self._now()
+                self._add(folder)
+
+    def rmdir(self, path: Path):
+        path = Path(path)
+        with self._lock:
+            if path not in self.folders:
+                raise FileNotFoundError(f"No such directory: {path}")
+            if self.children.get(path):
+                raise OSError(f"Directory not empty: {path}")
+            del self.folders[path]
+            self.children.pop(path, None)
+            self._remove(path)
+
+    def read_bytes(self, path: Path) -> bytes:
+        with self._lock:
+            try:
+                return self.files[Path(path)][0]
+            except KeyError:
+                raise FileNotFoundError(f"No such file: {path}") from None
+
+    def write_bytes(self, path: Path, data: bytes):
+        path = Path(path)
+        with self._lock:
+            self._check_folder(path.parent)
+            self.files[path] = (bytes(data), self._now())
+            self._add(path)
+
+    def __init__(self):
+        self.files: dict[Path, tuple[bytes, int]] = dict()     # Value is the file data and modified time
+        self.folders: dict[Path, int] = dict()                  # Value is the modified time
+        self.children: dict[Path, set[str]] = dict()
+        self._clock = 0
+        self._lock = Lock()
+
+class CachingFileSystem(FileSystem):
+    """ Caches directory listings and stats of another backend. Writes made through the cache invalidate the paths
+        and parent listings they change, changes made by other programs are picked up after max_age seconds or
+        when invalidate is called
+
+    Args:
+        backend (FileSystem): Backend that is cached
+        max_age (float, optional): Seconds an entry is trusted, None trusts entries until invalidated. Defaults to None.
+    """
+
+    def _get(self, cache: dict, key: Path):
+        entry = cache.get(key)
+        if entry is None:
+            return None
+        if self.max_age is not None and monotonic() - entry[0] > self.max_age:
+            return None
+        trace_count("fs_cache_hits")
+        return entry
+
+    def invalidate(self, path: Path = None):
+        """Drops the cached entries of a path and its parent listing, or everything if no path is given"""
+        with self._lock:
+            if path is None:
+                self._listings.clear()
+                self._stats.clear()
+                return
+            path = Path(path)
+            for key in (path, path.parent):
+                self._listings.pop(key, None)
+                self._stats.pop(key, None)
+
+    def scandir(self, directory: Path) -> Iterator[FileEntry]:
+        directory = Path(directory)
+        entry = self._get(self._listings, directory)
+        if entry is None:
+            listing = [FileEntry(file.name, file.path, file.is_dir()) for file in self.backend.scandir(directory)]
+            entry = (monotonic(), listing)
+            with self._lock:
+                self._listings[directory] = entry
+        return iter(entry[1])
+
+    def stat(self, path: Path) -> FileStat:
+        path = Path(path)
+        entry = self._get(self._stats, path)
+        if entry is None:
+            try:
+                entry = (monotonic(), self.backend.stat(path))
+            except FileNotFoundError:
+                entry = (monotonic(), None)     # Missing files are cached too, exists is called often
+            with self._lock:
+                self._stats[path] = entry
+        if entry[1] is None:
+            raise FileNotFoundError(f"No such file or directory: {path}")
+        return entry[1]
+
+    def copy(self, src: Path, dst: Path) -> Path:
+        new_path = self.backend.copy(src, dst)
+        self.invalidate(new_path)
+        return new_path
+
+    def replace(self, src: Path, dst: Path):
+        try:
+            self.backend.replace(src, dst)
+        finally:
+            self.invalidate(src)
+            self.invalidate(dst)
+
+    def rename(self, src: Path, dst: Path):
+        try:
+            self.backend.rename(src, dst)
+        finally:
+            self.invalidate(src)
+            self.invalidate(dst)
+
+    def unlink(self, path: Path, missing_ok: bool = False):
+        try:
+            self.backend.unlink(path, missing_ok)
+        finally:
+            self.invalidate(path)
+
+    def mkdir(self, path: Path, parents: bool = False, exist_ok: bool = False):
+        try:
+            self.backend.mkdir(path, parents, exist_ok)
+        finally:
+            if parents:     # Every missing parent was created, their listings are unknown
+                self.invalidate()
+            else:
+                self.invalidate(path)
+
+    def rmdir(self, path: Path):
+        try:
+            self.backend.rmdir(path)
+        finally:
+            self.invalidate(path)
+
+    def read_bytes(self, path: Path) -> bytes:
+        return self.backend.read_bytes(path)
+
+    def write_bytes(self, path: Path, data: bytes):
+        try:
+            self.backend.write_bytes(path, data)
+        finally:
+            self.invalidate(path)
+
+    def __init__(self, backend: FileSystem, max_age: float = None):
+        self.backend = backend
+        self.max_age = max_age
+        self._listings: dict[Path, tuple[float, list[FileEntry]]] = dict()
+        self._stats: dict[Path, tuple[float, FileStat|None]] = dict()
+        self._lock = Lock()
+
+_filesystem: FileSystem = OsFileSystem()
+
+def get_filesystem() -> FileSystem:
+    """Returns the backend drive operations go through, the operating system unless set_filesystem was called"""
+    return _filesystem
+
+def set_filesystem(filesystem: FileSystem) -> FileSystem:
+    """Swaps the backend for the whole program and returns the previous one so it can be restored"""
+    global _filesystem
+    previous = _filesystem
+    _filesystem = filesystem
+    return previous
@@ -3,11 +3,15 @@
 from pathlib import Path, WindowsPath, PosixPath
 from pickle import load, dump
 from typing import Any
-from shutil import copy, copy2
-from os import rename
-import re
+from os import replace, open as os_open, write, close, getpid, O_CREAT, O_EXCL, O_WRONLY
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from threading import Lock
+from time import monotonic, sleep, time
 
-from .osi_directory import PART_NUM_REGEX
+from .osi_config import get_drawing_config
+from .osi_trace import traced
+from .osi_filesystem import get_filesystem
 
 def sort_revisions(revisions: list[str]) -> list[str]:
     """Take a list of OSI revisions in the form of strings, makes all alphabetical letters uppercase. Then sort
@@ -22,18 +26,135 @@ def sort_revisions(revisions: list[str]) -> list[str]:
         list[str]: Returns a sorted version of the input list. Note all lowercase alphabeticla letters are
         made uppercase in the returned list.
     """
-    return sorted([rev.upper() for rev in revisions])
+    return sorted([rev.upper() for rev in revisions], key=revision_key)
+
+def revision_key(revision: str) -> str:
+    """Sort key that orders revisions the way sort_revisions does, used to compare or find the latest revision
+    without changing the case of the revisions, E.G. max(revisions, key=revision_key)"""
+    return revision.upper()
 
 def osi_file_store(data: Any, file_path: Path|WindowsPath|PosixPath):
-    """Store python data to a pickle file"""
-    with open(file_path, "wb") as db:
+    """Store python data to a pickle file, the file is written beside the old one and swapped in so a reader
+    never loads a half written file"""
+    file_path = Path(file_path)
+    temp_path = file_path.with_name(file_path.name + ".tmp")
+    with open(temp_path, "wb") as db:
         dump(data, db)
+    replace(temp_path, file_path)
+
+@contextmanager
+def osi_file_lock(file_path: Path|WindowsPath|PosixPath, timeout: float = 60, stale: float = 300):
+    """Holds a lock on a file shared by every process and computer using it, E.G. with osi_file_lock(table): ...
+    The lock is a separate .lock file created beside the file, which works on network drives
+
+    Args:
+        file_path (Path | WindowsPath | PosixPath): File to lock
+        timeout (float, optional): Seconds to wait for the lock before raising TimeoutError. Defaults to 60.
+        stale (float, optional): Seconds after which a lock left by a crashed program is removed. Defaults to 300.
+    """
+    file_path = Path(file_path)
+    lock_path = file_path.with_name(file_path.name + ".lock")
+    start = monotonic()
+    while True:
+        try:
+            lock_file = os_open(lock_path, O_CREAT | O_EXCL | O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time() - lock_path.stat().st_mtime > stale:
+                    lock_path.unlink(missing_ok=True)
+                    continue
+            except FileNotFoundError:
+                continue    # Lock was released while checking it
+            if monotonic() - start > timeout:
+                raise TimeoutError(f"File {file_path} is locked by another program, remove {lock_path} if it is not running")
+            sleep(0.1)
+    try:
+        write(lock_file, str(getpid()).encode())
+        close(lock_file)
+        yield
+    finally:
+        lock_path.unlink(missing_ok=True)
 
 def osi_file_load(file_path: Path|WindowsPath|PosixPath):
     """Loads python data from a pickle file"""
     with open(file_path, "rb") as db:
         return load(db)
     
+def _hold(dst: Path, backup: Path = None) -> Path:
+    """Moves a file out of the way of its replacement, straight into the backup directory if it is on the same
+    drive, otherwise to a hidden name next to the file. Returns where the file was moved"""
+    filesystem = get_filesystem()
+    if backup:
+        try:
+            filesystem.replace(dst, backup.joinpath(dst.name))    # Moves are done by the file server if on the same drive
+            return backup.joinpath(dst.name)
+        except OSError:
+            pass
+    held = dst.parent.joinpath("~" + dst.name + ".old")
+    filesystem.replace(dst, held)
+    return held
+
+def _release(held: Path, dst: Path, backup: Path = None) -> OSError|None:
+    """Copies a file held next to its replacement to the backup directory and removes it. The replacement is already
+    in place, so a failure is printed and returned instead of raised, the held file is left for someone to remove"""
+    filesystem = get_filesystem()
+    if held.parent != dst.parent:   # Already moved into the backup directory
+        return None
+    try:
+        if backup:
+            filesystem.copy(held, backup.joinpath(dst.name))
+        filesystem.unlink(held)
+    except OSError as error:
+        print(f"Warning: {dst} was replaced but the old file {held} could not be backed up or removed: {error}")
+        return error
+    return None
+
+def _temp_path(dst_new: Path) -> Path:
+    return dst_new.parent.joinpath("~" + dst_new.name + ".tmp")
+
+@traced()
+def replace_file_indexed(src: Path, dst: Path, dst_new: Path, backup: Path = None) -> Path:
+    """Replaces a file with a copy of the source under a new name, such as the source name with the index of
+    the replaced file. The source is copied to a hidden temp file next to the destination, the replaced file is
+    moved to the backup, and the temp file is renamed to the new name. The source is the only file copied, and
+    the destination is never half written or left without its index.
+
+    Args:
+        src (Path): Source file to copy to destination. Must be a file not a directory
+        dst (Path): File that is replaced with the source file
+        dst_new (Path): Final path of the copy, E.G. the index of dst followed by the name of src
+        backup (Path): Directory that stores replaced files as a backup to retrieve
+
+    Returns:
+        Path: The new Path of the replaced file
+    """
+    filesystem = get_filesystem()
+    
+    # Verify Inputs
+    if filesystem.is_dir(src) or filesystem.is_dir(dst):
+        raise ValueError("Argument must be a file")
+    if backup:  # Run if backup directory is supplied
+        if not filesystem.is_dir(backup):
+            raise ValueError("Argument must be a directory")
+    
+    # Copy next to the destination, then swap it in with renames only
+    temp = _temp_path(dst_new)
+    filesystem.copy(src, temp)     # Keeps metadata
+    try:
+        held = _hold(dst, backup)
+        try:
+            filesystem.replace(temp, dst_new)
+        except OSError:
+            filesystem.replace(held, dst)
+            raise
+    except OSError:
+        filesystem.unlink(temp, missing_ok=True)
+        raise
+    _release(held, dst, backup)
+    
+    return dst_new
+
 def replace_file(src: Path, dst: Path, backup: Path = None) -> Path:
     """Function replaces the file in the destination path with a copy from the source path
     that has the source files data, filename, and file metadata.
@@ -47,27 +168,86 @@ def replace_file(src: Path, dst: Path, backup: Path = None) -> Path:
     Returns:
         Path: The new Path of the replaced file
     """
+    return replace_file_indexed(src, dst, dst.parent.joinpath(src.name), backup)
+
+@traced()
+def replace_files(replacements: list[tuple[Path, Path, Path]], backup: Path = None) -> list[Path]:
+    """Replaces many files at once in parallel as one all or nothing operation. Every source is first copied to a
+    hidden temp file next to the file it replaces, nothing is replaced unless every copy succeeds. The temp files
+    are then swapped in with renames, each replaced file is held under a hidden name in its own folder, which is
+    the rollback journal. If any swap fails every replacement is undone and the error is raised, the replaced
+    files are only moved to the backup directory once every swap has succeeded. A file that cannot be backed up
+    after that is only a warning, the replacements are done and are returned.
+
+    Args:
+        replacements (list[tuple[Path, Path, Path]]): Each entry is the source file, the file that is replaced,
+        and the new path the source file is copied to, every new path must be different
+        backup (Path): Directory that stores replaced files as a backup to retrieve
+
+    Returns:
+        list[Path]: The new Path of each replaced file in the order given
+    """
+    filesystem = get_filesystem()
+    
     # Verify Inputs
-    if src.is_dir() or dst.is_dir():
-        raise ValueError("Argument must be a file")
     if backup:  # Run if backup directory is supplied
-        if not backup.is_dir():
+        if not filesystem.is_dir(backup):
             raise ValueError("Argument must be a directory")
+    new_paths = [dst_new for src, dst, dst_new in replacements]
+    if new_paths.__len__() != set(new_paths).__len__():
+        duplicates = sorted({str(path) for path in new_paths if new_paths.count(path) > 1})
+        raise ValueError(f"More than one file would be replaced by {', '.join(duplicates)}")
     
-    # Backup file before it is removed
-    if backup:  # Run if backup directory is supplied
-        copy(dst, backup)
+    temps = [_temp_path(dst_new) for src, dst, dst_new in replacements]
+    journal: list[tuple[Path, Path, Path]] = list()    # Entries are the held file, the replaced file, and the new file
+    journal_lock = Lock()
+    
+    def _remove_temps():
+        for temp in temps:
+            try:
+                filesystem.unlink(temp, missing_ok=True)
+            except OSError as error:
+                print(f"Could not remove the temp file {temp}: {error}")
+    
+    def _swap(replacement: tuple[Path, Path, Path], temp: Path):
+        src, dst, dst_new = replacement
+        held = _hold(dst)   # Held next to the file, names in the batch may collide in the backup directory
+        try:
+            filesystem.replace(temp, dst_new)
+        except OSError:
+            filesystem.replace(held, dst)
+            raise
+        with journal_lock:
+            journal.append((held, dst, dst_new))
+    
+    # Copy every file, the replaced files are untouched if any copy failed
+    with ThreadPoolExecutor() as executor:
+        copies = [executor.submit(filesystem.copy, src, temp) for (src, dst, dst_new), temp in zip(replacements, temps)]
+    errors = [future.exception() for future in copies if future.exception() is not None]
+    if errors:
+        _remove_temps()
+        raise errors[0]
+    
+    # Swap every file in, then roll back all of them if any failed
+    with ThreadPoolExecutor() as executor:
+        swaps = [executor.submit(_swap, replacement, temp) for replacement, temp in zip(replacements, temps)]
+    errors = [future.exception() for future in swaps if future.exception() is not None]
+    if errors:
+        # Every entry is restored that can be, one failed restore does not stop the others
+        for held, dst, dst_new in journal:
+            try:
+                filesystem.replace(held, dst)     # Restored first so a failure never leaves neither file in place
+                if dst_new != dst:
+                    filesystem.unlink(dst_new, missing_ok=True)
+            except OSError as error:
+                print(f"Rollback could not restore {dst}, the old file is kept as {held}: {error}")
+        _remove_temps()
+        raise errors[0]
     
-    # Get new file name for os rename function
-    src_file_name = src.name
-    dst_file_path = dst.parent
-    dst_rename = dst_file_path.joinpath(src_file_name)
-
-    # Copy and Rename
-    copy2(src, dst)     # Keeps metadata
-    rename(dst, dst_rename)
+    with ThreadPoolExecutor() as executor:
+        list(executor.map(lambda entry: _release(entry[0], entry[1], backup), journal))
     
-    return dst_rename   # Returns new file path if needed
+    return [replacement[2] for replacement in replacements]
 
 def osi_get_prefix(drawing: str) -> str:
     """Takes a pdf of a engineering drawings in the form of a string and returns the prefix of the drawing number
@@ -80,7 +260,7 @@ def osi_get_prefix(drawing: str) -> str:
         function will return None for error handling
     """
     try:
-        drawing_number = re.search(PART_NUM_REGEX, drawing).group(0)
+        drawing_number = get_drawing_config().part_num_pattern.search(drawing).group(0)
         return drawing_number[:drawing_number.find("-")]
     except AttributeError:
         return None
\ No newline at end of file
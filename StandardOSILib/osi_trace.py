@@ -0,0 +1,127 @@
+"""Span based tracing and I/O counters for OSI programs. Tracing is off unless the OSI_TRACE environment variable is set
+or enable_tracing is called, when off a traced function costs one global check. The trace is stored as a Chrome trace
+json file when the program exits, open it with chrome://tracing or https://ui.perfetto.dev
+    OSI_TRACE=C:\\Temp\\traces python main_console.py"""
+
+from pathlib import Path, WindowsPath, PosixPath
+from os import environ, getpid
+from json import dump
+from time import perf_counter_ns, strftime
+from threading import Lock, local, get_ident
+from functools import wraps
+from contextlib import contextmanager
+from multiprocessing import parent_process
+from typing import Any, Callable
+import atexit
+
+TRACE_ENV = "OSI_TRACE"
+
+class Tracer():
+    """Collects finished spans as Chrome trace complete events. Counters added inside a span are added to every
+    span open on that thread and to the totals for the run
+
+    Args:
+        trace_path (Path): Json file the trace is stored in
+    """
+    def __init__(self, trace_path: Path|WindowsPath|PosixPath):
+        self.trace_path = trace_path
+        self.events: list[dict[str, Any]] = list()
+        self.totals: dict[str, int] = dict()
+        self._start = perf_counter_ns()
+        self._lock = Lock()
+        self._local = local()
+
+    def _stack(self) -> list[dict[str, int]]:
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = list()
+            return self._local.stack
+
+    def count(self, counter: str, amount: int = 1):
+        for counters in self._stack():
+            counters[counter] = counters.get(counter, 0) + amount
+        with self._lock:
+            self.totals[counter] = self.totals.get(counter, 0) + amount
+
+    @contextmanager
+    def span(self, name: str, args: dict[str, Any]):
+        counters: dict[str, int] = dict()
+        stack = self._stack()
+        stack.append(counters)
+        start = perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = perf_counter_ns()
+            stack.pop()
+            self.events.append({"name": name, "cat": "osi", "ph": "X", "pid": getpid(), "tid": get_ident(),
+                                "ts": (start - self._start) / 1000, "dur": (end - start) / 1000,
+                                "args": {**args, **counters}})
+
+    def store(self):
+        self.trace_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            trace = {"traceEvents": list(self.events), "displayTimeUnit": "ms",
+                     "otherData": {"counters": dict(self.totals)}}
+        with open(self.trace_path, "w") as trace_file:
+            dump(trace, trace_file, default=str)
+
+_tracer: Tracer|None = None
+
+def enable_tracing(trace_path: Path|WindowsPath|PosixPath) -> Tracer:
+    """Starts tracing the rest of the run. If the path is a directory a new trace file is made in it for this run
+
+    Args:
+        trace_path (Path): Trace json file or a directory to put one in
+
+    Returns:
+        Tracer: The tracer that is stored when the program exits
+    """
+    global _tracer
+    trace_path = Path(trace_path)
+    if trace_path.is_dir():
+        trace_path = trace_path.joinpath(f"trace-{strftime('%Y%m%d-%H%M%S')}-{getpid()}.json")
+    _tracer = Tracer(trace_path)
+    atexit.register(_tracer.store)
+    return _tracer
+
+def trace_span(name: str, **args: Any):
+    """Context manager that records the time and counters of a block as one span"""
+    if _tracer is None:
+        return _NO_SPAN
+    return _tracer.span(name, args)
+
+def is_tracing() -> bool:
+    """Guard for counters that cost I/O of their own, such as a stat for the size of a copy"""
+    return _tracer is not None
+
+def trace_count(counter: str, amount: int = 1):
+    """Adds to an I/O counter, such as directories listed or bytes copied, of the open spans"""
+    if _tracer is not None:
+        _tracer.count(counter, amount)
+
+def traced(name: str = None) -> Callable:
+    """Decorator that records every call of the function as a span, named after the function by default"""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with _tracer.span(span_name, dict()):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class _NoSpan():
+    def __enter__(self):
+        return None
+    def __exit__(self, *exc):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+# Worker processes import this module too, only the main process writes the trace
+if environ.get(TRACE_ENV) and parent_process() is None:
+    enable_tracing(Path(environ[TRACE_ENV]))
@@ -0,0 +1,148 @@
+"""Functions for checking that the production copies and backups still match the engineering drawings
+    Author: NNP"""
+
+# Imports
+import hashlib
+from time import monotonic, sleep
+from pathlib import Path, WindowsPath, PosixPath
+from threading import Lock
+from typing import NamedTuple, Iterable, Iterator
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+
+from StandardOSILib.osi_functions import osi_file_load, osi_file_store
+from StandardOSILib.osi_filesystem import get_filesystem, FileStat
+from project_functions import get_dwg_number_rev
+from project_data import PROJDATA
+
+CHUNK_SIZE = 1024 * 1024    # Files are hashed 1 MB at a time
+AUDIT_WINDOW = 16           # Locations queued per worker while auditing
+
+class ReadLimiter():
+    """ Shared limit on how many bytes per second all hashing threads can read from the drive """
+    
+    def acquire(self, size: int):
+        """Blocks until the read of size bytes fits within the limit"""
+        if self.bytes_per_second is None:
+            return
+        with self._lock:
+            now = monotonic()
+            self._next_read = max(self._next_read, now)
+            wait = self._next_read - now
+            self._next_read += size / self.bytes_per_second
+        if wait > 0:
+            sleep(wait)
+    
+    def __init__(self, bytes_per_second: float = None):
+        self.bytes_per_second = bytes_per_second     # None does not limit reads
+        self._next_read = monotonic()
+        self._lock = Lock()
+
+class HashCache():
+    """ Hashes of files keyed by their size and modified time, files that have not changed are not read again """
+    
+    def _hash_file(self, file: Path) -> str:
+        file_hash = hashlib.sha256()
+        with open(file, "rb") as data:
+            while True:
+                self.limiter.acquire(CHUNK_SIZE)
+                chunk = data.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                file_hash.update(chunk)
+        return file_hash.hexdigest()
+    
+    def get_hash(self, file: Path, file_stat: FileStat) -> str:
+        # Engineering drawings are shared by many locations, one lock per file stops them being read twice at once
+        with self._lock:
+            file_lock = self._file_locks.setdefault(file, Lock())
+        with file_lock:
+            entry = self.hashes.get(file)
+            if entry is not None and entry[:2] == (file_stat.size, file_stat.mtime_ns):
+                return entry[2]
+            file_hash = self._hash_file(file)
+            self.hashes[file] = (file_stat.size, file_stat.mtime_ns, file_hash)
+        return file_hash
+    
+    def store(self):
+        osi_file_store(self.hashes, self.cache_path)
+    
+    def __init__(self, limiter: ReadLimiter, cache_path: Path = PROJDATA.HASH_CACHE):
+        self.limiter = limiter
+        self.cache_path = cache_path
+        self._lock = Lock()
+        self._file_locks: dict[Path, Lock] = dict()
+        try:
+            self.hashes: dict[Path, tuple[int, int, str]] = osi_file_load(cache_path)
+        except (FileNotFoundError, EOFError):
+            self.hashes = dict()
+
+class AuditResult(NamedTuple):
+    status: str         # MISMATCH, TRUNCATED, ORPHAN, or MISSING
+    dwg_number: str
+    location: Path
+    master: Path|None   # Engineering drawing the location was compared to
+    detail: str
+
+AUDIT_HEADERS = ("Status", "Drawing Number", "Location", "Engineering Drawing", "Detail")
+
+def _stat(file: Path) -> FileStat|None:
+    try:
+        return get_filesystem().stat(file)
+    except FileNotFoundError:
+        return None
+
+def audit_files(locations: Iterable[Path|WindowsPath|PosixPath], revision_index: dict[str, dict[str, Path]],
+                hash_cache: HashCache, max_workers: int = 4) -> Iterator[AuditResult]:
+    """Compares every location with the engineering drawing of the same number and revision. Files are only hashed
+    if their sizes match, and hashes of unchanged files come from the cache. Results are yielded as the locations
+    are checked and only a few locations per worker are in flight, so memory does not grow with the file table.
+
+    Args:
+        locations (Iterable[Path | WindowsPath | PosixPath]): Production copies or backups to check
+        revision_index (dict[str, dict[str, Path]]): Revision index returned by build_revision_index
+        hash_cache (HashCache): Cache of file hashes, also limits how fast files are read
+        max_workers (int, optional): Files stat'd and hashed at once. Defaults to 4.
+
+    Yields:
+        Iterator[AuditResult]: Every location that does not match its engineering drawing
+    """
+    def _audit(pair: tuple[str, Path, Path]) -> AuditResult|None:
+        dwg_number, location, master = pair
+        location_stat = _stat(location)
+        if location_stat is None:
+            return AuditResult("MISSING", dwg_number, location, master, "File in the file table does not exist")
+        master_stat = _stat(master)
+        if master_stat is None:
+            return AuditResult("ORPHAN", dwg_number, location, master, "Engineering drawing was removed")
+        if location_stat.size < master_stat.size:
+            return AuditResult("TRUNCATED", dwg_number, location, master,
+                               f"{location_stat.size} of {master_stat.size} bytes")
+        if location_stat.size != master_stat.size:
+            return AuditResult("MISMATCH", dwg_number, location, master, "File sizes are different")
+        if hash_cache.get_hash(location, location_stat) != hash_cache.get_hash(master, master_stat):
+            return AuditResult("MISMATCH", dwg_number, location, master, "File contents are different")
+        return None
+    
+    in_flight: deque[Future] = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for location in locations:
+            dwg_number, rev = get_dwg_number_rev(location)
+            master = revision_index.get(dwg_number, dict()).get(rev)
+            if master is None:
+                yield AuditResult("ORPHAN", dwg_number, location, None, f"Revision {rev} is not in the engineering directory")
+                continue
+            in_flight.append(executor.submit(_audit, (dwg_number, location, master)))
+            if in_flight.__len__() >= max_workers * AUDIT_WINDOW:
+                result = in_flight.popleft().result()
+                if result is not None:
+                    yield result
+        while in_flight:
+            result = in_flight.popleft().result()
+            if result is not None:
+                yield result
+
+def get_backup_files(backup: Path|WindowsPath|PosixPath) -> list[Path]:
+    """Returns every recognised drawing in the backup directory"""
+    return [Path(file.path) for file in get_filesystem().scandir(backup)
+            if not file.is_dir() and get_dwg_number_rev(Path(file.name)) is not None]
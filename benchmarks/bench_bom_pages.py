@@ -0,0 +1,46 @@
+"""Benchmark: Time and peak memory of reading the BOM text off one drawing as its sheet count grows, the first page
+only reader against reading the whole pdf. Sheet count should barely change the first page only reader
+    python benchmarks/bench_bom_pages.py --pages 1 10 50 200 500"""
+
+import tempfile
+import tracemalloc
+from argparse import ArgumentParser
+from pathlib import Path
+from time import perf_counter
+from typing import Callable
+
+from generate_tree import use_stand_in_drive, make_pdf, bom_page
+
+def measure(operation: Callable[[], None], repeat: int) -> tuple[float, float]:
+    """Best time of repeated runs and the peak memory of one more run in KB"""
+    seconds = list()
+    for _ in range(repeat):
+        start = perf_counter()
+        operation()
+        seconds.append(perf_counter() - start)
+    tracemalloc.start()
+    operation()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(seconds), peak / 1024
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Benchmark BOM text extraction on multi sheet drawings")
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 50, 200, 500], help="sheets in each drawing")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs of each reader, the best is kept")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp:
+        drive = Path(temp)
+        use_stand_in_drive(drive)
+        from bom_functions import extract_bom_text
+        from PyPDF2 import PdfReader
+
+        children = [f"C-{i + 2:04d}" for i in range(8)]
+        print(f"{'sheets':>8}{'first page':>16}{'':>12}{'whole pdf':>16}")
+        for pages in args.pages:
+            file = drive.joinpath(f"MSA-0001-{pages}.pdf")
+            file.write_bytes(make_pdf([bom_page("MSA-0001", "A", children)] + [[f"SHEET {page + 2}"] * 40 for page in range(pages - 1)]))
+            first_seconds, first_kb = measure(lambda: extract_bom_text(file), args.repeat)
+            whole_seconds, whole_kb = measure(lambda: PdfReader(file).pages[0].extract_text(), args.repeat)
+            print(f"{pages:>8}{first_seconds * 1000:>13.2f} ms{first_kb:>9.0f} KB{whole_seconds * 1000:>13.2f} ms{whole_kb:>9.0f} KB")
@@ -0,0 +1,54 @@
+"""Benchmark: Latency and throughput of the index service under concurrent clients. A stand-in engineering drive
+and production folder are built in a temporary directory so the benchmark does not touch the network drive
+    python benchmarks/bench_index_service.py --drawings 5000 --clients 16 --requests 200"""
+
+import tempfile
+from argparse import ArgumentParser
+from pathlib import Path
+from threading import Thread
+from time import perf_counter
+from statistics import median, quantiles
+from concurrent.futures import ThreadPoolExecutor
+
+from generate_tree import use_stand_in_drive, build_tree
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Benchmark the index service")
+    parser.add_argument("--drawings", type=int, default=5000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as temp:
+        drive = Path(temp)
+        use_stand_in_drive(drive)
+        tree = build_tree(drive, args.drawings, ecns=0)
+        from index_service import DrawingIndex, start_index_service
+        from index_client import IndexClient
+        
+        start = perf_counter()
+        index = DrawingIndex([tree.production])
+        print(f"Index of {index.drawings.__len__()} drawings built in {perf_counter() - start:.3f} s")
+        server = start_index_service(index, port=0)
+        Thread(target=server.serve_forever, daemon=True).start()
+        address = f"http://127.0.0.1:{server.server_address[1]}"
+        
+        def _client(client_id: int) -> list[float]:
+            client = IndexClient(address)
+            timings: list[float] = list()
+            for i in range(args.requests):
+                dwg = tree.drawings[(client_id * args.requests + i) % tree.drawings.__len__()]
+                start = perf_counter()
+                client.lookup(dwg)
+                timings.append(perf_counter() - start)
+            return timings
+        
+        start = perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clients) as executor:
+            timings = [timing for client_timings in executor.map(_client, range(args.clients)) for timing in client_timings]
+        elapsed = perf_counter() - start
+        server.shutdown()
+        
+        percentiles = quantiles(timings, n=100)
+        print(f"{timings.__len__()} lookups from {args.clients} clients in {elapsed:.3f} s, {timings.__len__() / elapsed:.0f} requests/s")
+        print(f"Latency p50 {median(timings) * 1000:.2f} ms, p95 {percentiles[94] * 1000:.2f} ms, p99 {percentiles[98] * 1000:.2f} ms")
@@ -0,0 +1,166 @@
+"""Builds a synthetic engineering drive and production folder for benchmarks. The drive has the config files,
+every engineering directory with several revisions of each drawing, nested work instruction folders with indexed
+copies, FM00037 ECN workbooks, and assembly drawings with a bill of materials on the first page
+    python benchmarks/generate_tree.py C:\\Temp\\StandInDrive --drawings 2000"""
+
+import os
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import NamedTuple
+
+import openpyxl
+
+# Must match the keys of PREFIX_LOOKUP_TABLE, the config files have to exist before the project can be imported.
+# FA is left out, the docstring in PREFIX_LOOKUP_TABLE is concatenated onto its key so it is never looked up
+PREFIXES = ("MSA", "ESA", "PSA", "TA", "TSA", "C", "EE", "HW", "MTR", "PKG", "P", "PM", "GA", "KT", "MKT", "TL")
+ASSEMBLY_PREFIXES = ("MSA", "ESA", "PSA", "TA", "TSA")
+REVISIONS = ("A", "B", "C", "D", "E", "F")
+MATERIALS = ("304 STAINLESS STEEL", "316 STAINLESS STEEL", "6061-T6 ALUMINUM", "A36 STEEL", "UHMW POLYETHYLENE")
+DIGITS = 4
+
+class StandInTree(NamedTuple):
+    drive: Path
+    production: Path
+    drawings: list[str]         # Every drawing number in the engineering directories
+    assemblies: list[str]       # Drawing numbers that have a bill of materials
+    ecn_workbooks: list[Path]
+    bom_pdfs: list[Path]        # Latest revision of every assembly drawing
+
+def make_pdf(pages: list[list[str]]) -> bytes:
+    """Returns a minimal pdf with one text line per entry on each page"""
+    objects: list[bytes] = list()
+    page_ids = [3 + i * 2 for i in range(pages.__len__())]
+    font_id = 3 + pages.__len__() * 2
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {pages.__len__()} >>".encode())
+    for page_id, lines in zip(page_ids, pages):
+        text = "".join(f"BT /F1 9 Tf 36 {756 - i * 12} Td ({line}) Tj ET\n" for i, line in enumerate(lines)).encode()
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {page_id + 1} 0 R "
+                       f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>".encode())
+        objects.append(b"<< /Length " + str(text.__len__()).encode() + b" >>\nstream\n" + text + b"endstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets: list[int] = list()
+    for i, obj in enumerate(objects):
+        offsets.append(pdf.__len__())
+        pdf += f"{i + 1} 0 obj\n".encode() + obj + b"\nendobj\n"
+    xref = pdf.__len__()
+    pdf += f"xref\n0 {objects.__len__() + 1}\n0000000000 65535 f \n".encode()
+    pdf += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    pdf += f"trailer\n<< /Size {objects.__len__() + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(pdf)
+
+def write_config(drive: Path):
+    config = drive.joinpath("PROGRAMS/DirectoryProject/config")
+    config.mkdir(parents=True, exist_ok=True)
+    config.joinpath("StandardDrawingPrefixes.csv").write_text("".join(f"{i},{prefix},{DIGITS}\n" for i, prefix in enumerate(PREFIXES)))
+    config.joinpath("ConfigDrawingPrefixes.csv").write_text("")
+    config.joinpath("ProductLines.csv").write_text("Oil Water Seperators,CoolSkim,SkimPro\nBelt Skimmers,Tube Skimmer\n")
+
+def use_stand_in_drive(drive: Path):
+    """Points the project at the stand in drive, must be called before any project module is imported"""
+    write_config(drive)
+    os.environ["OSI_DRIVE"] = str(drive)
+    project = str(Path(__file__).resolve().parents[1])
+    if project not in sys.path:
+        sys.path.insert(0, project)
+
+def bom_page(dwg: str, rev: str, children: list[str]) -> list[str]:
+    """First page text of a drawing, the title block has a date that the BOM parser must skip"""
+    lines = [f"{dwg} REV {rev}", "DRAWN BY NNP 01/15/2024"]
+    lines.extend(f"{i + 1} {child} PART DESCRIPTION {i + 1}" for i, child in enumerate(children))
+    return lines
+
+def build_tree(drive: Path, drawings: int = 1000, revisions: int = 3, pages: int = 1, ecns: int = 20,
+               bom_children: int = 8) -> StandInTree:
+    """Creates the stand in drive, use_stand_in_drive must be called with the same drive first
+
+    Args:
+        drive (Path): Empty folder the drive is built in
+        drawings (int, optional): Drawing numbers spread across every prefix. Defaults to 1000.
+        revisions (int, optional): Revisions of each drawing in the engineering directory. Defaults to 3.
+        pages (int, optional): Pages in each assembly drawing pdf. Defaults to 1.
+        ecns (int, optional): ECN folders with a workbook and updated drawings. Defaults to 20.
+        bom_children (int, optional): Part numbers in the bill of materials of each assembly. Defaults to 8.
+    """
+    from StandardOSILib.osi_directory_append import PREFIX_LOOKUP_TABLE
+    from StandardOSILib.osi_directory import OSIDIR
+    assert set(PREFIXES) <= set(PREFIX_LOOKUP_TABLE.keys()), "PREFIXES is out of date with PREFIX_LOOKUP_TABLE"
+    for directory in PREFIX_LOOKUP_TABLE.values():
+        directory.mkdir(parents=True, exist_ok=True)
+    
+    # Drawing numbers, assemblies use the drawings after them so the BOM is a tree ten or so levels deep
+    dwg_numbers = [f"{PREFIXES[i % PREFIXES.__len__()]}-{i // PREFIXES.__len__() + 1:0{DIGITS}d}" for i in range(drawings)]
+    assemblies = [dwg for dwg in dwg_numbers if dwg.split("-")[0] in ASSEMBLY_PREFIXES]
+    children: dict[str, list[str]] = dict()
+    for i, dwg in enumerate(dwg_numbers):
+        if dwg in assemblies:
+            children[dwg] = dwg_numbers[i + 1:i + 1 + bom_children]
+    
+    # Engineering directories
+    bom_pdfs: list[Path] = list()
+    plain_pdf = make_pdf([["PART DRAWING"]])
+    for i, dwg in enumerate(dwg_numbers):
+        directory = PREFIX_LOOKUP_TABLE[dwg.split("-")[0]]
+        for rev in REVISIONS[:revisions]:
+            file_path = directory.joinpath(f"{dwg}-{rev}.pdf")
+            if dwg in children:
+                extra_pages = [[f"SHEET {page + 2}"] * 40 for page in range(pages - 1)]
+                file_path.write_bytes(make_pdf([bom_page(dwg, rev, children[dwg])] + extra_pages))
+            else:
+                file_path.write_bytes(make_pdf([[f"{dwg} REV {rev}", f"MATERIAL {MATERIALS[i % MATERIALS.__len__()]}"]]))
+        if dwg in children:
+            bom_pdfs.append(file_path)
+    
+    # Production folder, product lines hold work instructions with indexed copies of older revisions
+    production = drive.joinpath("PRODUCTION")
+    product_lines = ("Oil Water Seperators/CoolSkim", "Oil Water Seperators/SkimPro", "Belt Skimmers/Tube Skimmer")
+    for i, dwg in enumerate(dwg_numbers):
+        work_instruction = production.joinpath(product_lines[i % 3], f"WI-{i // 60:03d}", f"STEP-{i // 20 % 3:02d}")
+        work_instruction.mkdir(parents=True, exist_ok=True)
+        rev = REVISIONS[(i % revisions)]
+        work_instruction.joinpath(f"{i % 20 + 1:03d}-{dwg}-{rev}.pdf").write_bytes(plain_pdf)
+    
+    # ECN workbooks in the FM00037 layout, the drawing number column is the assembly level
+    ecn_workbooks: list[Path] = list()
+    for e in range(ecns):
+        ecn_name = f"ECN-{e + 1:05d}"
+        ecn_folder = OSIDIR.ECN_FOLDER.joinpath(ecn_name)
+        ecn_folder.joinpath("Updated Drawings").mkdir(parents=True, exist_ok=True)
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.title = "Bill of Materials"
+        ws.append(["ENGINEERING CHANGE NOTICE", ecn_name])
+        ws.append([])
+        ws.append(["Level 0", "Level 1", "Level 2", "", "", "", "", "", "", "", "", "Revision", "Disposition"])
+        for j in range(10):
+            dwg = dwg_numbers[(e * 10 + j) % drawings]
+            row = [None] * 13
+            row[j % 3] = dwg
+            row[11] = "-" + REVISIONS[revisions - 1]
+            row[12] = ("Running Change", "Use As Is", "Old Product")[j % 3]
+            ws.append(row)
+            if row[12] == "Running Change":
+                ecn_folder.joinpath("Updated Drawings", f"{dwg}-{REVISIONS[revisions - 1]}.pdf").write_bytes(plain_pdf)
+        workbook = ecn_folder.joinpath(ecn_name + ".xlsx")
+        wb.save(workbook)
+        ecn_workbooks.append(workbook)
+    
+    return StandInTree(drive, production, dwg_numbers, assemblies, ecn_workbooks, bom_pdfs)
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Build a stand in engineering drive")
+    parser.add_argument("drive", type=Path, help="empty folder the drive is built in")
+    parser.add_argument("--drawings", type=int, default=1000)
+    parser.add_argument("--revisions", type=int, default=3)
+    parser.add_argument("--pages", type=int, default=1)
+    parser.add_argument("--ecns", type=int, default=20)
+    args = parser.parse_args()
+    
+    use_stand_in_drive(args.drive)
+    tree = build_tree(args.drive, args.drawings, args.revisions, args.pages, args.ecns)
+    print(f"Built {tree.drawings.__len__()} drawings, {tree.assemblies.__len__()} assemblies, "
+          f"and {tree.ecn_workbooks.__len__()} ECNs in {args.drive}")
+    print(f"Set OSI_DRIVE={args.drive} to use it")
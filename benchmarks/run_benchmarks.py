@@ -0,0 +1,148 @@
+"""Benchmark: Time and peak memory of the core drawing operations on a synthetic production tree at several scales,
+compared against a stored baseline. Each scale runs in its own process since the drive is fixed when the project
+is imported
+    python benchmarks/run_benchmarks.py --scales 500 2000 5000
+    python benchmarks/run_benchmarks.py --update-baseline"""
+
+import os
+import sys
+import json
+import random
+import tempfile
+import tracemalloc
+import subprocess
+from argparse import ArgumentParser, SUPPRESS
+from pathlib import Path
+from shutil import copy2
+from time import perf_counter
+from typing import Callable
+
+from generate_tree import use_stand_in_drive, build_tree
+
+BASELINE = Path(__file__).with_name("baseline.json")
+SAMPLE = 100    # Drawings looked up by the per drawing operations
+
+def measure(operation: Callable[[], None], repeat: int) -> dict[str, float]:
+    """Best time of repeated runs, then one run under tracemalloc for the peak memory since tracing slows the run"""
+    seconds = list()
+    for _ in range(repeat):
+        start = perf_counter()
+        operation()
+        seconds.append(perf_counter() - start)
+    tracemalloc.start()
+    operation()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": round(min(seconds), 6), "peak_kb": round(peak / 1024, 1)}
+
+def run_scale(drawings: int, pages: int, repeat: int, cached: bool = False) -> dict[str, dict[str, float]]:
+    """Builds the tree for one scale and measures every operation, runs in the child process"""
+    with tempfile.TemporaryDirectory() as temp:
+        drive = Path(temp)
+        use_stand_in_drive(drive)
+        tree = build_tree(drive, drawings, pages=pages)
+        os.chdir(drive)     # Cache files are written relative to the working directory
+        
+        from project_functions import get_drawings, get_available_dwg_revisions
+        from ecn_functions import EcnIndex
+        from bom_functions import get_bom_part_numbers
+        from StandardOSILib.osi_functions import replace_file
+        from StandardOSILib.osi_filesystem import CachingFileSystem, OsFileSystem, set_filesystem
+        if cached:
+            set_filesystem(CachingFileSystem(OsFileSystem()))
+        
+        rng = random.Random(drawings)
+        sample = rng.sample(tree.drawings, min(SAMPLE, tree.drawings.__len__()))
+        locations = [file for folder in get_drawings(tree.production).values() for file in folder]
+        targets = rng.sample(locations, min(SAMPLE, locations.__len__()))
+        scratch = drive.joinpath("SCRATCH")
+        scratch.mkdir()
+        backup = drive.joinpath("BACKUP")
+        backup.mkdir()
+        
+        def replace_sample():
+            # Replaces copies in a scratch folder so every run starts from the same production files
+            for i, target in enumerate(targets):
+                dst = scratch.joinpath(f"{i:03d}-{Path(target).name}")
+                copy2(target, dst)
+                replace_file(tree.bom_pdfs[i % tree.bom_pdfs.__len__()], dst, backup)
+                for file in scratch.iterdir():
+                    file.unlink()
+        
+        ecn_index = EcnIndex()
+        ecn_names = [workbook.stem for workbook in tree.ecn_workbooks]
+        
+        def read_ecns_cold():
+            ecn_index.ecn_stats.clear()
+            for ecn_name in ecn_names:
+                ecn_index.read_ecn_changes(ecn_name)
+        
+        def read_ecns_warm():
+            for ecn_name in ecn_names:
+                ecn_index.read_ecn_changes(ecn_name)
+        
+        operations: dict[str, Callable[[], None]] = {
+            "get_drawings": lambda: get_drawings(tree.production),
+            "get_available_dwg_revisions": lambda: [get_available_dwg_revisions(dwg) for dwg in sample],
+            "replace_file": replace_sample,
+            "read_ecn_changes_cold": read_ecns_cold,
+            "read_ecn_changes_warm": read_ecns_warm,
+            "get_bom_part_numbers": lambda: [get_bom_part_numbers(file) for file in tree.bom_pdfs],
+        }
+        results = {name: measure(operation, repeat) for name, operation in operations.items()}
+        os.chdir(Path(__file__).parent)
+    return results
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Returns a line for every operation that is slower or larger than the baseline by more than the tolerance"""
+    regressions = list()
+    for scale, operations in results.items():
+        for name, result in operations.items():
+            base = baseline.get(scale, dict()).get(name)
+            if base is None:
+                continue
+            for metric in ("seconds", "peak_kb"):
+                if base[metric] > 0 and result[metric] > base[metric] * (1 + tolerance):
+                    regressions.append(f"{scale} {name} {metric}: {base[metric]} -> {result[metric]}")
+    return regressions
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Benchmark the core drawing operations against a stored baseline")
+    parser.add_argument("--scales", type=int, nargs="+", default=[500, 2000], help="drawings in each synthetic tree")
+    parser.add_argument("--pages", type=int, default=1, help="pages in each assembly drawing")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs of each operation, the best is kept")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown before a regression is reported")
+    parser.add_argument("--cached", action="store_true", help="run the operations through the metadata cache")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--child", type=int, help=SUPPRESS)   # Runs one scale in the child process
+    args = parser.parse_args()
+    
+    if args.child is not None:
+        print(json.dumps(run_scale(args.child, args.pages, args.repeat, args.cached)))
+        sys.exit(0)
+    
+    results: dict[str, dict[str, dict[str, float]]] = dict()
+    for scale in args.scales:
+        command = [sys.executable, __file__, "--child", str(scale), "--pages", str(args.pages), "--repeat", str(args.repeat)]
+        if args.cached:
+            command.append("--cached")
+        child = subprocess.run(command, capture_output=True, text=True, check=True)
+        results[str(scale)] = json.loads(child.stdout.splitlines()[-1])
+        print(f"\n{scale} drawings")
+        for name, result in results[str(scale)].items():
+            print(f"  {name:<30}{result['seconds']:>10.4f} s{result['peak_kb']:>12.1f} KB")
+    
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f"\nBaseline stored in {args.baseline}")
+        sys.exit(0)
+    
+    if not args.baseline.exists():
+        print("\nNo baseline to compare against, run with --update-baseline to store one")
+        sys.exit(0)
+    regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+    for line in regressions:
+        print("REGRESSION", line)
+    print(f"\n{regressions.__len__()} regressions against {args.baseline}")
+    sys.exit(1 if regressions else 0)
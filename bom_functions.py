@@ -0,0 +1,407 @@
+"""Functions for reading the bill of materials off of drawing pdfs
+    Author: NNP"""
+
+# Imports
+import re
+from mmap import mmap, ACCESS_READ
+from pathlib import Path, WindowsPath, PosixPath
+from typing import NamedTuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from StandardOSILib.osi_functions import osi_file_load, osi_file_store, osi_get_prefix
+from StandardOSILib.osi_config import get_drawing_config
+from StandardOSILib.osi_directory_append import PREFIX_LOOKUP_TABLE
+from StandardOSILib.osi_trace import traced, trace_count
+from StandardOSILib.osi_filesystem import get_filesystem
+from project_functions import get_dwg_number_rev, get_revision_index, get_latest_revision
+from project_data import PROJDATA
+from PyPDF2 import PdfReader, PageObject
+from PyPDF2.errors import PdfReadError
+from PyPDF2.generic import IndirectObject, NameObject
+
+INHERITABLE_PAGE_ATTRIBUTES = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+
+def get_first_page(pdf_reader: PdfReader) -> PageObject:
+    """Follows the first kid of each node of the page tree down to the first page, with the attributes it inherits
+    from the nodes above it. Only the objects on that path are read, pdf_reader.pages reads every page of the pdf"""
+    node = pdf_reader.trailer["/Root"].get_object()["/Pages"]
+    reference = None
+    inherited = dict()
+    while True:
+        if isinstance(node, IndirectObject):
+            reference = node
+        node = node.get_object()
+        if node.get("/Type", "/Pages") != "/Pages":
+            break
+        for attribute in INHERITABLE_PAGE_ATTRIBUTES:
+            if attribute in node:
+                inherited[NameObject(attribute)] = node[attribute]
+        kids = node.get("/Kids")
+        if not kids:
+            raise PdfReadError("Pdf has no pages")
+        node = kids[0]
+    
+    pdf_page = PageObject(pdf_reader, reference)
+    pdf_page.update(node)
+    for attribute, value in inherited.items():
+        if attribute not in pdf_page:   # The page's own value is kept over the inherited one
+            pdf_page[attribute] = value
+    return pdf_page
+
+def extract_bom_text(file: Path|WindowsPath|PosixPath) -> str:
+    """Returns the text of the first page of a drawing pdf, the BOM should be on the first page. The pdf is memory
+    mapped instead of read into memory and only the first page is parsed, a multi sheet assembly costs about the
+    same as a single sheet"""
+    trace_count("pdfs_opened")
+    with open(file, "rb") as pdf_file, mmap(pdf_file.fileno(), 0, access=ACCESS_READ) as pdf_map:
+        return get_first_page(PdfReader(pdf_map)).extract_text()
+
+def parse_bom_part_numbers(file_text: str, file: Path|WindowsPath|PosixPath) -> list[str]:
+    """Takes the text of a drawings first page and returns the part numbers in its bill of materials
+
+    Args:
+        file_text (str): Text extracted from the first page of the drawing pdf
+        file (Path | WindowsPath | PosixPath): The drawing pdf the text was extracted from, used to remove the
+        drawings own number from the BOM
+
+    Returns:
+        list[str]: Part numbers found in the bill of materials
+    """
+    # Split Lines
+    part_num_pattern = get_drawing_config().part_num_pattern
+    split_file_text = file_text.splitlines()
+    
+    # Remove lines without part nummbers
+    part_number_text = dict()       # Part number is key, line is value
+    for line in split_file_text:
+        part_number = part_num_pattern.search(line)
+        if not part_number:
+            continue
+        part_number_text[part_number.group(0)] = part_num_pattern.sub("", line)
+        # !!!The part number must be removed from the line, some product codes get picked up by the regex
+        # That looks for dates
+    del split_file_text
+    
+    # Remove lines that dont begin with a number (All BOM items have a number at the start of the line)
+    remove_lines = list()  
+    for key in part_number_text:
+        if part_number_text[key][:1].isnumeric():
+            continue
+        remove_lines.append(key)
+    for key in remove_lines:
+        part_number_text.pop(key)
+    del remove_lines
+          
+    # Remove lines with dates
+    remove_lines = list()  
+    for key in part_number_text:
+        date = re.search(r"\d{2,4}[-\/]\d{2,4}[-\/]\d{2,4}", part_number_text[key])
+        if not date:
+            continue
+        remove_lines.append(key)
+    for key in remove_lines:
+        part_number_text.pop(key)
+    del remove_lines
+    
+    # Remove lines that share the drawing number with the file name
+    file_dwg_number_rev = get_dwg_number_rev(file)
+    if file_dwg_number_rev is not None:
+        part_number_text.pop(file_dwg_number_rev[0], None)
+    
+    return list(part_number_text.keys())
+
+@traced()
+def get_bom_part_numbers(file: Path|WindowsPath|PosixPath) -> list[str]:
+    """Reads the first page of a drawing pdf and returns the part numbers in its bill of materials"""
+    return parse_bom_part_numbers(extract_bom_text(file), file)
+
+def read_bom_part_numbers(file: Path|WindowsPath|PosixPath) -> list[str]|None:
+    """Returns the BOM part numbers of a drawing pdf, safe to run on a process pool. Pdfs that cannot be read return
+    None so one bad drawing does not stop the others"""
+    try:
+        return get_bom_part_numbers(file)
+    except Exception as error:     # PyPDF2 raises many error types on damaged or encrypted drawings, mmap on empty files
+        print(f"Could not read the BOM from {file}: {error}")
+        return None
+
+class BomCache():
+    """ Parsed BOM part numbers keyed by the drawing path, size and modified time. The cache is loaded once and only
+        stored if an entry changed, one cache is shared by every level of a BOM explosion """
+    
+    @traced("BomCache.get_part_numbers")
+    def get_part_numbers(self, files: list[Path|WindowsPath|PosixPath],
+                         executor: ProcessPoolExecutor = None) -> dict[Path, list[str]]:
+        """Returns the BOM part numbers for every file, only drawings that changed since they were cached are read.
+        Changed drawings are read on a process pool as pdf text extraction is cpu bound. Drawings that cannot be read
+        are printed and have an empty BOM, they are cached as empty until they change.
+
+        Args:
+            files (list[Path | WindowsPath | PosixPath]): Drawing pdfs to get the bill of materials from
+            executor (ProcessPoolExecutor, optional): Process pool to read the drawings on, a new pool is started
+            if not supplied. Defaults to None.
+
+        Returns:
+            dict[Path, list[str]]: Key is the drawing pdf, value is the part numbers in its bill of materials
+        """
+        # Find the drawings that are new or changed since they were cached
+        bom_part_numbers: dict[Path, list[str]] = dict()
+        file_stats: dict[Path, tuple[int, int]] = dict()
+        changed_files: list[Path] = list()
+        filesystem = get_filesystem()
+        for file in files:
+            try:
+                file_stat = filesystem.stat(file)
+            except OSError as error:    # Removed or renamed since it was found, not cached
+                print(f"Could not read the BOM from {file}: {error}")
+                bom_part_numbers[file] = list()
+                continue
+            file_stats[file] = (file_stat.size, file_stat.mtime_ns)
+            entry = self.entries.get(file)
+            if entry is not None and entry[:2] == file_stats[file]:
+                bom_part_numbers[file] = entry[2]
+            else:
+                changed_files.append(file)
+        
+        # Read the changed drawings across all cores
+        if changed_files:
+            pool = executor if executor is not None else ProcessPoolExecutor()
+            failed_files: list[Path] = list()
+            try:
+                for file, part_numbers in zip(changed_files, pool.map(read_bom_part_numbers, changed_files)):
+                    if part_numbers is None:
+                        failed_files.append(file)
+                        part_numbers = list()
+                    bom_part_numbers[file] = part_numbers
+                    self.entries[file] = (*file_stats[file], part_numbers)
+                    self.changed = True
+            finally:
+                if executor is None:
+                    pool.shutdown()
+            if failed_files:
+                print(f"{failed_files.__len__()} drawings could not be read and are treated as having no BOM:")
+                for file in failed_files:
+                    print(f"    {file}")
+        
+        return bom_part_numbers
+    
+    def store(self):
+        if self.changed:
+            osi_file_store({"regex": self.regex, "entries": self.entries}, self.cache_path)
+            self.changed = False
+    
+    def __init__(self, cache_path: Path|WindowsPath|PosixPath = PROJDATA.BOM_CACHE):
+        self.cache_path = cache_path
+        self.changed = False
+        # The cache is thrown out if the part number regex changed, the parsed part numbers would be different
+        self.regex = get_drawing_config().part_num_regex
+        try:
+            cache = osi_file_load(cache_path)
+            if cache["regex"] != self.regex:
+                raise ValueError
+        except (FileNotFoundError, EOFError, KeyError, ValueError):
+            cache = {"regex": self.regex, "entries": dict()}
+        self.entries: dict[Path, tuple[int, int, list[str]]] = cache["entries"]
+
+def get_bom_part_numbers_cached(files: list[Path|WindowsPath|PosixPath],
+                                cache_path: Path|WindowsPath|PosixPath = PROJDATA.BOM_CACHE,
+                                executor: ProcessPoolExecutor = None) -> dict[Path, list[str]]:
+    """Returns the BOM part numbers for every file with a BomCache that is loaded and stored for this one call,
+    see BomCache.get_part_numbers. Use a BomCache directly when the part numbers are read in several batches.
+
+    Args:
+        files (list[Path | WindowsPath | PosixPath]): Drawing pdfs to get the bill of materials from
+        cache_path (Path | WindowsPath | PosixPath, optional): Pickle file that stores the parsed part numbers.
+        Defaults to PROJDATA.BOM_CACHE.
+        executor (ProcessPoolExecutor, optional): Process pool to read the drawings on. Defaults to None.
+
+    Returns:
+        dict[Path, list[str]]: Key is the drawing pdf, value is the part numbers in its bill of materials
+    """
+    bom_cache = BomCache(cache_path)
+    bom_part_numbers = bom_cache.get_part_numbers(files, executor)
+    bom_cache.store()
+    return bom_part_numbers
+
+class BomExplosion(NamedTuple):
+    top_drawing: str
+    drawings: dict[str, Path]       # Part number is key, latest drawing pdf is value
+    children: dict[str, list[str]]  # Part number is key, part numbers in its BOM is value
+    order: list[str]                # Part numbers in depth first order from the top drawing
+    missing: list[str]              # Part numbers that do not have a drawing in the engineering directory
+
+def explode_bom(top_drawing: Path|WindowsPath|PosixPath,
+                cache_path: Path|WindowsPath|PosixPath = PROJDATA.BOM_CACHE) -> BomExplosion:
+    """Follows every part number in the BOM of the top drawing to its latest drawing in the engineering directory,
+    and recursively reads the BOM of those drawings. Each level of the assembly is read at once on a process pool,
+    and a part number that is used by more than one subassembly is only read once.
+
+    Args:
+        top_drawing (Path | WindowsPath | PosixPath): Drawing pdf of the top level assembly
+        cache_path (Path | WindowsPath | PosixPath, optional): Pickle file of the BOM cache.
+        Defaults to PROJDATA.BOM_CACHE.
+
+    Raises:
+        ValueError: The top drawing is not a recognised drawing number, or an assembly contains itself
+
+    Returns:
+        BomExplosion: The deduplicated drawings of the assembly and how they are related
+    """
+    top_dwg_number_rev = get_dwg_number_rev(top_drawing)
+    if top_dwg_number_rev is None:
+        raise ValueError(f"File {top_drawing} is not a recognised drawing number")
+    top_dwg = top_dwg_number_rev[0]
+    
+    drawings: dict[str, Path] = {top_dwg: top_drawing}
+    children: dict[str, list[str]] = dict()
+    missing: list[str] = list()
+    revision_indexes: dict[Path, dict[str, dict[str, Path]]] = dict()   # Each engineering directory is scanned once
+    
+    def _find_latest_drawing(dwg: str) -> Path|None:
+        directory = PREFIX_LOOKUP_TABLE.get(osi_get_prefix(dwg))
+        if directory is None:
+            return None
+        if directory not in revision_indexes:
+            revision_indexes[directory] = get_revision_index(directory)
+        latest = get_latest_revision(revision_indexes[directory].get(dwg))
+        return None if latest is None else latest[1]
+    
+    # Read the assembly one level at a time, the cache is loaded once and stored once for the whole explosion
+    level = [top_dwg]
+    bom_cache = BomCache(cache_path)
+    with ProcessPoolExecutor() as executor:
+        while level:
+            bom_part_numbers = bom_cache.get_part_numbers([drawings[dwg] for dwg in level], executor)
+            next_level: list[str] = list()
+            for dwg in level:
+                children[dwg] = bom_part_numbers[drawings[dwg]]
+                for child in children[dwg]:
+                    if child in drawings or child in missing:     # Already found from another subassembly
+                        continue
+                    drawing = _find_latest_drawing(child)
+                    if drawing is None:
+                        missing.append(child)
+                        continue
+                    drawings[child] = drawing
+                    next_level.append(child)
+            level = next_level
+    bom_cache.store()
+    
+    # Order the drawings depth first and check that no assembly contains itself
+    order: list[str] = list()
+    path: list[str] = list()
+    
+    def _visit(dwg: str):
+        if dwg in path:
+            raise ValueError(f"Assembly cycle found: {' -> '.join(path[path.index(dwg):] + [dwg])}")
+        if dwg in order or dwg not in drawings:
+            return
+        order.append(dwg)
+        path.append(dwg)
+        for child in children[dwg]:
+            _visit(child)
+        path.pop()
+        
+    _visit(top_dwg)
+    return BomExplosion(top_dwg, drawings, children, order, missing)
+
+def build_kit_folder(explosion: BomExplosion, target: Path|WindowsPath|PosixPath) -> list[Path]:
+    """Copies every drawing of an exploded BOM into the target folder with index prefixes in depth first order,
+    the copies are run in parallel.
+
+    Args:
+        explosion (BomExplosion): Exploded BOM returned by explode_bom
+        target (Path | WindowsPath | PosixPath): Folder the drawings are copied into, created if it does not exist
+
+    Returns:
+        list[Path]: The paths of the copied drawings in index order
+    """
+    filesystem = get_filesystem()
+    filesystem.mkdir(target, parents=True, exist_ok=True)
+    width = max(3, str(explosion.order.__len__()).__len__())     # Index is at least 3 numbers, 001-
+    src_paths = [explosion.drawings[dwg] for dwg in explosion.order]
+    dst_paths = [target.joinpath(f"{i+1:0{width}d}-{src.name}") for i, src in enumerate(src_paths)]
+    with ThreadPoolExecutor() as executor:
+        return [Path(file) for file in executor.map(filesystem.copy, src_paths, dst_paths)]
+
+class BomGraph():
+    """ Stores which part numbers each assembly uses, indexed in both directions so where used queries
+        do not have to read any pdfs """
+    
+    def _set_children(self, dwg: str, part_numbers: list[str]):
+        """Replaces the BOM of an assembly and keeps the where used index in sync"""
+        for child in self.children.get(dwg, list()):
+            self.parents[child].discard(dwg)
+            if not self.parents[child]:
+                self.parents.pop(child)
+        self.children[dwg] = list(part_numbers)
+        for child in part_numbers:
+            self.parents.setdefault(child, set()).add(dwg)
+    
+    def update(self, revision_index: dict[str, dict[str, Path]]) -> list[str]:
+        """Reads the BOM of every drawing whose latest revision changed since it was last stored
+
+        Args:
+            revision_index (dict[str, dict[str, Path]]): Revision index returned by build_revision_index
+
+        Returns:
+            list[str]: Drawing numbers that were read
+        """
+        changed: dict[Path, tuple[str, str]] = dict()
+        for dwg, available_revisions in revision_index.items():
+            latest_rev, drawing = get_latest_revision(available_revisions)
+            if self.revisions.get(dwg) == latest_rev:
+                continue
+            changed[drawing] = (dwg, latest_rev)
+        
+        # Drawings that no longer exist are removed from the graph
+        for dwg in [dwg for dwg in self.revisions if dwg not in revision_index]:
+            self._set_children(dwg, list())
+            self.children.pop(dwg)
+            self.revisions.pop(dwg)
+        
+        if changed:
+            bom_part_numbers = get_bom_part_numbers_cached(list(changed.keys()))
+            for drawing, (dwg, latest_rev) in changed.items():
+                self._set_children(dwg, bom_part_numbers[drawing])
+                self.revisions[dwg] = latest_rev
+        return [dwg for dwg, _ in changed.values()]
+    
+    def where_used(self, dwg: str) -> set[str]:
+        """Returns the assemblies that have the drawing in their BOM"""
+        return set(self.parents.get(dwg, set()))
+    
+    def ancestry(self, dwg: str) -> set[str]:
+        """Returns every assembly the drawing is used in at any level"""
+        ancestors: set[str] = set()
+        level = [dwg]
+        while level:
+            next_level: list[str] = list()
+            for child in level:
+                for parent in self.parents.get(child, set()):
+                    if parent in ancestors:
+                        continue
+                    ancestors.add(parent)
+                    next_level.append(parent)
+            level = next_level
+        return ancestors
+    
+    def ecn_impact(self, dwg_numbers: list[str]) -> dict[str, set[str]]:
+        """Takes the drawings changed by an ECN and returns every assembly affected by each drawing"""
+        return {dwg: self.ancestry(dwg) for dwg in dwg_numbers}
+    
+    def store(self):
+        osi_file_store((self.revisions, self.children), self.graph_path)
+    
+    def __init__(self, graph_path: Path = PROJDATA.BOM_GRAPH):
+        self.graph_path = graph_path
+        self.revisions: dict[str, str] = dict()             # Drawing number is key, revision read is value
+        self.children: dict[str, list[str]] = dict()        # Assembly is key, part numbers in its BOM is value
+        self.parents: dict[str, set[str]] = dict()          # Part number is key, assemblies that use it is value
+        
+        # The where used index is rebuilt on load so the stored graph cannot fall out of sync
+        try:
+            self.revisions, children = osi_file_load(graph_path)
+        except (FileNotFoundError, EOFError):
+            return
+        for dwg, part_numbers in children.items():
+            self._set_children(dwg, part_numbers)
@@ -0,0 +1,291 @@
+"""Functions for finding engineering change notices and the drawings they change
+    Author: NNP"""
+
+# Imports
+import tempfile
+from pathlib import Path
+from typing import NamedTuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from StandardOSILib.osi_functions import osi_file_load, osi_file_store, replace_files
+from StandardOSILib.osi_directory import OSIDIR
+from StandardOSILib.osi_trace import traced, trace_count
+from StandardOSILib.osi_filesystem import get_filesystem
+from project_functions import EcnFile, EcnChange, parse_ecn_workbook, get_index_length, FileTable
+from project_data import PROJDATA, PROJDIR
+
+class EcnHistory(NamedTuple):
+    ecn_name: str
+    new_revision: str
+    disposition: str
+
+def read_ecn_workbook(workbook: Path) -> tuple[list[EcnChange]|None, str|None]:
+    """Returns the changes in an ECN workbook and None, or None and the error if it cannot be read. Safe to run on a
+    process pool, one bad workbook does not stop the others"""
+    try:
+        return parse_ecn_workbook(workbook), None
+    except Exception as error:     # openpyxl raises many error types, a missing sheet is a KeyError
+        return None, f"{type(error).__name__}: {error}"
+
+class EcnIndex():
+    """ Index of every ECN in the ECN folder, and the ECNs that changed each drawing """
+    
+    def _stat_ecn(self, ecn_folder: Path) -> tuple[int, int]|None:
+        """Returns the size and modified time of the ECN workbook in the folder, None if it does not have one"""
+        try:
+            ecn_stat = get_filesystem().stat(ecn_folder.joinpath(ecn_folder.name + ".xlsx"))
+        except FileNotFoundError:
+            return None
+        return ecn_stat.size, ecn_stat.mtime_ns
+    
+    @traced("EcnIndex.refresh")
+    def refresh(self) -> list[str]:
+        """Scans the ECN folder once and reads only the ECN workbooks that are new or changed, the workbooks
+        are read on a process pool. Workbooks that cannot be read are printed and kept in ecn_errors, they are read
+        again on the next refresh.
+
+        Returns:
+            list[str]: Names of the ECNs that were read
+        """
+        # Find every ECN folder
+        self.ecn_folders.clear()
+        self._workbooks.clear()
+        for file in get_filesystem().scandir(self.ecn_root):
+            if file.name.startswith("ECN-") and file.is_dir():
+                self.ecn_folders[file.name] = Path(file.path)
+        
+        # Check every workbook for changes, network stats are run concurrently
+        ecn_names = list(self.ecn_folders.keys())
+        with ThreadPoolExecutor() as executor:
+            ecn_stats = dict(zip(ecn_names, executor.map(self._stat_ecn, self.ecn_folders.values())))
+        changed = [name for name in ecn_names if ecn_stats[name] is not None and self.ecn_stats.get(name) != ecn_stats[name]]
+        
+        # Drop ECNs that were removed or lost their workbook
+        for name in [name for name in self.ecn_stats if ecn_stats.get(name) is None]:
+            self.ecn_stats.pop(name)
+            self.ecn_changes.pop(name, None)
+        
+        # Read the changed workbooks across all cores
+        if changed:
+            workbooks = [self.ecn_folders[name].joinpath(name + ".xlsx") for name in changed]
+            with ProcessPoolExecutor() as executor:
+                for name, (ecn_changes, error) in zip(changed, executor.map(read_ecn_workbook, workbooks)):
+                    if error is not None:
+                        print(f"Could not read ECN workbook {self.ecn_folders[name].joinpath(name + '.xlsx')}: {error}")
+                        self.ecn_errors[name] = error
+                        self.ecn_stats.pop(name, None)
+                        self.ecn_changes.pop(name, None)
+                        continue
+                    self.ecn_errors.pop(name, None)
+                    self.ecn_changes[name] = ecn_changes
+                    self.ecn_stats[name] = ecn_stats[name]
+        for name in [name for name in self.ecn_errors if ecn_stats.get(name) is None]:
+            self.ecn_errors.pop(name)
+        
+        self._build_history()
+        return changed
+    
+    def _build_history(self):
+        """Rebuilds the drawing history from the stored changes"""
+        self.drawing_history.clear()
+        for name in sorted(self.ecn_changes.keys()):
+            for change in self.ecn_changes[name]:
+                self.drawing_history.setdefault(change.dwg_number, list()).append(
+                    EcnHistory(name, change.new_revision, change.disposition))
+    
+    @traced("EcnIndex.read_ecn_changes")
+    def read_ecn_changes(self, ecn_name: str) -> list[EcnChange]:
+        """Returns the changes in an ECN that are not old product. The workbook is only read if it changed since it
+        was indexed, errors reading it are raised so an ECN is never pushed from a workbook that was not read
+
+        Args:
+            ecn_name (str): ECN folder name, E.G. ECN-01234
+
+        Returns:
+            list[EcnChange]: Every change in the ECN that is not old product
+        """
+        ecn_folder = self.ecn_folders.get(ecn_name)
+        if ecn_folder is None:
+            raise FileNotFoundError(f"ECN: {ecn_name} does not have a folder in the location {self.ecn_root}")
+        workbook = self._workbooks.get(ecn_name)
+        if workbook is None:
+            workbook = self._workbooks[ecn_name] = ecn_folder.joinpath(ecn_name + ".xlsx")
+        try:
+            workbook_stat = get_filesystem().stat(workbook)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Location: {ecn_folder} does not contain an excel ecn file") from None
+        ecn_stat = (workbook_stat.size, workbook_stat.mtime_ns)
+        if self.ecn_stats.get(ecn_name) == ecn_stat:     # Stats are only stored with the changes
+            trace_count("cache_hits")
+            return list(self.ecn_changes[ecn_name])
+        
+        ecn_changes = parse_ecn_workbook(workbook)
+        self.ecn_errors.pop(ecn_name, None)
+        self.ecn_changes[ecn_name] = ecn_changes
+        self.ecn_stats[ecn_name] = ecn_stat
+        self._build_history()
+        self.store()
+        return list(ecn_changes)
+    
+    def get_ecn(self, ecn_number: str) -> EcnFile:
+        ecn_name = "ECN-" + ecn_number
+        ecn_folder = self.ecn_folders.get(ecn_name)
+        
+        if ecn_folder == None:
+            raise FileNotFoundError(f"ECN: {ecn_name} does not have a folder in the location {self.ecn_root}")
+        ecn_drawings = ecn_folder.joinpath("Updated Drawings")
+        
+        if not get_filesystem().exists(ecn_drawings):
+            raise FileNotFoundError(f"Location: {ecn_folder} does not contain the following folder: Updated Drawings")
+        ecn_file = ecn_folder.joinpath(ecn_name + ".xlsx")
+        if ecn_name not in self.ecn_stats and ecn_name not in self.ecn_errors:
+            raise FileNotFoundError(f"Location: {ecn_folder} does not contain an excel ecn file")
+        
+        return (EcnFile(ecn_name, ecn_folder, ecn_drawings, ecn_file))
+    
+    def get_drawing_history(self, dwg: str) -> list[EcnHistory]:
+        """Returns every ECN that changed the drawing in ECN number order"""
+        return list(self.drawing_history.get(dwg, list()))
+    
+    def store(self):
+        osi_file_store((self.ecn_folders, self.ecn_stats, self.ecn_changes), self.index_path)
+    
+    def __init__(self, ecn_root: Path = OSIDIR.ECN_FOLDER, index_path: Path = PROJDATA.ECN_INDEX):
+        self.ecn_root = ecn_root
+        self.index_path = index_path
+        self.ecn_folders: dict[str, Path] = dict()                  # ECN name is key, ECN folder is value
+        self.ecn_stats: dict[str, tuple[int, int]] = dict()         # ECN name is key, workbook size and mtime is value
+        self.ecn_changes: dict[str, list[EcnChange]] = dict()       # ECN name is key, changes in the workbook is value
+        self.drawing_history: dict[str, list[EcnHistory]] = dict()  # Drawing number is key, ECNs that changed it is value
+        self.ecn_errors: dict[str, str] = dict()                    # ECN name is key, why its workbook could not be read is value
+        self._workbooks: dict[str, Path] = dict()                   # ECN name is key, workbook path is value, saves a join per read
+        
+        try:
+            self.ecn_folders, self.ecn_stats, self.ecn_changes = osi_file_load(index_path)
+        except (FileNotFoundError, EOFError):
+            pass
+        self.refresh()
+
+class EcnPush(NamedTuple):
+    dwg_number: str
+    src: Path           # Updated drawing in the ECN folder
+    dst: Path           # Production copy that is replaced
+    dst_new: Path       # Production copy after it is replaced, keeps the index of the replaced file
+
+def get_ecn_drawings(ecn_file: EcnFile, ecn_changes: list[EcnChange]) -> dict[str, Path]:
+    """Lists the Updated Drawings folder once and finds the drawing for every running change in the ECN
+
+    Raises:
+        FileNotFoundError: Lists every running change that does not have a drawing in the Updated Drawings folder
+
+    Returns:
+        dict[str, Path]: Key is the drawing number, value is the updated drawing
+    """
+    available = set(get_filesystem().listdir(ecn_file.ecn_drawings))
+    drawings: dict[str, Path] = dict()
+    missing: list[str] = list()
+    for change in ecn_changes:
+        if change.disposition != "Running Change":
+            continue
+        drawing_name = f"{change.dwg_number}-{change.new_revision}.pdf"
+        if drawing_name not in available:
+            missing.append(drawing_name)
+            continue
+        drawings[change.dwg_number] = ecn_file.ecn_drawings.joinpath(drawing_name)
+    if missing:
+        raise FileNotFoundError(f"Location: {ecn_file.ecn_drawings} is missing the following drawings: {', '.join(missing)}")
+    return drawings
+
+def plan_ecn_push(ecn_drawings: dict[str, Path], file_table: dict[str, list[Path]]) -> list[EcnPush]:
+    """Plans the replacement of every production copy of the drawings in the ECN, the index of each copy is kept"""
+    plan: list[EcnPush] = list()
+    for dwg_number, src in ecn_drawings.items():
+        for dst in file_table.get(dwg_number, list()):
+            ind_length = get_index_length(dst.name)
+            index = dst.name[:ind_length+1] if ind_length > 0 else ""
+            plan.append(EcnPush(dwg_number, src, dst, dst.parent.joinpath(index + src.name)))
+    return plan
+
+def apply_ecn(ecn_file: EcnFile, ecn_changes: list[EcnChange], file_table: FileTable,
+              backup: Path = PROJDIR.BACKUP) -> list[EcnPush]:
+    """Pushes every running change of an ECN to the production copies as one all or nothing operation.
+    Every drawing is checked before anything is replaced, the copies run in parallel, and the file table is
+    only updated once all of the copies succeed.
+
+    Args:
+        ecn_file (EcnFile): ECN returned by get_ecn
+        ecn_changes (list[EcnChange]): Changes read from the ECN workbook
+        file_table (FileTable): File table of the production copies, updated in place
+        backup (Path, optional): Directory that stores replaced files. Defaults to PROJDIR.BACKUP.
+
+    Returns:
+        list[EcnPush]: Every production copy that was replaced
+    """
+    plan = plan_ecn_push(get_ecn_drawings(ecn_file, ecn_changes), file_table.file_table)
+    replace_files([(push.src, push.dst, push.dst_new) for push in plan], backup)
+    
+    # Update the file table once every copy is done
+    file_table.update_file_table_entries([(push.dwg_number, push.dst, push.dst_new) for push in plan])
+    return plan
+
+class RootPush(NamedTuple):
+    root: Path
+    pushes: list[EcnPush]       # Copies under the root, all of them were replaced unless there is an error
+    error: Exception|None
+
+@traced()
+def push_to_roots(drawings: dict[str, Path], file_table: FileTable, backup: Path = PROJDIR.BACKUP) -> list[RootPush]:
+    """Replaces every copy of the drawings under all of the roots of the file table. Each drawing is read from the
+    drive once into a local staging folder if it has more than one copy, then every root is written concurrently.
+    Each root is all or nothing, a failed root is rolled back without undoing the others. Replaced files are
+    backed up in a folder for each root since copies in different roots often have the same name.
+
+    Args:
+        drawings (dict[str, Path]): Key is the drawing number, value is the updated drawing
+        file_table (FileTable): File table of the destination roots, updated in place for every root that succeeds
+        backup (Path, optional): Directory that stores replaced files. Defaults to PROJDIR.BACKUP.
+
+    Returns:
+        list[RootPush]: Result of every root in the order of the file table roots
+    """
+    filesystem = get_filesystem()
+    plan = plan_ecn_push(drawings, file_table.file_table)
+    copies: dict[Path, int] = dict()
+    for push in plan:
+        copies[push.src] = copies.get(push.src, 0) + 1
+    
+    with tempfile.TemporaryDirectory() as temp:
+        # Drawings with more than one copy are read once, the copies are made from the local staging folder
+        staging = Path(temp)
+        filesystem.mkdir(staging, parents=True, exist_ok=True)
+        sources = [src for src, count in copies.items() if count > 1]
+        with ThreadPoolExecutor() as executor:
+            staged = dict(zip(sources, executor.map(lambda src: filesystem.copy(src, staging), sources)))
+        
+        by_root: dict[Path, list[EcnPush]] = {root: list() for root in file_table.roots}
+        for push in plan:
+            by_root.setdefault(file_table.get_root(push.dst), list()).append(push)
+        
+        def _push_root(root: Path) -> RootPush:
+            pushes = by_root[root]
+            try:
+                root_backup = None
+                if backup and pushes:
+                    root_backup = backup.joinpath(root.name if root else "Other")
+                    filesystem.mkdir(root_backup, parents=True, exist_ok=True)
+                replace_files([(staged.get(push.src, push.src), push.dst, push.dst_new) for push in pushes], root_backup)
+            except (OSError, ValueError) as error:
+                return RootPush(root, pushes, error)
+            return RootPush(root, pushes, None)
+        
+        try:
+            with ThreadPoolExecutor() as executor:
+                results = list(executor.map(_push_root, by_root.keys()))
+        finally:
+            for staged_file in staged.values():
+                filesystem.unlink(staged_file, missing_ok=True)
+    
+    # Update the file table with the roots that succeeded
+    file_table.update_file_table_entries([(push.dwg_number, push.dst, push.dst_new)
+                                          for result in results if result.error is None for push in result.pushes])
+    return results
@@ -0,0 +1,91 @@
+"""Client for the local drawing index service, see index_service.py. The client is used when the
+OSI_INDEX_SERVICE environment variable is set to the address of the service, E.G. http://127.0.0.1:8765
+    Author: NNP"""
+
+# Imports
+import json
+from os import environ
+from pathlib import Path
+from urllib.request import urlopen, Request
+from urllib.parse import urlencode
+from urllib.error import URLError
+
+class IndexClient():
+    """ Answers file table and revision lookups from the index service instead of the network drive """
+    
+    def _get(self, route: str, **params) -> dict:
+        url = self.address + route
+        if params:
+            url += "?" + urlencode(params)
+        with urlopen(url, timeout=self.timeout) as response:
+            return json.load(response)
+    
+    def _post(self, route: str) -> dict:
+        with urlopen(Request(self.address + route, method="POST"), timeout=self.timeout) as response:
+            return json.load(response)
+    
+    def serves(self, roots: tuple[Path]) -> bool:
+        """True if the service indexes exactly these production roots, its file table is of no use otherwise"""
+        return set(self.roots) == {Path(root) for root in roots}
+    
+    def request_refresh(self):
+        """Asks the service to refresh in the background after production files were renamed or replaced, the
+        service being unreachable is only printed"""
+        try:
+            self._post("/refresh?wait=0")
+        except (URLError, OSError) as error:
+            print(f"Index service at {self.address} could not be told to refresh: {error}")
+    
+    def check_config(self) -> bool:
+        """Asks the service to reload the config if it changed, so its file table matches the config this program
+        reloaded. Returns True if the service reloaded it"""
+        return self._post("/config")["reloaded"]
+    
+    def get_file_table(self) -> dict[str, list[Path]]:
+        file_table = self._get("/file_table")
+        return {dwg: [Path(location) for location in locations] for dwg, locations in file_table.items()}
+    
+    def get_locations(self, dwg: str) -> list[Path]:
+        return [Path(location) for location in self._get("/locations", drawing=dwg)["locations"]]
+    
+    def get_revisions(self, dwg: str) -> dict[str, Path]:
+        return {rev: Path(path) for rev, path in self._get("/revisions", drawing=dwg)["revisions"].items()}
+    
+    def lookup(self, dwg: str) -> dict:
+        """Returns the locations and revisions of a drawing in one request"""
+        result = self._get("/lookup", drawing=dwg)
+        result["locations"] = [Path(location) for location in result["locations"]]
+        result["revisions"] = {rev: Path(path) for rev, path in result["revisions"].items()}
+        return result
+    
+    def search(self, text: str, limit: int = 50) -> list[str]:
+        """Returns drawing numbers that contain the text"""
+        return self._get("/search", q=text, limit=limit)["drawings"]
+    
+    def __init__(self, address: str, timeout: float = 5):
+        self.address = address.rstrip("/")
+        self.timeout = timeout
+        self.roots: list[Path] = list()     # Production roots the service indexes, read from /health
+
+_index_client: IndexClient|None = None
+_index_client_checked = False
+
+def get_index_client() -> IndexClient|None:
+    """Returns a client for the index service if OSI_INDEX_SERVICE is set and the service answers, otherwise None
+    so the caller falls back to reading the network drive. The service is only checked on the first call"""
+    global _index_client, _index_client_checked
+    if _index_client_checked:
+        return _index_client
+    _index_client_checked = True
+    
+    address = environ.get("OSI_INDEX_SERVICE")
+    if not address:
+        return None
+    client = IndexClient(address)
+    try:
+        client.roots = [Path(root) for root in client._get("/health").get("roots", list())]
+    except (URLError, OSError, ValueError):
+        print(f"Index service at {address} is not running, reading the network drive instead")
+        return None
+    _index_client = client
+    return client
@@ -0,0 +1,231 @@
+"""Local read only service that holds one copy of the file table and revision index in memory and answers lookups
+over http, so terminals do not each walk the network drive. Start it with
+    python index_service.py --root "X:\\RESEARCH AND DEVELOPMENT\\DrawingManager\\FOL-002-TestFolder#1"
+and set OSI_INDEX_SERVICE=http://127.0.0.1:8765 for the programs that should use it
+    Author: NNP"""
+
+# Imports
+import json
+from argparse import ArgumentParser
+from pathlib import Path
+from threading import Lock, Thread, Event
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from project_functions import get_drawings, get_dwg_number_rev, build_revision_index
+from project_data import PROJDIR
+from StandardOSILib.osi_config import get_config_manager
+from StandardOSILib.osi_directory_append import PREFIX_LOOKUP_TABLE
+from StandardOSILib.osi_filesystem import get_filesystem
+
+class DrawingIndex():
+    """ In memory file table and revision index shared by every request """
+    
+    def _stamp_directories(self) -> dict[Path, int|None]:
+        """Modified time of every engineering directory, adding or removing a revision changes it"""
+        directories = self.directories if self.directories is not None else dict.fromkeys(PREFIX_LOOKUP_TABLE.values())
+        stamps: dict[Path, int|None] = dict()
+        for directory in directories:
+            try:
+                stamps[directory] = get_filesystem().stat(directory).mtime_ns
+            except OSError:
+                stamps[directory] = None
+        return stamps
+    
+    def _set_revision_index(self, revision_index: dict[str, dict[str, Path]]):
+        self.revision_index = {dwg: {rev: str(path) for rev, path in revisions.items()}
+                               for dwg, revisions in revision_index.items()}
+        self.drawings = sorted(set(self.file_table.keys()) | set(self.revision_index.keys()))
+    
+    def refresh(self):
+        """Rebuilds both indexes, requests keep using the old indexes until the new ones are swapped in"""
+        stamps = self._stamp_directories()     # Stamped first so a revision added during the scan is found later
+        file_table: dict[str, list[Path]] = dict()
+        unmatched: list[Path] = list()
+        for root in self.roots:
+            for dwg, locations in get_drawings(root, unmatched).items():
+                file_table.setdefault(dwg, list()).extend(locations)
+        revision_index = build_revision_index(self.directories)
+        with self._lock:
+            self.unmatched = unmatched
+            self.file_table = {dwg: [str(location) for location in locations] for dwg, locations in file_table.items()}
+            self._set_revision_index(revision_index)
+            self._directory_stamps = stamps
+    
+    def check_directories(self) -> bool:
+        """Rebuilds the revision index if an engineering directory changed since it was scanned, so a revision
+        released by engineering is served without waiting for a program to ask for a refresh
+
+        Returns:
+            bool: True if the revision index was rebuilt
+        """
+        stamps = self._stamp_directories()
+        if stamps == self._directory_stamps:
+            return False
+        revision_index = build_revision_index(self.directories)
+        with self._lock:
+            self._set_revision_index(revision_index)
+            self._directory_stamps = stamps
+        return True
+    
+    def watch(self, interval: float = 60) -> Thread:
+        """Checks the engineering directories in the background every interval seconds until stop is called"""
+        if self._watcher is not None and self._watcher.is_alive():
+            return self._watcher
+        self._stop.clear()
+        def _watch():
+            while not self._stop.wait(interval):
+                try:
+                    self.check_directories()
+                except Exception as error:      # The watcher keeps running, the next check tries again
+                    print(f"Engineering directory check failed: {error}")
+        self._watcher = Thread(target=_watch, name="index-watcher", daemon=True)
+        self._watcher.start()
+        return self._watcher
+    
+    def stop(self):
+        self._stop.set()
+    
+    def request_refresh(self):
+        """Refreshes in the background, called by programs after they change production files. Requests made while
+        a refresh runs are answered by one more refresh once it is done"""
+        with self._refresh_lock:
+            if self._refreshing:
+                self._refresh_pending = True
+                return
+            self._refreshing = True
+        Thread(target=self._refresh_loop, name="index-refresh", daemon=True).start()
+    
+    def _refresh_loop(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as error:      # The service keeps answering from the old indexes
+                print(f"Index refresh failed: {error}")
+            with self._refresh_lock:
+                if not self._refresh_pending:
+                    self._refreshing = False
+                    return
+                self._refresh_pending = False
+    
+    def reclassify(self) -> int:
+        """Matches the files that were not drawings against the current config without walking the roots, called
+        when the config is reloaded. Requests keep using the old table until the new one is swapped in
+
+        Returns:
+            int: Number of files that are now drawings
+        """
+        with self._lock:
+            file_table = {dwg: list(locations) for dwg, locations in self.file_table.items()}
+            unmatched: list[Path] = list()
+            matched = 0
+            for file_path in self.unmatched:
+                dwg_number_rev = get_dwg_number_rev(file_path)
+                if dwg_number_rev is None:
+                    unmatched.append(file_path)
+                    continue
+                file_table.setdefault(dwg_number_rev[0], list()).append(str(file_path))
+                matched += 1
+            self.unmatched = unmatched
+            self.file_table = file_table
+            self.drawings = sorted(set(self.file_table.keys()) | set(self.revision_index.keys()))
+        return matched
+    
+    def lookup(self, dwg: str) -> dict:
+        return {"drawing": dwg, "locations": self.file_table.get(dwg, list()), "revisions": self.revision_index.get(dwg, dict())}
+    
+    def search(self, text: str, limit: int) -> list[str]:
+        text = text.upper()
+        return [dwg for dwg in self.drawings if text in dwg.upper()][:limit]
+    
+    def __init__(self, roots: list[Path], directories: list[Path] = None):
+        self.roots = roots
+        self.directories = directories      # None scans every directory in the PREFIX_LOOKUP_TABLE
+        self._lock = Lock()
+        self._refresh_lock = Lock()
+        self._refreshing = False
+        self._refresh_pending = False
+        self.unmatched: list[Path] = list()     # Files that are not drawings, matched again when the config is reloaded
+        self.file_table: dict[str, list[str]] = dict()
+        self.revision_index: dict[str, dict[str, str]] = dict()
+        self.drawings: list[str] = list()
+        self._directory_stamps: dict[Path, int|None] = dict()
+        self._stop = Event()
+        self._watcher: Thread = None
+        self.refresh()
+
+class IndexRequestHandler(BaseHTTPRequestHandler):
+    
+    def _send_json(self, data, status: int = 200):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(body.__len__()))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_GET(self):
+        index: DrawingIndex = self.server.index
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        dwg = params.get("drawing", "")
+        
+        if url.path == "/health":
+            self._send_json({"drawings": index.drawings.__len__(), "roots": [str(root) for root in index.roots]})
+        elif url.path == "/file_table":
+            self._send_json(index.file_table)
+        elif url.path == "/locations":
+            self._send_json({"drawing": dwg, "locations": index.file_table.get(dwg, list())})
+        elif url.path == "/revisions":
+            self._send_json({"drawing": dwg, "revisions": index.revision_index.get(dwg, dict())})
+        elif url.path == "/lookup":
+            self._send_json(index.lookup(dwg))
+        elif url.path == "/search":
+            try:
+                limit = int(params.get("limit", 50))
+            except ValueError:
+                self._send_json({"error": f"limit must be a whole number, not {params['limit']}"}, 400)
+                return
+            self._send_json({"drawings": index.search(params.get("q", ""), limit)})
+        else:
+            self._send_json({"error": f"Unknown route {url.path}"}, 404)
+    
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path == "/refresh" and parse_qs(url.query).get("wait") == ["0"]:
+            self.server.index.request_refresh()
+            self._send_json({"queued": True}, 202)
+        elif url.path == "/refresh":
+            self.server.index.refresh()
+            self._send_json({"drawings": self.server.index.drawings.__len__()})
+        elif url.path == "/config":
+            # Programs that reloaded the config ask the service to check its own, the reload reclassifies the index
+            self._send_json({"reloaded": get_config_manager().check()})
+        else:
+            self._send_json({"error": f"Unknown route {self.path}"}, 404)
+    
+    def log_message(self, format, *args):
+        pass    # Requests are not printed, the service answers many per second
+
+def start_index_service(index: DrawingIndex, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    """Creates the http server for the index, call serve_forever on the result to start answering requests"""
+    server = ThreadingHTTPServer((host, port), IndexRequestHandler)
+    server.daemon_threads = True
+    server.index = index
+    return server
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Serve the drawing index to local programs")
+    parser.add_argument("--root", type=Path, action="append", help="production folder to index, can be repeated")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--check-interval", type=float, default=60, help="seconds between checks of the engineering directories for new revisions")
+    args = parser.parse_args()
+    
+    index = DrawingIndex(args.root if args.root else [PROJDIR.WORKING])
+    get_config_manager().subscribe(lambda old, new: print(f"Config reloaded, {index.reclassify()} files are now drawings"))
+    get_config_manager().watch()
+    index.watch(args.check_interval)
+    server = start_index_service(index, args.host, args.port)
+    print(f"Serving {index.drawings.__len__()} drawings on http://{args.host}:{args.port}")
+    server.serve_forever()
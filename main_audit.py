@@ -0,0 +1,34 @@
+"""Main Script: Checks that every production copy and backup matches the engineering drawing it was copied from.
+Hashes are cached so a rerun only reads files that changed, the results are streamed to csv or excel
+    python main_audit.py --output audit.xlsx --rate 20"""
+
+from argparse import ArgumentParser
+from pathlib import Path
+from itertools import chain
+
+from project_data import PROJDIR
+from project_functions import build_revision_index, FileTable
+from audit_functions import ReadLimiter, HashCache, audit_files, get_backup_files, AUDIT_HEADERS
+from report_functions import write_rows
+from StandardOSILib.osi_trace import enable_tracing
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Audit production copies against the engineering drawings")
+    parser.add_argument("--rate", type=float, default=None, help="limit on MB per second read from the drive")
+    parser.add_argument("--workers", type=int, default=4, help="files hashed at once")
+    parser.add_argument("--output", type=Path, default=Path("audit.csv"), help="csv or xlsx file the results are written to")
+    parser.add_argument("--trace", type=Path, default=None, help="chrome trace json file, or a folder for one, of this run")
+    args = parser.parse_args()
+    if args.trace:
+        enable_tracing(args.trace)
+    
+    build_table: dict[str, list[Path]] = FileTable().file_table
+    revision_index = build_revision_index()
+    hash_cache = HashCache(ReadLimiter(None if args.rate is None else args.rate * 1024 * 1024))
+    
+    locations = chain(chain.from_iterable(build_table.values()), get_backup_files(PROJDIR.BACKUP))
+    try:    # Results are written as the files are checked
+        count = write_rows(args.output, AUDIT_HEADERS, audit_files(locations, revision_index, hash_cache, args.workers))
+    finally:
+        hash_cache.store()
+    print(f"{count} problems written to {args.output}")
@@ -1,15 +1,12 @@
 """Main Script: Walks through the directory and rebuilds a file table"""
 
-from pathlib import Path, PosixPath, WindowsPath
-
-from project_functions import get_drawings
-from project_data import PROJDIR, PROJDATA
-from StandardOSILib.osi_functions import osi_file_store, osi_file_load
+from project_functions import FileTable
+from project_data import PROJDIR
 
 if __name__ == '__main__':
-    build_table: dict[str, list[Path|WindowsPath|PosixPath]] = get_drawings(PROJDIR.WORKING)
-    osi_file_store(build_table, PROJDATA.FILE_TABLE)
+    # The drive is always walked, a snapshot from the index service could be older than the stored table
+    FileTable(PROJDIR.WORKING, use_service=False).commit(overwrite=True)
     
-    build_table = osi_file_load(PROJDATA.FILE_TABLE)
+    build_table = FileTable().file_table
     for key in build_table.keys():
         print(f"{key} : {build_table[key]}")
\ No newline at end of file
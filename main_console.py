@@ -1,15 +1,133 @@
-"""Main script used to manually update drawings"""
+"""Main script used to manually update drawings, or to update a list of drawings without any input with
+    python main_console.py --batch drawings.csv --result result.json
+    The batch is a csv of drawing number and revision rows, the revision can be "latest", use - to read from stdin"""
 
-from StandardOSILib.osi_functions import osi_file_load, osi_file_store, replace_file
-from project_data import PROJDATA, PROJDIR
-from project_functions import get_available_dwg_revisions
+import csv
+import sys
+import json
+from argparse import ArgumentParser
+from pathlib import Path
+
+from StandardOSILib.osi_functions import replace_file, replace_files, osi_get_prefix
+from StandardOSILib.osi_directory_append import PREFIX_LOOKUP_TABLE
+from project_data import PROJDIR
+from project_functions import get_available_dwg_revisions, build_revision_index, get_latest_revision, get_index_length, FileTable
+from StandardOSILib.osi_trace import enable_tracing
+
+LATEST_STR = "latest"
+
+def run_batch(batch_file: str, result_file: Path) -> int:
+    """Updates every drawing in the batch at once. Every entry is checked against the file table and the
+    engineering revisions before any file is replaced, if one entry is invalid nothing is replaced. The index of
+    each production copy is kept.
+
+    Args:
+        batch_file (str): Csv file of drawing number and revision rows, - reads the rows from stdin
+        result_file (Path): Json file the result of every entry is written to
+
+    Returns:
+        int: Exit code, 0 if every drawing was updated
+    """
+    file_table = FileTable()
+    build_table = file_table.file_table
+    if batch_file == "-":
+        rows = [row for row in csv.reader(sys.stdin) if row]
+    else:
+        with open(batch_file, "r", newline="") as csv_file:
+            rows = [row for row in csv.reader(csv_file) if row]
+    
+    # Only the engineering directories used by the batch are scanned
+    directories = {PREFIX_LOOKUP_TABLE.get(osi_get_prefix(row[0].strip())) for row in rows}
+    revision_index = build_revision_index([directory for directory in directories if directory is not None])
+    
+    # Validate every entry up front
+    results: list[dict] = list()
+    replacements: list[tuple[Path, Path, Path]] = list()
+    targets: set[Path] = set()      # New path of every replacement, two copies must never be replaced by one file
+    entries: list[tuple[dict, str, list[Path]]] = list()
+    for row in rows:
+        dwg = row[0].strip()
+        rev = row[1].strip() if row.__len__() > 1 else LATEST_STR
+        result = {"drawing": dwg, "revision": rev, "status": "error", "files": list()}
+        results.append(result)
+        if dwg not in build_table:
+            result["error"] = "Drawing not in Production Drive"
+            continue
+        if any(entry[1] == dwg for entry in entries):
+            result["error"] = "Drawing listed more than once"
+            continue
+        available_revisions = revision_index.get(dwg, dict())
+        if rev.lower() == LATEST_STR:
+            latest = get_latest_revision(available_revisions)
+            if latest is None:
+                result["error"] = "Drawing has no revisions in the engineering directory"
+                continue
+            rev, src = latest
+            result["revision"] = rev
+        elif rev in available_revisions:
+            src = available_revisions[rev]
+        else:
+            result["error"] = "Revision not Available"
+            continue
+        # The index of each production copy is kept
+        entry_replacements: list[tuple[Path, Path, Path]] = list()
+        for value in build_table[dwg]:
+            ind_length = get_index_length(value.name)
+            index = value.name[:ind_length+1] if ind_length > 0 else ""
+            entry_replacements.append((src, value, value.parent.joinpath(index + src.name)))
+        new_paths = [replacement[2] for replacement in entry_replacements]
+        if new_paths.__len__() != set(new_paths).__len__() or targets.intersection(new_paths):
+            result["error"] = "Copies of the drawing would be replaced by the same file"
+            continue
+        targets.update(new_paths)
+        result["status"] = "pending"
+        entries.append((result, dwg, list(build_table[dwg])))
+        replacements.extend(entry_replacements)
+    
+    if any(result["status"] == "error" for result in results):
+        for result in results:
+            if result["status"] == "pending":
+                result["status"] = "skipped"
+    else:
+        # Replace every file at once and update the table in one go
+        try:
+            new_files = iter(replace_files(replacements, PROJDIR.BACKUP))
+        except (OSError, ValueError) as error:
+            for result, dwg, values in entries:
+                result["status"] = "error"
+                result["error"] = f"Batch rolled back: {error}"
+        else:
+            table_updates: list[tuple[str, Path, Path]] = list()
+            for result, dwg, values in entries:
+                for value in values:
+                    new_file = next(new_files)
+                    table_updates.append((dwg, value, new_file))
+                    result["files"].append({"old": str(value), "new": str(new_file)})
+                result["status"] = "updated"
+            file_table.update_file_table_entries(table_updates)
+            file_table.commit()
+    
+    with open(result_file, "w") as json_file:
+        json.dump(results, json_file, indent=4)
+    return 0 if all(result["status"] == "updated" for result in results) else 1
 
 if __name__ == "__main__":
+    parser = ArgumentParser(description="Update production drawings to a new revision")
+    parser.add_argument("--batch", help="csv of drawing number and revision rows, - reads from stdin")
+    parser.add_argument("--result", type=Path, default=Path("batch_result.json"), help="json file the results are written to")
+    parser.add_argument("--trace", type=Path, default=None, help="chrome trace json file, or a folder for one, of this run")
+    args = parser.parse_args()
+    if args.trace:
+        enable_tracing(args.trace)
+    if args.batch:
+        sys.exit(run_batch(args.batch, args.result))
+    
     """Function that starts the program and keeps it running"""
     # Set up variables
     running = True
     mode = 0
-    build_table = osi_file_load(PROJDATA.FILE_TABLE)
+    file_table = FileTable()
+    build_table = file_table.file_table
     exit_str = "Exit!"
     return_str = "Return!"
     
@@ -60,12 +178,13 @@ if __name__ == "__main__":
                 # Returns to above loop
                 
         if mode == 2:   # Key 2 updates revisions
-            for value in build_table[key]:
+            for value in list(build_table[key]):
                 new_file = replace_file(available_revisions[rev], value, PROJDIR.BACKUP)
-                build_table[key][build_table[key].index(value)] = new_file
+                file_table.update_file_table(key, value, new_file)
                 
             # Update Build Table File
-            osi_file_store(build_table, PROJDATA.FILE_TABLE)
+            file_table.commit()
+            build_table = file_table.file_table
             
             # Clean Up
             available_revisions.clear()
@@ -0,0 +1,21 @@
+"""Main Script: Refreshes the ECN index and shows every ECN that changed a drawing"""
+
+from ecn_functions import EcnIndex
+
+if __name__ == '__main__':
+    ecn_index = EcnIndex()
+    ecn_index.store()
+    exit_str = "Exit!"
+    
+    while True:
+        print("Type Drawing Number to Find its ECN History")
+        print(f"Type {exit_str} to exit the program")
+        user_input = input("> ")
+        if user_input == exit_str:
+            break
+        
+        history = ecn_index.get_drawing_history(user_input)
+        if not history:
+            print("Drawing not changed by any ECN")
+        for entry in history:
+            print(f"{entry.ecn_name}: Revision {entry.new_revision}, {entry.disposition}")
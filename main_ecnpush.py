@@ -0,0 +1,18 @@
+"""Main Script: Pushes every running change of an ECN to the production folders and updates the file table"""
+
+from project_functions import FileTable
+from ecn_functions import EcnIndex, apply_ecn
+
+if __name__ == '__main__':
+    ecn_number = input("Type ECN Number to Push\n> ")
+    ecn_index = EcnIndex()
+    ecn_index.store()
+    ecn_file = ecn_index.get_ecn(ecn_number)
+    
+    file_table = FileTable()
+    plan = apply_ecn(ecn_file, ecn_index.read_ecn_changes(ecn_file.ecn_name), file_table)
+    for push in plan:
+        print(f"File {push.dst} was replaced with {push.dst_new}")
+        
+    # Update Build Table
+    file_table.commit()
@@ -0,0 +1,34 @@
+"""Main Script: Exports the file table or the revision index to csv or excel. Rows are streamed to the file as they
+are generated so memory does not grow with the number of rows, the audit results are exported by main_audit.py
+    python main_export.py table file_table.xlsx
+    python main_export.py revisions revisions.csv"""
+
+from argparse import ArgumentParser
+from pathlib import Path
+
+from project_data import PROJDIR
+from project_functions import build_revision_index, FileTable
+from report_functions import write_rows, get_file_table_rows, get_revision_rows, TABLE_HEADERS, REVISION_HEADERS
+from StandardOSILib.osi_trace import enable_tracing
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Export drawing data to csv or xlsx")
+    parser.add_argument("--trace", type=Path, default=None, help="chrome trace json file, or a folder for one, of this run")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    table_parser = commands.add_parser("table", help="every production copy in the file table")
+    table_parser.add_argument("output", type=Path, help="csv or xlsx file the rows are written to")
+    table_parser.add_argument("--live", type=Path, nargs="?", const=PROJDIR.WORKING, help="walk the production folder instead of the stored table")
+    
+    revisions_parser = commands.add_parser("revisions", help="every revision in the engineering directories")
+    revisions_parser.add_argument("output", type=Path, help="csv or xlsx file the rows are written to")
+    args = parser.parse_args()
+    if args.trace:
+        enable_tracing(args.trace)
+    
+    if args.command == "table":
+        file_table = FileTable(args.live) if args.live else FileTable()
+        count = write_rows(args.output, TABLE_HEADERS, get_file_table_rows(file_table.file_table))
+    else:
+        count = write_rows(args.output, REVISION_HEADERS, get_revision_rows(build_revision_index()))
+    print(f"{count} rows written to {args.output}")
@@ -1,26 +1,41 @@
-"""This script take the files in the updated drawings folder, and updates any drawings drawings in the
-working folder to use those latest drawings."""
+"""This script take the files in the updated drawings folder, and updates any drawings in the production
+roots to use those latest drawings. Every root is updated in one pass and each root is reported on its own.
+Only the CS-500 folder is updated unless the roots to update are given with --root
+    python main_folderupdater.py --root X:\\PRODUCTION\\CoolSkim --root X:\\PRODUCTION\\SkimPro"""
 
+from argparse import ArgumentParser
 from pathlib import Path
-from StandardOSILib.osi_functions import replace_file
 from project_data import PROJDIR
-from project_functions import get_drawings
-
-src_drawings = get_drawings(PROJDIR.UPDATE_DRAWINGS)
-for key in src_drawings.keys():
-    if src_drawings[key].__len__() > 1:
-        raise ValueError(f"Error: More than one drawing found for {key}, please remove duplicates")
-dst_drawings = get_drawings(PROJDIR.CS_500)
-
-for key in src_drawings.keys():
-    
-    if key in dst_drawings.keys():
-        for value in dst_drawings[key]:
-            print(f"Replacing {value} with {src_drawings[key]}")
-            replace_file(src_drawings[key][0], value, PROJDIR.BACKUP)
-    else:
-        print(f"{key} not found in product folders, skipping...")
+from project_functions import get_drawings, FileTable
+from ecn_functions import push_to_roots
+from StandardOSILib.osi_trace import enable_tracing
 
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Replace production copies with the drawings in the updated drawings folder")
+    parser.add_argument("--source", type=Path, default=PROJDIR.UPDATE_DRAWINGS, help="folder of updated drawings")
+    parser.add_argument("--root", type=Path, action="append", dest="roots", help="production root to update, can be repeated. Defaults to the CS-500 folder only")
+    parser.add_argument("--backup", type=Path, default=PROJDIR.BACKUP, help="folder the replaced files are moved to")
+    parser.add_argument("--trace", type=Path, default=None, help="chrome trace json file, or a folder for one, of this run")
+    args = parser.parse_args()
+    if args.trace:
+        enable_tracing(args.trace)
+    roots = args.roots or [PROJDIR.CS_500]
 
+    src_drawings = get_drawings(args.source)
+    for key in src_drawings.keys():
+        if src_drawings[key].__len__() > 1:
+            raise ValueError(f"Error: More than one drawing found for {key}, please remove duplicates")
+    dst_table = FileTable(roots=tuple(roots))     # Only folders that changed are listed again
 
+    for key in src_drawings.keys():
+        if key not in dst_table.file_table.keys():
+            print(f"{key} not found in product folders, skipping...")
 
+    results = push_to_roots({key: value[0] for key, value in src_drawings.items()}, dst_table, args.backup)
+    for result in results:
+        if result.error is not None:
+            print(f"{result.root}: FAILED, nothing replaced in this root: {result.error}")
+            continue
+        print(f"{result.root}: replaced {result.pushes.__len__()} files")
+        for push in result.pushes:
+            print(f"    Replaced {push.dst} with {push.dst_new}")
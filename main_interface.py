@@ -1,20 +1,26 @@
 import ttkbootstrap as tk
 from ttkbootstrap.dialogs import Messagebox, Querybox
-from tkinter.filedialog import askopenfilename
-import openpyxl
+from tkinter.filedialog import askopenfilenames, asksaveasfilename
 
 from enum import IntEnum
 from dataclasses import dataclass
 from typing import NamedTuple
 from pathlib import Path
-from shutil import copy
-from os import scandir, listdir, mkdir, walk
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread
 import webbrowser
 
-from project_functions import read_ecn_changes, get_dwg_number_rev
-from StandardOSILib.osi_directory import OSIDIR
-from project_data import PROJDIR, PROJDATA
-from StandardOSILib.osi_functions import osi_file_load, osi_file_store, replace_file
+from project_functions import get_dwg_number_rev, get_index_length, change_index, EcnChange, FileTable
+from StandardOSILib.osi_directory import OSI_DRIVE
+from ecn_functions import EcnIndex, EcnPush, apply_ecn, get_ecn_drawings
+from search_functions import TextIndex, SearchResult
+from report_functions import write_rows
+from viewer_functions import get_pdf_cache, close_pdf_cache
+from project_data import PROJDIR
+from StandardOSILib.osi_functions import replace_file_indexed
+from StandardOSILib.osi_trace import traced
+from StandardOSILib.osi_filesystem import get_filesystem
+from StandardOSILib.osi_config import get_config_manager
 
 """ Notes about the code base
     Author:
@@ -41,9 +47,14 @@ from StandardOSILib.osi_functions import osi_file_load, osi_file_store, replace_
                         and puts it in a method for the button to be able to call it"""
     
 
+@traced("gui.open_pdf")
 def open_pdf(file: Path):
-    """Opens a pdf of the selected file"""
+    """Opens a pdf of the selected file, from the local pdf cache if the drawing is unchanged since it was cached"""
     if file.suffix == ".pdf" or file.suffix == ".PDF" or file.suffix == ".Pdf":
+        try:
+            file = get_pdf_cache().get(file)
+        except OSError as error:    # Open the drive copy if the local cache cannot be written
+            print(f"Could not cache {file}: {error}")
         webbrowser.open_new(file)
 
 @dataclass
@@ -67,27 +78,27 @@ class OsiFolder():
         fsuffix: str
         ftype: int
     
+    @traced("gui.scan_folder")
     def _scan_folder(self):
         """ Scans the root directory and find all documents contained """
         # Need to clear the data
         self.children.clear()
         
         # Get each entry in the root directory, path, name, and type
-        with scandir(self.root) as dir:
-            child_temp: dict[str, OsiFolder.FolderChild] = dict()
-            for file in dir:
-                file_path = Path(file.path)
-                file_name = file_path.name
-                file_suffix = file_path.suffix
+        child_temp: dict[str, OsiFolder.FolderChild] = dict()
+        for file in get_filesystem().scandir(self.root):
+            file_path = Path(file.path)
+            file_name = file_path.name
+            file_suffix = file_path.suffix
+            
+            # Folders dont have a suffic
+            if file_suffix == "":
+                file_suffix = "Folder"
+                file_type = self.FolderType.FOLDER
+            else:
+                file_type = self.FolderType.FILES
                 
-                # Folders dont have a suffic
-                if file_suffix == "":
-                    file_suffix = "Folder"
-                    file_type = self.FolderType.FOLDER
-                else:
-                    file_type = self.FolderType.FILES
-                    
-                child_temp[file_name] = self.FolderChild(file_path, file_name, file_suffix, file_type)
+            child_temp[file_name] = self.FolderChild(file_path, file_name, file_suffix, file_type)
         
         # Sort the keys be alphabetic / numerical order and append to the children list
         sorted_keys = sorted(child_temp.keys())
@@ -96,6 +107,10 @@ class OsiFolder():
         
         # Reset the selection to avoid errors
         self.selection == None
+        self.selections = list()
+        
+        # Copy the drawings in the folder to the local pdf cache in the background, they are likely to be opened
+        get_pdf_cache().prefetch([child.fpath for child in self.children if child.fsuffix.lower() == ".pdf"])
             
         # Determine if the folder is empty
         if self.children.__len__() == 0:
@@ -107,7 +122,7 @@ class OsiFolder():
         contains_file = False
         
         for child in self.children:
-            if child.fpath.is_dir():
+            if get_filesystem().is_dir(child.fpath):
                 contains_dir = True
             else:
                 contains_file = True
@@ -142,7 +157,7 @@ class OsiFolder():
             return
         folder = self.root.joinpath(folder_name)
         try:
-            mkdir(folder)
+            get_filesystem().mkdir(folder)
         except FileExistsError:
             Messagebox.ok("file already exists")
             return
@@ -151,173 +166,98 @@ class OsiFolder():
             return
         self._scan_folder()
     
-    def __init__(self, start_path: Path = Path(r"X:")):
+    def __init__(self, start_path: Path = OSI_DRIVE):
         self._start_path = start_path
         
         self.root = start_path                                  # Active Folder
         self.children: list[OsiFolder.FolderChild] = list()     # String is the File Name in the FolderChild object
         self.selection = None                                   # Set external to class by treeview
+        self.selections: list[int] = list()                     # Every selected row, set external to class by treeview
         
         self.type = None    # Not Used for Anything
         self._scan_folder()
 
-class FileTable():
-    """ Collection of data and functions to handle where production drawings are stored """
-    
-    def _get_drawings(self, Folder: Path) -> dict[str, list[Path]]:
-        """Walks through the directory and all subfolders of that directory and returns a dictionary containing
-        all Pathlib Paths where the drawings are found using the drawing number as a key.
-
-        Args:
-            Folder (Path | WindowsPath | PosixPath): Directory that is walked
-
-        Returns:
-            dict[str, list[str]]: Dictionary, Key is a string that is the drawing number. Value is a list of
-            Pathlib Paths where each copy of the drawing is found.
-        """
-        build_table: dict[str, list[Path]] = dict()
-        for (root, dirs, files) in walk(Folder, True):
-            for file in files:
-                if file == "":                            # Check for directory with no files
-                    continue
-                dwg_number_rev = get_dwg_number_rev(Path(file))
-                if dwg_number_rev is None:                       # Check for valid drawing number
-                    continue
-                dwg_number = dwg_number_rev[0]
-                
-                if dwg_number not in build_table:
-                    build_table[dwg_number] = [Path(root).joinpath(file)]
-                else:
-                    build_table[dwg_number].append(Path(root).joinpath(file))
-        return build_table
-        
-    def update_file_table(self, key: str, old_path: Path, new_path: Path = None):
-        """Updates the file table
+@traced("gui.shift_indexes")
+def shift_indexes(directory: OsiFolder, file_table: FileTable, changes: dict[int, int]):
+    """Renames the children of the directory so each index moves by its change, every file is renamed at most
+    once and the file table is updated in a single batch.
 
         Args:
-            file_table (dict[str, list[Path]]): A dictionary using drawing names as keys, for a list of Paths
-            key (str): The drawing name
-            old_path (Path): The path to change or remove
-            new_path (Path, optional): Replaces the old path with the new one if supplied. Defaults to None.
-        """
-        index = self.file_table[key].index(old_path)
-        self.file_table[key].pop(index)
-        if new_path != None:
-            self.file_table[key].append(new_path)
-            
-    def add_file_table_entry(self, key: str, new_path: Path = None):
-        if key in self.file_table.keys():
-            self.file_table[key].append(new_path)
-        else:
-            self.file_table[key] = [new_path]
-
-    def get_file_paths(self, drawing: str) -> list[str, Path]:
-        entries = list()
-        for entry in self.file_table[drawing]:
-            entries.append((None, entry))
-        return entries
-
-    def __init__(self, drive_root: Path):
-        self.file_table: dict[str, list[Path]] = self._get_drawings(drive_root)
-
-def get_index_length(file_name: str):
-    # Get the ammount of numbers that make up the index, This assumes the index is a numberical number at the start
-    for i in range(file_name.__len__()):
-        try:
-            int(file_name[i])
-        except ValueError:
-            break
-    return i
-
-def change_index(file_name: str, change: int):
-    """Takes a file name with an index in the format "index-dwg_number-etc" and updates it by the change value.
-
-        Args:
-            file_name (str): The file name to change the index of. Index must be integers at the start of the file name.
-            change (int): The integer to change the index by. Negative numbers decriment, Positive numbers incriment
-
-        Returns:
-            str: The file name with the updated index in the format it was given
+            directory (OsiFolder): The folder that contains the files being renamed
+            file_table (FileTable): The file table to update with the new paths
+            changes (dict[int, int]): Key is the position of the child in the directory, value is the change to the
+            index. Negative numbers decriment, Positive numbers incriment
     """
-    # Get the ammount of numbers that make up the index, This assumes the index is a numberical number at the start
-    i = get_index_length(file_name)
-    
-    drawing = file_name[i:]
-    index = str(int(file_name[:i]) + change)
-    
-    # Index must keep the same number of integers, 000 -> 001, 0002 -> 0001 etc
-    for j in range(i - index.__len__()):
-        index = str(0) + index
-        
-    return index + drawing
-
-def serialize_files(directory: OsiFolder, file_table: FileTable, inc_selection: bool, change: int):
-    if directory.selection == None:
-        return
-    old_children = list()
-    new_children = list()
-    for i in range(directory.selection, directory.children.__len__()):
-        if not inc_selection:       # Skip first iteration to avoid updating selected file
-            inc_selection = True    # Stops this section from looping
+    # Rename from the end when indexes move up and from the start when they move down so names never collide
+    order = sorted(changes.keys(), reverse=any(change > 0 for change in changes.values()))
+    table_updates: list[tuple[str, Path, Path]] = list()
+    for i in order:
+        child = directory.children[i]
+        if changes[i] == 0 or get_index_length(child.fname) == 0:   # Skip files without an index
             continue
         
         # Index the child by the change and create a new path for renaming the file
-        child = directory.children[i]
-        old_children.append((get_dwg_number_rev(child.fpath)[0], child.fpath))  # Save data for updating the file_table
-        file_name = change_index(child.fname, change)
+        file_name = change_index(child.fname, changes[i])
         file_path = child.fpath.parent.joinpath(file_name)
-        new_children.append(file_path)  # Keep track for updating file_table
+        get_filesystem().rename(child.fpath, file_path)
         
-        # Update the child
-        child.fpath.rename(file_path)
-        directory.children[directory.selection] = directory.FolderChild(file_path, file_name, child.fsuffix, child.ftype)
+        # Save data for updating the file_table
+        dwg_number_rev = get_dwg_number_rev(child.fpath)
+        if dwg_number_rev is not None:
+            table_updates.append((dwg_number_rev[0], child.fpath, file_path))
         
     # Update the build table
-    for i, child in enumerate(old_children):
-        file_table.update_file_table(child[0], child[1], new_children[i])
+    file_table.update_file_table_entries(table_updates)
+
+def serialize_files(directory: OsiFolder, file_table: FileTable, inc_selection: bool, change: int):
+    if directory.selection == None:
+        return
+    first = directory.selection if inc_selection else directory.selection + 1
+    shift_indexes(directory, file_table, {i: change for i in range(first, directory.children.__len__())})
         
     # Do a refresh
     directory._scan_folder()
 
+@traced("gui.insert_file")
 def _insert_file(directory: OsiFolder, file_table: FileTable, above: bool = True):
     if directory.selection == None and directory.type != directory.FolderType.EMPTY:
         return
     
-    file_path = Path(askopenfilename(initialdir="X:"))
-    if file_path.name == "":
+    file_paths = [Path(file) for file in askopenfilenames(initialdir=OSI_DRIVE)]
+    if file_paths.__len__() == 0:
         return
     
     if directory.type == directory.FolderType.EMPTY:
         index = "001-"
-    elif above:
-        # Get the selected files index
-        selection_name = directory.children[directory.selection].fname
-        i = get_index_length(selection_name)+1
-        index = selection_name[:i]
-        
-        # Serialize up selected file and its below files
-        serialize_files(directory, file_table, True, 1)
+        first = 0
     else:
-        # Get the selected files index and incriment
+        # Get the selected files index, files inserted below take the index after it
         selection_name = directory.children[directory.selection].fname
         i = get_index_length(selection_name)+1
         index = selection_name[:i]
-        index = change_index(index, 1)
+        first = directory.selection
+        if not above:
+            index = change_index(index, 1)
+            first += 1
         
-        # Serialize up below files
-        serialize_files(directory, file_table, False, 1)
+        # Make room for every new file with one shift of all the files below the insert
+        shift_indexes(directory, file_table, {j: file_paths.__len__() for j in range(first, directory.children.__len__())})
         
-    # Filling below, means stealing the below selected, and indexing below selected
-    file_path = Path(copy(src=file_path, dst=directory.root))
-    file_path_new = file_path.parent.joinpath(index + file_path.name)
-    file_path = file_path.rename(file_path_new)
+    # Copy every file straight to its indexed name
+    new_paths = [directory.root.joinpath(change_index(index, j) + file_path.name) for j, file_path in enumerate(file_paths)]
+    with ThreadPoolExecutor() as executor:
+        new_paths = list(executor.map(get_filesystem().copy, file_paths, new_paths))
     
     # Add to File Table
-    file_table.add_file_table_entry(get_dwg_number_rev(file_path)[0], file_path)
+    for file_path in new_paths:
+        dwg_number_rev = get_dwg_number_rev(file_path)
+        if dwg_number_rev is not None:
+            file_table.add_file_table_entry(dwg_number_rev[0], file_path)
         
     # Updates
     directory._scan_folder()
 
+@traced("gui.delete_selection")
 def _delete_selection(directory: OsiFolder, file_table: FileTable):
     if directory.selection == None:
         return
@@ -331,7 +271,7 @@ def _delete_selection(directory: OsiFolder, file_table: FileTable):
     def _check_directory() -> bool:
         """Returns: Returns True if folder contains only directories, Returns False if files are present"""
         for child in directory.children:
-            if child.fpath.is_dir():
+            if get_filesystem().is_dir(child.fpath):
                 continue
             else:
                 return False
@@ -341,13 +281,14 @@ def _delete_selection(directory: OsiFolder, file_table: FileTable):
             or if there is error"""
         folder_path = directory.children[selection].fpath
         try:
-            if len(listdir(folder_path)) == 0:
+            if len(get_filesystem().listdir(folder_path)) == 0:
                 return True
             else:
                 return False
         except:
             return False
         
+    selections = directory.selections if directory.selections else [directory.selection]
     file_path: Path = directory.children[directory.selection].fpath
     file_type: int = directory.children[directory.selection].ftype
     
@@ -360,39 +301,56 @@ def _delete_selection(directory: OsiFolder, file_table: FileTable):
         if Messagebox.yesno("are you sure, this will permenantly deletes the folder") != "Yes":
             print(f"user canceled delete of {file_path}")
             return
-        file_path.rmdir()            
+        get_filesystem().rmdir(file_path)
         print(f"removed folder {file_path}")
     elif file_type == OsiFolder.FolderType.FILES:
-        # Code to run for deleting files
-        if Messagebox.yesno("are you sure, this will permenantly deletes the file") != 'Yes':
-            print(f"user canceled delete of {file_path}")
+        # Code to run for deleting files, every selected row must be a file
+        selections = sorted(i for i in selections if directory.children[i].ftype == OsiFolder.FolderType.FILES)
+        if not selections:      # Only folders were selected with the file
+            return
+        if Messagebox.yesno(f"are you sure, this will permenantly deletes {selections.__len__()} file(s)") != 'Yes':
+            print(f"user canceled delete of {selections.__len__()} file(s)")
             return
 
-        serialize_files(directory, file_table, False, -1)
-        file_table.update_file_table(get_dwg_number_rev(file_path)[0], file_path)
-        file_path.unlink()
-        print(f"removed file {file_path}")
+        table_updates: list[tuple[str, Path, Path]] = list()
+        for i in selections:
+            file_path = directory.children[i].fpath
+            get_filesystem().unlink(file_path)
+            dwg_number_rev = get_dwg_number_rev(file_path)
+            if dwg_number_rev is not None:
+                table_updates.append((dwg_number_rev[0], file_path, None))
+            print(f"removed file {file_path}")
+        file_table.update_file_table_entries(table_updates)
+        
+        # Close the gaps, each remaining file moves down by the number of deleted files above it
+        changes: dict[int, int] = dict()
+        removed = 0
+        for i in range(selections[0], directory.children.__len__()):
+            if i in selections:
+                removed += 1
+                continue
+            changes[i] = -removed
+        shift_indexes(directory, file_table, changes)
     else:
         return
 
     directory._scan_folder()
 
+@traced("gui.update_drawings")
 def _update_drawings(file_table: FileTable, dwg_path: Path):
     dwg_number = get_dwg_number_rev(dwg_path)[0]
     
-    for file_path in file_table.file_table[dwg_number]:
+    for file_path in list(file_table.file_table[dwg_number]):
         # Get index of the file being replaced
         file_name = file_path.name
-        ind_length = get_index_length(file_name)+1
-        index = file_name[:ind_length]
+        ind_length = get_index_length(file_name)
+        index = file_name[:ind_length+1] if ind_length > 0 else ""
         
-        # Replace file and change name to include index
-        new_file = replace_file(dwg_path, file_path, PROJDIR.BACKUP)
-        rename_file = new_file.parent.joinpath(index + new_file.name)
-        new_file = new_file.rename(rename_file)
+        # Replace file, the copy is renamed straight to the name with the index
+        new_file = replace_file_indexed(dwg_path, file_path, file_path.parent.joinpath(index + dwg_path.name), PROJDIR.BACKUP)
         
         # Update Build Table
-        file_table.file_table[dwg_number][file_table.file_table[dwg_number].index(file_path)] = new_file
+        file_table.update_file_table(dwg_number, file_path, new_file)
 
 class EcnFileManager():
     
@@ -402,89 +360,39 @@ class EcnFileManager():
         ecn_drawings: Path
         ecn_file: Path
         
-    class EcnChange(NamedTuple):
-        level: int
-        dwg_number: str
-        new_revision: str
-        disposition: str
-    
+    @traced("gui.get_ecn")
     def get_ecn(self, ecn_number: str) -> EcnFile:
-        ecn_name = "ECN-" + ecn_number
-        ecn_folder = None
-        
-        with scandir(OSIDIR.ECN_FOLDER) as dir:
-            for file in dir:
-                if file.name == ecn_name:
-                    ecn_folder = Path(file.path)
-                    break
-                
-        if ecn_folder == None:
-            raise FileNotFoundError(f"ECN: {ecn_name} does not have a folder in the location {OSIDIR.ECN_FOLDER}")
-        ecn_drawings = ecn_folder.joinpath("Updated Drawings")
-        
-        if not ecn_drawings.exists():
-            raise FileNotFoundError(f"Location: {ecn_folder} does not contain the following folder: Updated Drawings")
-        ecn_file = ecn_folder.joinpath(ecn_name + ".xlsx")
-        if not ecn_file.exists():
-            raise FileNotFoundError(f"Location: {ecn_folder} does not contain an excel ecn file")
+        # The index is only refreshed if the ECN is not found, new ECN folders are picked up on the retry
+        try:
+            ecn_file = self.ecn_index.get_ecn(ecn_number)
+        except FileNotFoundError:
+            self.ecn_index.refresh()
+            self.ecn_index.store()
+            ecn_file = self.ecn_index.get_ecn(ecn_number)
         
-        self.ecn_file = self.EcnFile(ecn_name, ecn_folder, ecn_drawings, ecn_file)
+        self.ecn_file = self.EcnFile(ecn_file.ecn_name, ecn_file.ecn_folder, ecn_file.ecn_drawings, ecn_file.ecn_file)
     
     def read_ecn_changes(self):
-    
-        @dataclass
-        class FM00037():
-            SHEET: str              = "Bill of Materials"
-            DWGS_FIRST_COL: int     = 0  # Column A = 0
-            DWGS_LAST_COL: int      = 7  # Reference Column A = 0
-            DWGS_FIRST_ROW: int     = 4  # First row with the parent drawings in an ecn
-            REV_COL: int            = 11 # Column Containing Revision
-            DISPOSITION_COL: int    = 12 # Column Containing Disposition
-        
-        wb = openpyxl.load_workbook(self.ecn_file, data_only=True)
-        ws = wb[FM00037.SHEET]
-        ecn_changes: list[EcnFileManager.EcnChange] = list()
-        
-        for row in ws.iter_rows(min_row=FM00037.DWGS_FIRST_ROW, values_only=True):
-
-            empty_row = True
-            for i, value in enumerate(row[FM00037.DWGS_FIRST_COL:FM00037.DWGS_LAST_COL+1]):
-                if value == None or value == "":
-                    continue
-                else:
-                    empty_row = False
-                    break
-                
-            if empty_row == True:
-                continue
-            if row[FM00037.DISPOSITION_COL] == "Old Product":
-                continue
-            
-            try:    # Try except for integer revisions
-                new_revision = row[FM00037.REV_COL].lstrip("-")
-            except AttributeError:
-                new_revision = row[FM00037.REV_COL]
-            
-            ecn_changes.append(self.EcnChange(i, value, new_revision, row[FM00037.DISPOSITION_COL]))
-
-        self.ecn_changes = ecn_changes
-    
-    def find_drawings(self):
-        self.drawings.clear()
-        error_list: list[str] = list()
-        for i, change in enumerate(self.ecn_changes):
-            if change.disposition != "Running Change":
-                continue
-            drawing = self.ecn_file.ecn_drawings.joinpath(change.dwg_number + '-' + change.new_revision + '.pdf')
-            if not drawing.exists():
-                error_list.append(drawing.name)
-                continue
-            self.drawings[i] = drawing
-    
-    def __init__(self):
+        self.ecn_changes = self.ecn_index.read_ecn_changes(self.ecn_file.ecn_name)
+    
+    @traced("gui.find_drawings")
+    def find_drawings(self) -> dict[str, Path]:
+        """Finds the updated drawing of every running change, raises FileNotFoundError listing the missing drawings"""
+        self.drawings = get_ecn_drawings(self.ecn_file, self.ecn_changes)
+        return self.drawings
+    
+    @traced("gui.push_ecn")
+    def push_ecn(self, file_table: FileTable) -> list[EcnPush]:
+        """Pushes every running change to the production copies, nothing is replaced if any copy fails"""
+        plan = apply_ecn(self.ecn_file, self.ecn_changes, file_table)
+        file_table.commit()
+        return plan
+    
+    def __init__(self, ecn_index: EcnIndex):
+        self.ecn_index = ecn_index
         self.ecn_file: EcnFileManager.EcnFile = None
-        self.ecn_changes: list[EcnFileManager.EcnChange] = None
-        self.drawings: dict[int, Path] = dict()
+        self.ecn_changes: list[EcnChange] = None
+        self.drawings: dict[str, Path] = dict()
 
 class Root(tk.Window):
     def __init__(self):
@@ -537,12 +445,13 @@ class _FileTree(tk.Treeview):
             self.osi_folder.selection = int(self.focus())
         except ValueError:
             self.osi_folder.selection = None
+        self.osi_folder.selections = sorted(int(iid) for iid in self.selection())
     
     def __init__(self, master, osi_folder: OsiFolder):
         # Data
         self.osi_folder = osi_folder
         # Create Tree
-        tk.Treeview.__init__(self, master=master, bootstyle='default', columns=self.TREE_HEADERS, show='headings', height=25)
+        tk.Treeview.__init__(self, master=master, bootstyle='default', columns=self.TREE_HEADERS, show='headings', height=25, selectmode='extended')
         self.heading(self.TREE_HEADERS[0], text="File Type", anchor='center')
         self.heading(self.TREE_HEADERS[1], text="File Name", anchor='w')
         self.column(self.TREE_HEADERS[0], stretch=False, width=100, anchor='center')
@@ -678,9 +587,7 @@ class _EcnTree(tk.Treeview):
         self.column(self.TREE_HEADERS[3], stretch=False, width=150, anchor='w')
 
 class _EcnPanel(tk.Frame):
-    def __init__(self, master, ecn_manager: EcnFileManager):
-        # Link in Data
-        self.ecn_data = ecn_manager
+    def __init__(self, master, ecn_functions: tuple):
         # Create Frame
         tk.Frame.__init__(self, master)
         # Button Approve
@@ -695,7 +602,7 @@ class _EcnPanel(tk.Frame):
            
 class _ActionWindow(tk.Frame):
     
-    def __init__(self, master, cmd_view, file_view, cmd_ecn):
+    def __init__(self, master, cmd_view, file_view, cmd_ecn, cmd_search):
         tk.Frame.__init__(self, master)
         
         # View Drawing
@@ -707,20 +614,35 @@ class _ActionWindow(tk.Frame):
         cmd_viewfiles_button.grid(row=1, column=0, padx=5, pady=5, sticky='nswe')
         
         # Upload Engineering Change Notice
-        cmd_uploadecn_button = tk.Button(master=self, text="Upload ECN", width=20, command=cmd_ecn)
-        cmd_uploadecn_button.grid(row=2, column=0, padx=5, pady=5, sticky='nswe')
+        self.cmd_uploadecn_button = tk.Button(master=self, text="Upload ECN", width=20, command=cmd_ecn)
+        self.cmd_uploadecn_button.grid(row=2, column=0, padx=5, pady=5, sticky='nswe')
+        
+        # Search the text in the drawings
+        cmd_searchtext_button = tk.Button(master=self, text="Search Drawing Text", width=20, command=cmd_search)
+        cmd_searchtext_button.grid(row=3, column=0, padx=5, pady=5, sticky='nswe')
         
 class _DrawingViewWindow(tk.Frame):
     
+    def _export(self):
+        file_name = asksaveasfilename(defaultextension=".xlsx", filetypes=(("Excel", "*.xlsx"), ("CSV", "*.csv")))
+        if not file_name:
+            return
+        count = write_rows(Path(file_name), _DrawingViewTree.TREE_HEADERS, self.file_paths)
+        Messagebox.ok(f"exported {count} locations to {file_name}")
+    
     def __init__(self, master, file_paths, return_cmd):
         tk.Frame.__init__(self, master)
+        self.file_paths = file_paths
         
         # Widgets
         drawing_view_frame = _DrawingViewTree(self)
-        drawing_view_frame.grid(row=0, column=0, padx=5, pady=5, sticky='nswe')
+        drawing_view_frame.grid(row=0, column=0, columnspan=2, padx=5, pady=5, sticky='nswe')
+        # Button to Export
+        cmd_export_button = tk.Button(self, text="Export", command=self._export)
+        cmd_export_button.grid(row=1, column=0, padx=5, pady=5, sticky='nswe')
         # Button to Return
         cmd_return_button = tk.Button(self, text="Done", command=return_cmd)
-        cmd_return_button.grid(row=1, column=0, padx=5, pady=5, sticky='nswe')
+        cmd_return_button.grid(row=1, column=1, padx=5, pady=5, sticky='nswe')
         
         drawing_view_frame.populate_tree(file_paths)
         
@@ -734,6 +656,52 @@ class _DrawingViewWindow(tk.Frame):
             pass
         """ 
 
+class _SearchResultTree(tk.Treeview):
+    
+    TREE_HEADERS = ("Score", "Drawing Number", "File Location")
+    
+    def populate_tree(self, results: list[SearchResult]):
+        for i, result in enumerate(results):
+            self.insert("", 'end', iid=i, values=(result.score, result.dwg_number, result.location))
+    
+    def return_selection(self):
+        # Try Statement blocks errors if nothing is selected
+        try:
+            return int(self.focus())
+        except ValueError:
+            return None
+    
+    def __init__(self, master):
+        tk.Treeview.__init__(self, master=master, bootstyle='default', columns=self.TREE_HEADERS, show='headings', height=25)
+        self.heading(self.TREE_HEADERS[0], text="Score", anchor='center')
+        self.heading(self.TREE_HEADERS[1], text="Drawing Number", anchor='w')
+        self.heading(self.TREE_HEADERS[2], text="File Location", anchor='w')
+        self.column(self.TREE_HEADERS[0], stretch=False, width=80, anchor='center')
+        self.column(self.TREE_HEADERS[1], stretch=False, width=120, anchor='w')
+        self.column(self.TREE_HEADERS[2], stretch=False, width=700, anchor='w')
+
+class _SearchResultWindow(tk.Frame):
+    
+    def _open_pdf(self):
+        selection = self.result_tree.return_selection()
+        if selection == None:
+            return
+        open_pdf(self.results[selection].location)
+    
+    def __init__(self, master, results: list[SearchResult], return_cmd):
+        tk.Frame.__init__(self, master)
+        self.results = results
+        
+        # Widgets
+        self.result_tree = _SearchResultTree(self)
+        self.result_tree.grid(row=0, column=0, columnspan=2, padx=5, pady=5, sticky='nswe')
+        cmd_openpdf_button = tk.Button(self, text="Open PDF", command=self._open_pdf)
+        cmd_openpdf_button.grid(row=1, column=0, padx=5, pady=5, sticky='nswe')
+        cmd_return_button = tk.Button(self, text="Done", command=return_cmd)
+        cmd_return_button.grid(row=1, column=1, padx=5, pady=5, sticky='nswe')
+        
+        self.result_tree.populate_tree(results)
+
 class _EcnWindow(tk.Frame):
         
     def _clear_window(self):
@@ -743,7 +711,7 @@ class _EcnWindow(tk.Frame):
     def populate_tree(self):
         # Populate Tree
         ecn_change_list = list()
-        for change in self.ecn_changes:
+        for change in self.ecn_manager.ecn_changes:
             ecn_change_list.append(
                 (
                     change.level,
@@ -755,33 +723,52 @@ class _EcnWindow(tk.Frame):
     
     def _launch_action_window(self):
         self._clear_window()
-        self.ecn_tree = _EcnTree(self)
+        self.ecn_tree = _EcnTree(self, self.ecn_manager)
         self.ecn_tree.grid(row=0, column=1, padx=5, pady=5, sticky='nswe')
         self.ecn_panel = _EcnPanel(self, self.ECN_PANEL_FUNCTIONS)
         self.ecn_panel.grid(row=0, column=0, padx=5, pady=5, sticky='nswe')
-        #self.file_window = _FileWindow(self, self.build_table, self.ecn_file, None)
-        self.file_window.grid(row=0, column=2, padx=5, pady=5, sticky='nswe')
         self.populate_tree()
         
     def _launch_dwg_view_window(self):
         selection = self.ecn_tree.return_selection()
         if selection == None:
             return
+        dwg_number = self.ecn_manager.ecn_changes[selection].dwg_number
+        try:
+            dwg_paths = self.file_table.get_file_paths(dwg_number)
+        except KeyError:
+            Messagebox.ok(f"Part number {dwg_number} not in directory")
+            return
         self._clear_window()
-        dwg_number = self.ecn_changes[selection].dwg_number
-        window = _DrawingViewWindow(self, self.build_table, dwg_number, self._launch_action_window)
+        window = _DrawingViewWindow(self, dwg_paths, self._launch_action_window)
         window.grid(row=0, column=0, padx=5, pady=5, sticky='nswe')
     
-    def __init__(self, master, build_table, ecn_number, return_cmd):
+    @traced("gui.approve_change")
+    def _approve_change(self):
+        try:
+            self.ecn_manager.find_drawings()
+        except FileNotFoundError as error:
+            Messagebox.ok(str(error))
+            return
+        if Messagebox.yesno("are you sure, this will replace every production copy of the drawings in the ecn") != "Yes":
+            return
+        try:
+            plan = self.ecn_manager.push_ecn(self.file_table)
+        except (OSError, ValueError) as error:
+            print(f"ecn push failed, no drawings were replaced: {error}")
+            Messagebox.ok(f"ecn push failed, no drawings were replaced: {error}")
+            return
+        for push in plan:
+            print(f"File {push.dst} was replaced with {push.dst_new}")
+        Messagebox.ok(f"replaced {plan.__len__()} production files")
+    
+    def __init__(self, master, file_table: FileTable, ecn_manager: EcnFileManager, return_cmd):
         tk.Frame.__init__(self, master)
         
         # Create Data
-        self.build_table: dict[str, list[Path]] = build_table
-        try:
-            self.ecn_changes = read_ecn_changes(self.ecn_file.ecn_file)
-        except FileNotFoundError:
-            self.ecn_file = None
-            self.ecn_changes = list()
+        self.file_table = file_table
+        self.ecn_manager = ecn_manager
+        self.ecn_manager.read_ecn_changes()
         
         # Panel Functions
         self.ECN_PANEL_FUNCTIONS = (
@@ -801,6 +788,7 @@ class ProductionFileFrame(tk.Frame):
             
     def _launch_drawing_view(self):
         dwg_number = Querybox.get_string("Enter Drawing Number Below")
+        self.file_table.reclassify()     # Drawings with prefixes added to the config since the table was built
         try:
             dwg_paths = self.file_table.get_file_paths(dwg_number)
         except KeyError:
@@ -822,31 +810,121 @@ class ProductionFileFrame(tk.Frame):
         file_panel.grid(row=0, column=0, padx=5, pady=5, sticky='nswe')
         active_frame.pack(side="top",padx=5, pady=5)
     
-    # still needs refactored
     def _launch_ecn_window(self):
-        ecn_number = self.active_frame.cmd_uploadecn_var.get()
+        if self.ecn_index == None:     # The last build failed, it is built again and the button enabled when done
+            self._start_ecn_index()
+            Messagebox.ok("The ECN index is being built, open the ECN again when the button is enabled")
+            return
+        ecn_number = Querybox.get_string("Enter ECN Number Below")
+        if ecn_number == None:
+            return
+        ecn_manager = EcnFileManager(self.ecn_index)
+        try:
+            ecn_manager.get_ecn(ecn_number)
+        except FileNotFoundError as error:
+            Messagebox.ok(str(error))
+            return
         
         self._clear_window()
-        self.active_frame = _EcnWindow(self, self.build_table, ecn_number, self._launch_action_window)
+        self.active_frame = _EcnWindow(self, self.file_table, ecn_manager, self._launch_action_window)
         self.active_frame.pack(side="top", padx=5, pady=5)
             
+    def _load_ecn_index(self):
+        """Loads the stored ECN index and reads the ECN folders that changed since, run off the Tk thread"""
+        ecn_index = EcnIndex()
+        ecn_index.store()
+        self.ecn_index = ecn_index
+    
+    def _start_ecn_index(self):
+        self._ecn_index_thread = Thread(target=self._load_ecn_index, name="ecn-index", daemon=True)
+        self._ecn_index_thread.start()
+        self._set_ecn_button('disabled')
+        self._wait_for_ecn_index()
+    
+    def _set_ecn_button(self, state: str):
+        # The action window may have been replaced while the index was built
+        if isinstance(self.active_frame, _ActionWindow) and self.active_frame.winfo_exists():
+            self.active_frame.cmd_uploadecn_button.configure(state=state)
+    
+    def _wait_for_ecn_index(self):
+        if self._ecn_index_thread.is_alive():
+            self.after(250, self._wait_for_ecn_index)
+            return
+        if self.ecn_index == None:
+            print("The ECN index could not be built, opening an ECN builds it again")
+        self._set_ecn_button('normal')
+    
+    def _load_text_index(self):
+        """Loads the stored text index and reads the pdfs that changed since, run off the Tk thread"""
+        text_index = TextIndex()
+        text_index.store()
+        self.text_index = text_index
+    
+    def _wait_for_text_index(self, query: str):
+        if self.text_index != None:
+            self._show_search_results(query)
+        elif self._text_index_thread.is_alive():
+            self.after(250, self._wait_for_text_index, query)
+        else:
+            Messagebox.ok("The text index could not be built, see the console for the error")
+            self._launch_action_window()
+    
+    @traced("gui.search_text")
+    def _launch_search_window(self):
+        query = Querybox.get_string("Enter Words to Find in the Drawings")
+        if not query:
+            return
+        if self.text_index == None:     # The text index is only loaded and refreshed when the first search is made
+            if self._text_index_thread == None or not self._text_index_thread.is_alive():
+                self._text_index_thread = Thread(target=self._load_text_index, name="text-index", daemon=True)
+                self._text_index_thread.start()
+            self._clear_window()
+            self.active_frame = tk.Label(self, text="Reading the drawing pdfs for the text index, the results are shown when it is ready")
+            self.active_frame.pack(side="top", padx=5, pady=5)
+            self._wait_for_text_index(query)
+            return
+        self._show_search_results(query)
+    
+    def _show_search_results(self, query: str):
+        results = self.text_index.search(query)
+        if not results:
+            Messagebox.ok(f"No drawings contain: {query}")
+            self._launch_action_window()
+            return
+        
+        self._clear_window()
+        self.active_frame = _SearchResultWindow(self, results, self._launch_action_window)
+        self.active_frame.pack(side="top", padx=5, pady=5)
+    
     def _launch_action_window(self):
+        self.file_table.reclassify()
         self._clear_window()
         self.active_frame = _ActionWindow(
             self,
             self._launch_drawing_view,
             self._launch_directory_window,
-            self._launch_ecn_window
+            self._launch_ecn_window,
+            self._launch_search_window
         )
+        if self._ecn_index_thread != None and self._ecn_index_thread.is_alive():
+            self.active_frame.cmd_uploadecn_button.configure(state='disabled')     # Enabled when the ECN index is built
         self.active_frame.pack(side="top",padx=5, pady=5)
     
     def __init__(self, master):
         tk.Frame.__init__(self, master=master)
+        get_config_manager().watch()     # Prefixes added to the config are picked up without restarting
         self.file_table = FileTable(PROJDIR.WORKING)
+        self.ecn_index: EcnIndex = None
+        self.text_index: TextIndex = None
+        self._ecn_index_thread: Thread = None
+        self._text_index_thread: Thread = None
+        self.active_frame = None
         self._launch_action_window()
+        self._start_ecn_index()     # Built while the first action is chosen instead of blocking the window
         
 if __name__ == '__main__':
     root = Root()
     active_window = ProductionFileFrame(root.actionsFrame)
     active_window.pack(side='top')
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    close_pdf_cache()
@@ -0,0 +1,34 @@
+"""Main Script: Reports every production copy whose revision is older than the latest revision in the
+engineering directory, nothing in the production folders is changed"""
+
+from argparse import ArgumentParser
+from pathlib import Path
+
+from project_functions import build_revision_index, FileTable
+from report_functions import get_stale_locations, summarize_by_folder, write_rows, STALE_HEADERS, FOLDER_HEADERS, FAMILY_HEADERS
+from StandardOSILib.osi_trace import enable_tracing
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Report production drawings that are behind the engineering revision")
+    parser.add_argument("--format", choices=("csv", "xlsx"), default="csv", help="file type of the reports")
+    parser.add_argument("--output", type=Path, default=Path("."), help="folder the reports are written to")
+    parser.add_argument("--trace", type=Path, default=None, help="chrome trace json file, or a folder for one, of this run")
+    args = parser.parse_args()
+    if args.trace:
+        enable_tracing(args.trace)
+    
+    file_table = FileTable()
+    build_table: dict[str, list[Path]] = file_table.file_table
+    revision_index = build_revision_index()
+    
+    by_drawing = args.output.joinpath("stale_by_drawing." + args.format)
+    count = write_rows(by_drawing, STALE_HEADERS, get_stale_locations(build_table, revision_index))
+    print(f"{count} stale production copies written to {by_drawing}")
+    
+    by_folder = args.output.joinpath("stale_by_folder." + args.format)
+    count = write_rows(by_folder, FOLDER_HEADERS, summarize_by_folder(get_stale_locations(build_table, revision_index)))
+    print(f"{count} folders with stale copies written to {by_folder}")
+    
+    by_family = args.output.joinpath("stale_by_family." + args.format)
+    count = write_rows(by_family, FAMILY_HEADERS, file_table.family_index.rollup(revision_index))
+    print(f"{count} product families written to {by_family}")
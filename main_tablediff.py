@@ -0,0 +1,42 @@
+"""Main Script: Reports the drawings that were added, removed, moved, or revised between two file table
+snapshots, or between a snapshot and the production folder as it is now
+    python main_tablediff.py old_table.pickle new_table.pickle
+    python main_tablediff.py old_table.pickle --live"""
+
+import csv
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+
+from project_data import PROJDIR
+from project_functions import FileTable
+from report_functions import diff_file_tables, write_rows, CHANGE_HEADERS
+from StandardOSILib.osi_trace import enable_tracing
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Compare two file table snapshots")
+    parser.add_argument("old", type=Path, help="file table pickle before the changes")
+    parser.add_argument("new", type=Path, nargs="?", help="file table pickle after the changes")
+    parser.add_argument("--live", type=Path, nargs="?", const=PROJDIR.WORKING, help="compare against the production folder")
+    parser.add_argument("--output", type=Path, default=None, help="csv or xlsx file, prints csv if not supplied")
+    parser.add_argument("--trace", type=Path, default=None, help="chrome trace json file, or a folder for one, of this run")
+    args = parser.parse_args()
+    if args.trace:
+        enable_tracing(args.trace)
+    if args.new is None and args.live is None:
+        parser.error("supply a new file table or --live")
+    for table_path in (args.old, args.new):
+        if table_path is not None and not table_path.is_file():
+            parser.error(f"file table {table_path} does not exist")
+    
+    old_table = FileTable(table_path=args.old).file_table
+    new_table = FileTable(table_path=args.new).file_table if args.new else FileTable(args.live).file_table
+    changes = diff_file_tables(old_table, new_table)
+    
+    if args.output:
+        count = write_rows(args.output, CHANGE_HEADERS, changes)
+        print(f"{count} changes written to {args.output}")
+    else:
+        csv_writer = csv.writer(sys.stdout)     # Quotes paths and folders that contain commas
+        csv_writer.writerow(CHANGE_HEADERS)
+        csv_writer.writerows(changes)
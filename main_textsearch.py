@@ -0,0 +1,36 @@
+"""Main Script: Refreshes the text index of the drawing pdfs and finds drawings by the text in them, such as a
+description or material. Words given on the command line are searched once, otherwise queries are read in a loop
+    python main_textsearch.py 304 STAINLESS BRACKET"""
+
+import sys
+from time import perf_counter
+
+from search_functions import TextIndex
+
+def print_results(text_index: TextIndex, query: str):
+    start = perf_counter()
+    results = text_index.search(query)
+    elapsed = perf_counter() - start
+    if not results:
+        print("No drawings contain those words")
+    for result in results:
+        print(f"{result.score:>8.3f}  {result.dwg_number}  {result.location}")
+    print(f"{results.__len__()} results in {elapsed * 1000:.1f} ms")
+
+if __name__ == '__main__':
+    text_index = TextIndex()
+    text_index.store()
+    print(f"Text index of {text_index.documents.__len__()} pdfs and {text_index.postings.__len__()} terms")
+    
+    if sys.argv.__len__() > 1:
+        print_results(text_index, " ".join(sys.argv[1:]))
+        sys.exit(0)
+    
+    exit_str = "Exit!"
+    while True:
+        print("Type Words to Find Drawings That Contain Them")
+        print(f"Type {exit_str} to exit the program")
+        user_input = input("> ")
+        if user_input == exit_str:
+            break
+        print_results(text_index, user_input)
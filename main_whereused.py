@@ -0,0 +1,23 @@
+"""Main Script: Updates the BOM graph with any drawings that changed revision, then finds every assembly
+a drawing is used in"""
+
+from project_functions import build_revision_index
+from bom_functions import BomGraph
+
+if __name__ == '__main__':
+    bom_graph = BomGraph()
+    updated = bom_graph.update(build_revision_index())
+    if updated:
+        print(f"Read the BOM of {updated.__len__()} changed drawings")
+        bom_graph.store()
+    exit_str = "Exit!"
+    
+    while True:
+        print("Type Drawing Number to Find Where it is Used")
+        print(f"Type {exit_str} to exit the program")
+        user_input = input("> ")
+        if user_input == exit_str:
+            break
+        
+        print(f"Used in: {sorted(bom_graph.where_used(user_input))}")
+        print(f"All assemblies: {sorted(bom_graph.ancestry(user_input))}")
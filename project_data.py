@@ -12,9 +12,20 @@ class PROJDIR():
     UPDATE_DRAWINGS: Path = Path(r"X:\RESEARCH AND DEVELOPMENT\DrawingManager\FOL-004-UpdatedDrawings")
     CS_500: Path = Path(r"X:\RESEARCH AND DEVELOPMENT\DrawingManager\FOL-005-TestFolder#2\Oil Water Seperators\CoolSkim\CS-500-019")
     BOM: Path = Path(r"X:\RESEARCH AND DEVELOPMENT\DrawingManager\FOL-007-TestFolder#3-BOMPulling")
+    BOM_KITS: Path = Path(r"X:\RESEARCH AND DEVELOPMENT\DrawingManager\FOL-009-BOMKits")
     
     
 @dataclass
 class PROJDATA():
     FILE_TABLE: Path = Path(r".\file_table.pickle")
-    ECN: Path = Path(r"X:\RESEARCH AND DEVELOPMENT\DrawingManager\FOL-008-TestFoler#4-ECN\ECN-01123.xlsx")
\ No newline at end of file
+    FILE_TABLE_SHARDS: Path = Path(r".\file_table_shards")
+    BOM_CACHE: Path = Path(r".\bom_cache.pickle")
+    BOM_GRAPH: Path = Path(r".\bom_graph.pickle")
+    ECN_INDEX: Path = Path(r".\ecn_index.pickle")
+    HASH_CACHE: Path = Path(r".\hash_cache.pickle")
+    TEXT_INDEX: Path = Path(r".\text_index.pickle")
+    PDF_CACHE: Path = Path(r".\pdf_cache")
+    ECN: Path = Path(r"X:\RESEARCH AND DEVELOPMENT\DrawingManager\FOL-008-TestFoler#4-ECN\ECN-01123.xlsx")
+
+# Production folders indexed by the file table, each folder is stored as its own shard
+PRODUCTION_ROOTS: tuple[Path] = (PROJDIR.WORKING, PROJDIR.CS_500, PROJDIR.BOM, PROJDIR.UPDATE_DRAWINGS)
\ No newline at end of file
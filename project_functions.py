@@ -2,16 +2,22 @@
     Author: NNP"""
     
 # Imports
-from os import walk, scandir
+import hashlib
+from pickle import UnpicklingError
 from pathlib import Path, WindowsPath, PosixPath
 import re
 from dataclasses import dataclass
 from typing import NamedTuple
+from concurrent.futures import ThreadPoolExecutor
 
-from StandardOSILib.osi_functions import osi_get_prefix
-from StandardOSILib.osi_directory import PART_NUM_REGEX, OSIDIR
+from StandardOSILib.osi_functions import osi_get_prefix, osi_file_load, osi_file_store, osi_file_lock, revision_key
+from StandardOSILib.osi_directory import OSIDIR
+from StandardOSILib.osi_config import get_drawing_config
 from StandardOSILib.osi_directory_append import PREFIX_LOOKUP_TABLE
-from project_data import PROJDATA, PROJDIR
+from StandardOSILib.osi_trace import traced, trace_count
+from StandardOSILib.osi_filesystem import get_filesystem
+from project_data import PROJDATA, PRODUCTION_ROOTS
+from index_client import get_index_client
 
 import openpyxl
 
@@ -23,36 +29,46 @@ def get_dwg_number_rev(file: Path|WindowsPath|PosixPath) -> tuple[str|None]:
 
     Returns:
         tuple[str|None]: Returns a tuple with two strings, the first one is the drawing number, the second is the revision.
-        If the drawing number is not recognised, returns None
+        If the drawing number is not recognised, returns None. Names starting with ~ are never drawings, they are
+        the temp and held files of a replacement or office lock files
     """
     name = file.stem
+    if name[:1] == "~":
+        return None
+    part_num_pattern = get_drawing_config().part_num_pattern
     try:
-        dwg = re.search(PART_NUM_REGEX, name).group(0)
+        dwg = part_num_pattern.search(name).group(0)
     except AttributeError:
         return None
-    rev_unparsed = re.sub(PART_NUM_REGEX, "", name)
+    rev_unparsed = part_num_pattern.sub("", name)
     rev_start = rev_unparsed.rfind("-")
     rev = rev_unparsed[rev_start+1:]
     return dwg, rev
 
-def get_drawings(Folder: Path|WindowsPath|PosixPath) -> dict[str, list[str]]:
+@traced()
+def get_drawings(Folder: Path|WindowsPath|PosixPath, unmatched: list[Path] = None) -> dict[str, list[str]]:
     """Walks through the directory and all subfolders of that directory and returns a dictionary containing
     all Pathlib Paths where the drawings are found using the drawing number as a key.
 
     Args:
         Folder (Path | WindowsPath | PosixPath): Directory that is walked
+        unmatched (list[Path], optional): Files that are not drawings are added to the list if supplied, so they
+        can be classified again when the config changes. Defaults to None.
 
     Returns:
         dict[str, list[str]]: Dictionary, Key is a string that is the drawing number. Value is a list of
         Pathlib Paths where each copy of the drawing is found.
     """
     build_table: dict[str, list[Path|WindowsPath|PosixPath]] = dict()
-    for (root, dirs, files) in walk(Folder, True):
+    for (root, dirs, files) in get_filesystem().walk(Folder):
+        trace_count("entries_seen", files.__len__())
         for file in files:
             if file == "":                            # Check for directory with no files
                 continue
             dwg_number_rev = get_dwg_number_rev(Path(file))
             if dwg_number_rev is None:                       # Check for valid drawing number
+                if unmatched is not None:
+                    unmatched.append(Path(root).joinpath(file))
                 continue
             dwg_number = dwg_number_rev[0]
             
@@ -62,25 +78,539 @@ def get_drawings(Folder: Path|WindowsPath|PosixPath) -> dict[str, list[str]]:
                 build_table[dwg_number].append(Path(root).joinpath(file))
     return build_table
           
+@traced()
 def get_available_dwg_revisions(dwg: str) -> dict[str, Path|WindowsPath|PosixPath]:
     
+    # Use the index service if one is running instead of scanning the network drive
+    index_client = get_index_client()
+    if index_client is not None:
+        trace_count("index_requests")
+        try:
+            return index_client.get_revisions(dwg)
+        except (OSError, ValueError) as error:     # Service stopped, URLError is an OSError
+            print(f"Index service did not answer, scanning the network drive instead: {error}")
+    
     # Set up variables
     available_revision: dict[str, Path] = dict()
     # Find the appropraite directory
     directory = PREFIX_LOOKUP_TABLE[osi_get_prefix(dwg)]
     
     # Find all matching files
-    with scandir(directory) as dir:
-        for i, file in enumerate(dir):
-            if not re.search(dwg, file.name):                   # Check for no returns
+    for i, file in enumerate(get_filesystem().scandir(directory)):
+        trace_count("entries_seen")
+        if not re.search(dwg, file.name):                   # Check for no returns
+            continue
+        if not file.name[file.name.__len__()-4:] == ".pdf": # Check for pdfs
+            continue
+        rev = get_dwg_number_rev(Path(file.path))[1]  # Find Revision
+        if rev == "":                       # Remove Blank Revisions
+            continue
+        available_revision[rev] = Path(file.path)
+    return available_revision
+
+@traced()
+def get_revision_index(directory: Path|WindowsPath|PosixPath) -> dict[str, dict[str, Path|WindowsPath|PosixPath]]:
+    """Scans an engineering directory once and returns the available revisions of every drawing in it.
+
+    Args:
+        directory (Path | WindowsPath | PosixPath): Engineering directory that is scanned, E.G. OSIDIR.FABPARTS
+
+    Returns:
+        dict[str, dict[str, Path|WindowsPath|PosixPath]]: Key is the drawing number, value is a dictionary in the
+        same form returned by get_available_dwg_revisions
+    """
+    revision_index: dict[str, dict[str, Path]] = dict()
+    for file in get_filesystem().scandir(directory):
+        trace_count("entries_seen")
+        if not file.name[file.name.__len__()-4:] == ".pdf": # Check for pdfs
+            continue
+        dwg_number_rev = get_dwg_number_rev(Path(file.path))
+        if dwg_number_rev is None or dwg_number_rev[1] == "":   # Remove unrecognised and blank revisions
+            continue
+        revision_index.setdefault(dwg_number_rev[0], dict())[dwg_number_rev[1]] = Path(file.path)
+    return revision_index
+
+@traced()
+def build_revision_index(directories: list[Path|WindowsPath|PosixPath] = None) -> dict[str, dict[str, Path|WindowsPath|PosixPath]]:
+    """Scans every engineering directory concurrently and merges them into one revision index.
+
+    Args:
+        directories (list[Path | WindowsPath | PosixPath], optional): Engineering directories to scan.
+        Defaults to every directory in the PREFIX_LOOKUP_TABLE.
+
+    Returns:
+        dict[str, dict[str, Path|WindowsPath|PosixPath]]: Key is the drawing number, value is a dictionary of
+        revision to drawing pdf
+    """
+    if directories is None:
+        directories = list(dict.fromkeys(PREFIX_LOOKUP_TABLE.values()))
+    revision_index: dict[str, dict[str, Path]] = dict()
+    with ThreadPoolExecutor() as executor:
+        for directory_index in executor.map(get_revision_index, directories):
+            for dwg, revisions in directory_index.items():
+                revision_index.setdefault(dwg, dict()).update(revisions)
+    return revision_index
+
+def get_latest_revision(available_revisions: dict[str, Path|WindowsPath|PosixPath]) -> tuple[str, Path|WindowsPath|PosixPath]|None:
+    """Takes the available revisions of a drawing and returns the most recent revision and its path.
+    Revisions are compared the same way sort_revisions orders them. Returns None if there are no revisions"""
+    if not available_revisions:
+        return None
+    latest_rev = max(available_revisions.keys(), key=revision_key)
+    return latest_rev, available_revisions[latest_rev]
+
+def get_index_length(file_name: str):
+    # Get the ammount of numbers that make up the index, This assumes the index is a numberical number at the start
+    for i in range(file_name.__len__()):
+        try:
+            int(file_name[i])
+        except ValueError:
+            break
+    return i
+
+def change_index(file_name: str, change: int):
+    """Takes a file name with an index in the format "index-dwg_number-etc" and updates it by the change value.
+
+        Args:
+            file_name (str): The file name to change the index of. Index must be integers at the start of the file name.
+            change (int): The integer to change the index by. Negative numbers decriment, Positive numbers incriment
+
+        Returns:
+            str: The file name with the updated index in the format it was given
+    """
+    # Get the ammount of numbers that make up the index, This assumes the index is a numberical number at the start
+    i = get_index_length(file_name)
+    
+    drawing = file_name[i:]
+    index = str(int(file_name[:i]) + change)
+    
+    # Index must keep the same number of integers, 000 -> 001, 0002 -> 0001 etc
+    for j in range(i - index.__len__()):
+        index = str(0) + index
+        
+    return index + drawing
+
+class FileTableShard():
+    """ Index of the drawings under one production root. Each folder is stored with its modified time, a folder is
+        only listed again if files were added, removed, or renamed in it since the last refresh. Files that are not
+        drawings are kept so they can be classified again when prefixes are added to the config """
+    
+    def _scan_folder(self, folder: Path) -> tuple[list[Path], list[tuple[str, Path]], list[Path]]:
+        subfolders: list[Path] = list()
+        drawings: list[tuple[str, Path]] = list()
+        unmatched: list[Path] = list()
+        for file in get_filesystem().scandir(folder):
+            if file.is_dir():
+                subfolders.append(Path(file.path))
                 continue
-            if not file.name[file.name.__len__()-4:] == ".pdf": # Check for pdfs
+            dwg_number_rev = get_dwg_number_rev(Path(file.name))
+            if dwg_number_rev is None:      # Check for valid drawing number
+                unmatched.append(Path(file.path))
                 continue
-            rev = get_dwg_number_rev(Path(file.path))[1]  # Find Revision
-            if rev == "":                       # Remove Blank Revisions
+            drawings.append((dwg_number_rev[0], Path(file.path)))
+        return subfolders, drawings, unmatched
+    
+    @traced("FileTableShard.refresh")
+    def refresh(self) -> int:
+        """Brings the shard up to date with the drive and stores it
+
+        Returns:
+            int: Number of folders that were listed again
+        """
+        folders: dict[Path, tuple[int, list[Path], list[tuple[str, Path]], list[Path]]] = dict()
+        rescanned = 0
+        pending = [self.root]
+        while pending:
+            folder = pending.pop()
+            try:
+                mtime = get_filesystem().stat(folder).mtime_ns
+            except FileNotFoundError:   # Folder was removed since the last refresh
                 continue
-            available_revision[rev] = Path(file.path)
-    return available_revision
+            entry = self.folders.get(folder)
+            if entry is None or entry[0] != mtime or entry.__len__() < 4:     # Shards stored before unmatched files were kept
+                entry = (mtime, *self._scan_folder(folder))
+                rescanned += 1
+            folders[folder] = entry
+            pending.extend(entry[1])
+        
+        self.folders = folders
+        osi_file_store(self.folders, self.shard_path)
+        return rescanned
+    
+    def reclassify(self) -> list[tuple[str, Path]]:
+        """Matches the files that were not drawings against the current config and stores the shard, no folder is
+        listed again
+
+        Returns:
+            list[tuple[str, Path]]: Drawing number and location of every file that is now a drawing
+        """
+        matched: list[tuple[str, Path]] = list()
+        for folder, (mtime, subfolders, drawings, unmatched) in self.folders.items():
+            still_unmatched: list[Path] = list()
+            for file_path in unmatched:
+                dwg_number_rev = get_dwg_number_rev(file_path)
+                if dwg_number_rev is None:
+                    still_unmatched.append(file_path)
+                    continue
+                drawings.append((dwg_number_rev[0], file_path))
+                matched.append((dwg_number_rev[0], file_path))
+            if still_unmatched.__len__() != unmatched.__len__():
+                self.folders[folder] = (mtime, subfolders, drawings, still_unmatched)
+        if matched:
+            osi_file_store(self.folders, self.shard_path)
+        return matched
+    
+    def get_drawings(self) -> dict[str, list[Path]]:
+        build_table: dict[str, list[Path]] = dict()
+        for entry in self.folders.values():
+            for dwg_number, file_path in entry[2]:
+                build_table.setdefault(dwg_number, list()).append(file_path)
+        return build_table
+    
+    def __init__(self, root: Path, shard_folder: Path = PROJDATA.FILE_TABLE_SHARDS):
+        self.root = root
+        shard_folder.mkdir(parents=True, exist_ok=True)
+        shard_id = hashlib.md5(str(root).encode()).hexdigest()[:8]
+        self.shard_path = shard_folder.joinpath(f"{root.name}-{shard_id}.pickle")
+        try:
+            self.folders: dict[Path, tuple[int, list[Path], list[tuple[str, Path]], list[Path]]] = osi_file_load(self.shard_path)
+        except (FileNotFoundError, EOFError):
+            self.folders = dict()
+
+class FamilyRollup(NamedTuple):
+    family: str|None            # None for copies that are not under a product family folder
+    drawings: int               # Drawing numbers with a copy in the family
+    copies: int                 # Production copies in the family
+    stale_copies: int|None      # Copies older than the latest engineering revision, None without a revision index
+
+class ProductFamilyIndex():
+    """ Product family of every production copy in a file table. The family of a copy is the nearest folder above
+        it named after a family or one of its product lines in PROD_FAMILIES, each folder is only resolved once.
+        Copies are grouped by family and drawing number so rollups never walk the table or the drive """
+    
+    def _folder_family(self, folder: Path) -> str|None:
+        try:
+            return self._folders[folder]
+        except KeyError:
+            pass
+        family = self._names.get(folder.name.upper())
+        if family is None and folder.parent != folder:
+            family = self._folder_family(folder.parent)
+        self._folders[folder] = family
+        return family
+    
+    def get_family(self, location: Path) -> str|None:
+        """Returns the product family of a production copy, None if it is not under a product family folder"""
+        return self._folder_family(location.parent)
+    
+    def set_locations(self, dwg_number: str, locations: list[Path]):
+        """Replaces every copy of a drawing in the index, a drawing without locations is removed"""
+        for family in self._drawings.pop(dwg_number, (None, ()))[1]:
+            drawings = self.families[family]
+            drawings.pop(dwg_number)
+            if not drawings:
+                self.families.pop(family)
+        if not locations:
+            return
+        by_family: dict[str|None, list[tuple[Path, str]]] = dict()
+        for location in locations:
+            dwg_number_rev = get_dwg_number_rev(location)
+            by_family.setdefault(self.get_family(location), list()).append(
+                (location, "" if dwg_number_rev is None else dwg_number_rev[1]))
+        for family, copies in by_family.items():
+            self.families.setdefault(family, dict())[dwg_number] = copies
+        self._drawings[dwg_number] = (tuple(locations), tuple(by_family.keys()))
+    
+    def sync(self, file_table: dict[str, list[Path]]) -> int:
+        """Indexes the drawings whose copies changed in the table since they were indexed, such as after a merge
+
+        Returns:
+            int: Number of drawings that were indexed again
+        """
+        changed = [dwg_number for dwg_number, locations in file_table.items()
+                   if self._drawings.get(dwg_number, (None, ()))[0] != tuple(locations)]
+        removed = [dwg_number for dwg_number in self._drawings if dwg_number not in file_table]
+        for dwg_number in changed:
+            self.set_locations(dwg_number, file_table[dwg_number])
+        for dwg_number in removed:
+            self.set_locations(dwg_number, list())
+        return changed.__len__() + removed.__len__()
+    
+    def rollup(self, revision_index: dict[str, dict[str, Path]] = None) -> list[FamilyRollup]:
+        """Counts the drawings and copies of every product family, and the stale copies if a revision index is
+        supplied. Families are in name order with copies outside of any family last
+
+        Args:
+            revision_index (dict[str, dict[str, Path]], optional): Revision index returned by build_revision_index.
+            Defaults to None.
+
+        Returns:
+            list[FamilyRollup]: Counts of every product family with a copy in the table
+        """
+        rollups: list[FamilyRollup] = list()
+        for family in sorted(self.families.keys(), key=lambda family: (family is None, family or "")):
+            drawings = self.families[family]
+            stale_copies = None
+            if revision_index is not None:
+                stale_copies = 0
+                for dwg_number, copies in drawings.items():
+                    latest = get_latest_revision(revision_index.get(dwg_number))
+                    if latest is None:      # Drawing is not in the engineering directory
+                        continue
+                    latest_rev = revision_key(latest[0])
+                    stale_copies += sum(1 for location, rev in copies if revision_key(rev) < latest_rev)
+            rollups.append(FamilyRollup(family, drawings.__len__(), sum(copies.__len__() for copies in drawings.values()),
+                                        stale_copies))
+        return rollups
+    
+    def set_product_families(self, product_families: dict[str, list[str]]):
+        """Resolves every folder again with new product families, such as after the product lines config changed.
+        Only the index in memory is rebuilt, nothing is read from the drive"""
+        self.product_families = product_families
+        self._names: dict[str, str] = dict()                    # Upper case folder name is key, family is value
+        for family, product_lines in product_families.items():
+            self._names[family.upper()] = family
+            for product_line in product_lines:
+                self._names.setdefault(product_line.upper(), family)
+        self._folders: dict[Path, str|None] = dict()            # Folder is key, family is value
+        drawings = {dwg_number: list(entry[0]) for dwg_number, entry in self._drawings.items()}
+        self._drawings.clear()
+        self.families.clear()
+        self.sync(drawings)
+    
+    def __init__(self, file_table: dict[str, list[Path]] = None, product_families: dict[str, list[str]] = None):
+        self._drawings: dict[str, tuple[tuple[Path], tuple[str|None]]] = dict()    # Drawing is key, locations and families indexed is value
+        self.families: dict[str|None, dict[str, list[tuple[Path, str]]]] = dict()  # Family is key, copies and revision of each drawing is value
+        self.set_product_families(get_drawing_config().prod_families if product_families is None else product_families)
+        if file_table is not None:
+            self.sync(file_table)
+
+class FileTable():
+    """ Collection of data and functions to handle where production drawings are stored. The table is stored in a
+        pickle file shared by every program, each store increments a generation number and is done under a lock.
+        If another program stored the table first, only the changes made here are merged into its table """
+    
+    def update_file_table(self, key: str, old_path: Path, new_path: Path = None):
+        """Updates the file table
+
+        Args:
+            file_table (dict[str, list[Path]]): A dictionary using drawing names as keys, for a list of Paths
+            key (str): The drawing name
+            old_path (Path): The path to change or remove
+            new_path (Path, optional): Replaces the old path with the new one if supplied. Defaults to None.
+        """
+        self._update_entry(key, old_path, new_path)
+        self._notify_index_service()
+    
+    def _update_entry(self, key: str, old_path: Path, new_path: Path = None):
+        index = self.file_table[key].index(old_path)
+        if new_path != None:
+            self.file_table[key][index] = new_path      # The copy keeps its place in the table
+        else:
+            self.file_table[key].pop(index)
+        self.family_index.set_locations(key, self.file_table[key])
+    
+    def _notify_index_service(self):
+        """Asks the index service to refresh after production files were changed, so later sessions do not get
+        paths that no longer exist"""
+        if self._index_client is not None:
+            self._index_client.request_refresh()
+
+    def update_file_table_entries(self, updates: list[tuple[str, Path, Path]]):
+        """Applies a batch of changes to the file table in one pass
+
+        Args:
+            updates (list[tuple[str, Path, Path]]): Each entry is the drawing name, the old path, and the new path.
+            If the new path is None the old path is removed from the table
+        """
+        for key, old_path, new_path in updates:
+            self._update_entry(key, old_path, new_path)
+        self._notify_index_service()
+
+    def add_file_table_entry(self, key: str, new_path: Path = None):
+        self._add_entry(key, new_path)
+        self._notify_index_service()
+    
+    def _add_entry(self, key: str, new_path: Path):
+        if key in self.file_table.keys():
+            self.file_table[key].append(new_path)
+        else:
+            self.file_table[key] = [new_path]
+        self.family_index.set_locations(key, self.file_table[key])
+
+    def get_file_paths(self, drawing: str) -> list[str, Path]:
+        entries = list()
+        for entry in self.file_table[drawing]:
+            entries.append((self.family_index.get_family(entry), entry))
+        return entries
+    
+    def get_root(self, file_path: Path) -> Path|None:
+        """Returns the production root the file is stored under"""
+        for root in self.roots:
+            if file_path.is_relative_to(root):
+                return root
+        return None
+    
+    def locate(self, drawing: str) -> list[tuple[Path, Path]]:
+        """Returns every location of the drawing tagged with the production root it is stored under"""
+        return [(self.get_root(entry), entry) for entry in self.file_table.get(drawing, list())]
+    
+    def _service_matches(self) -> list[tuple[str, Path]]:
+        """Drawings the index service has that this table does not, used by tables that do not know their unmatched
+        files. The service is asked to reload the config first"""
+        if self._index_client is None or not self._index_client.serves(self.roots):
+            return list()
+        try:
+            self._index_client.check_config()
+            service_table = self._index_client.get_file_table()
+        except (OSError, ValueError) as error:     # Service stopped, URLError is an OSError
+            print(f"Index service did not answer, new drawings are found when the table is rebuilt: {error}")
+            return list()
+        return [(dwg_number, location) for dwg_number, locations in service_table.items()
+                for location in locations if location not in self.file_table.get(dwg_number, ())]
+    
+    def reclassify(self) -> list[tuple[str, Path]]:
+        """Brings the table up to date with the config if it was reloaded since the table was built. Only the files
+        that were not drawings are matched again and the product families are resolved again if they changed,
+        nothing is walked on the drive. Tables from the index service or the table file do not know their unmatched
+        files, the new drawings are fetched from the index service if it serves the same roots
+
+        Returns:
+            list[tuple[str, Path]]: Drawing number and location of every file that is now a drawing
+        """
+        config = get_drawing_config()
+        if config.generation == self.config_generation:
+            return list()
+        self.config_generation = config.generation
+        if config.prod_families != self.family_index.product_families:
+            self.family_index.set_product_families(config.prod_families)
+        
+        if not self._unmatched_known:
+            matched = self._service_matches()
+            for dwg_number, file_path in matched:
+                self._add_entry(dwg_number, file_path)
+            return matched
+        
+        matched: list[tuple[str, Path]] = list()
+        for shard in self.shards:
+            matched.extend(shard.reclassify())
+        unmatched: list[Path] = list()
+        for file_path in self.unmatched:
+            dwg_number_rev = get_dwg_number_rev(file_path)
+            if dwg_number_rev is None:
+                unmatched.append(file_path)
+                continue
+            matched.append((dwg_number_rev[0], file_path))
+        self.unmatched = unmatched
+        for dwg_number, file_path in matched:
+            self._add_entry(dwg_number, file_path)
+        if matched:
+            self._notify_index_service()
+        return matched
+    
+    def _load(self) -> tuple[int, dict[str, list[Path]]]:
+        """Returns the generation and table stored in the table file, tables stored before generations were
+        added are generation 0. A missing or damaged table file is raised"""
+        data = osi_file_load(self.table_path)
+        if isinstance(data, dict) and "generation" in data and "file_table" in data:
+            return data["generation"], data["file_table"]
+        return 0, data
+    
+    def _merge(self, stored_table: dict[str, list[Path]]) -> dict[str, list[Path]]:
+        """Applies the paths added and removed since this table was loaded to a table stored by another program"""
+        for key in set(self.file_table.keys()) | set(self._base.keys()):
+            base = self._base.get(key, list())
+            current = self.file_table.get(key, list())
+            if base == current:
+                continue
+            removed = set(base) - set(current)
+            added = [path for path in current if path not in base]
+            merged = [path for path in stored_table.get(key, list()) if path not in removed]
+            merged.extend(path for path in added if path not in merged)
+            if merged:
+                stored_table[key] = merged
+            else:
+                stored_table.pop(key, None)
+        return stored_table
+    
+    def commit(self, overwrite: bool = False):
+        """Stores the table, merging with any changes stored by other programs since this table was loaded
+
+        Args:
+            overwrite (bool, optional): Replace the stored table instead of merging, used when the table was
+            rebuilt from the drive. A damaged table file is only replaced when overwriting. Defaults to False.
+        """
+        with osi_file_lock(self.table_path):
+            try:
+                generation, stored_table = self._load()
+            except FileNotFoundError:     # Nothing stored yet, there are no other changes to merge with
+                generation, stored_table, overwrite = 0, dict(), True
+            except (EOFError, UnpicklingError):
+                if not overwrite:       # Merging into a damaged table would lose every other program's changes
+                    raise
+                print(f"Table file {self.table_path} was damaged, it is replaced by the rebuilt table")
+                generation, stored_table = 0, dict()
+            merged_keys: set[str] = set()
+            if not overwrite and generation != self.generation:
+                # Only the drawings another program changed are indexed again
+                merged_table = self._merge(stored_table)
+                merged_keys = {key for key in self.file_table.keys() | merged_table.keys()
+                               if self.file_table.get(key) != merged_table.get(key)}
+                self.file_table = merged_table
+            self.generation = generation + 1
+            osi_file_store({"generation": self.generation, "file_table": self.file_table}, self.table_path)
+        self._base = {key: list(paths) for key, paths in self.file_table.items()}
+        for key in merged_keys:
+            self.family_index.set_locations(key, self.file_table.get(key, list()))
+        self._notify_index_service()
+
+    def __init__(self, drive_root: Path = None, table_path: Path = PROJDATA.FILE_TABLE, roots: tuple[Path] = None,
+                 use_service: bool = True):
+        """Loads the stored file table, builds it from the drive if a drive root is supplied, or builds it from the
+        shards of each production root if roots are supplied
+
+        Args:
+            drive_root (Path, optional): Folder walked to build the table. Defaults to None.
+            table_path (Path, optional): Pickle file the table is stored in. Defaults to PROJDATA.FILE_TABLE.
+            roots (tuple[Path], optional): Production roots refreshed concurrently and merged into one table,
+            E.G. PRODUCTION_ROOTS. Defaults to None.
+            use_service (bool, optional): Take the table of a drive root from the index service if it serves the
+            same root. False always walks the drive, used when the table is rebuilt. Defaults to True.
+        """
+        self.table_path = table_path
+        self.generation: int|None = None        # None means the table was not loaded from the table file
+        self.roots: tuple[Path] = roots if roots else ((drive_root,) if drive_root else PRODUCTION_ROOTS)
+        self.shards: list[FileTableShard] = list()
+        self.unmatched: list[Path] = list()     # Files that were not drawings when the table was built from the drive
+        self._unmatched_known = True            # False for tables from the index service or the table file
+        self.config_generation = get_drawing_config().generation
+        
+        # Use the index service if one is running for the same root instead of walking the network drive
+        index_client = get_index_client()
+        self._index_client = index_client
+        if roots is not None:
+            self.shards = [FileTableShard(root) for root in roots]
+            with ThreadPoolExecutor() as executor:
+                list(executor.map(FileTableShard.refresh, self.shards))
+            self.file_table: dict[str, list[Path]] = dict()
+            for shard in self.shards:
+                for dwg_number, locations in shard.get_drawings().items():
+                    self.file_table.setdefault(dwg_number, list()).extend(locations)
+        elif drive_root is None:
+            self.generation, self.file_table = self._load()
+            self._unmatched_known = False
+        else:
+            self.file_table: dict[str, list[Path]] = None
+            if use_service and index_client is not None and index_client.serves(self.roots):
+                try:
+                    self.file_table = index_client.get_file_table()
+                    self._unmatched_known = False
+                except (OSError, ValueError) as error:     # Service stopped, URLError is an OSError
+                    print(f"Index service did not answer, walking the network drive instead: {error}")
+            if self.file_table is None:
+                self.file_table = get_drawings(drive_root, self.unmatched)
+        self._base = {key: list(paths) for key, paths in self.file_table.items()}
+        self.family_index = ProductFamilyIndex(self.file_table)
 
 @dataclass
 class EcnFile():
@@ -93,20 +623,19 @@ def get_ecn(ecn_number: str) -> EcnFile:
     ecn_name = "ECN-" + ecn_number
     ecn_folder = None
     
-    with scandir(OSIDIR.ECN_FOLDER) as dir:
-        for file in dir:
-            if file.name == ecn_name:
-                ecn_folder = Path(file.path)
-                break
+    for file in get_filesystem().scandir(OSIDIR.ECN_FOLDER):
+        if file.name == ecn_name:
+            ecn_folder = Path(file.path)
+            break
             
     if ecn_folder == None:
         raise FileNotFoundError(f"ECN: {ecn_name} does not have a folder in the location {OSIDIR.ECN_FOLDER}")
     ecn_drawings = ecn_folder.joinpath("Updated Drawings")
     
-    if not ecn_drawings.exists():
+    if not get_filesystem().exists(ecn_drawings):
         raise FileNotFoundError(f"Location: {ecn_folder} does not contain the following folder: Updated Drawings")
     ecn_file = ecn_folder.joinpath(ecn_name + ".xlsx")
-    if not ecn_file.exists():
+    if not get_filesystem().exists(ecn_file):
         raise FileNotFoundError(f"Location: {ecn_folder} does not contain an excel ecn file")
     
     return (EcnFile(ecn_name, ecn_folder, ecn_drawings, ecn_file))
@@ -118,7 +647,10 @@ class EcnChange():
     new_revision: str
     disposition: str
 
-def read_ecn_changes(ecn: Path) -> list[EcnChange]:
+@traced()
+def parse_ecn_workbook(ecn: Path) -> list[EcnChange]:
+    """Reads the drawing changes from the Bill of Materials sheet of an FM00037 ECN workbook, safe to run on a
+    process pool. EcnIndex caches the result of each workbook"""
     
     @dataclass
     class FM00037():
@@ -129,32 +661,37 @@ def read_ecn_changes(ecn: Path) -> list[EcnChange]:
         REV_COL: int            = 11 # Column Containing Revision
         DISPOSITION_COL: int    = 12 # Column Containing Disposition
     
-    wb = openpyxl.load_workbook(ecn, data_only=True)
-    ws = wb[FM00037.SHEET]
-    ecn_changes: list[EcnChange] = list()
-    
-    for row in ws.iter_rows(min_row=FM00037.DWGS_FIRST_ROW, values_only=True):
+    # Read only mode streams the rows without loading the styles of the whole workbook, every row up to the last
+    # used row of the sheet is read since blocks can be separated by any number of blank rows
+    trace_count("workbooks_opened")
+    wb = openpyxl.load_workbook(ecn, read_only=True, data_only=True)
+    try:
+        ws = wb[FM00037.SHEET]
+        ecn_changes: list[EcnChange] = list()
+        
+        for row in ws.iter_rows(min_row=FM00037.DWGS_FIRST_ROW, max_row=ws.max_row, max_col=FM00037.DISPOSITION_COL+1,
+                                values_only=True):
 
-        empty_row = True
-        for i, value in enumerate(row[FM00037.DWGS_FIRST_COL:FM00037.DWGS_LAST_COL+1]):
-            if value == None or value == "":
+            empty_row = True
+            for i, value in enumerate(row[FM00037.DWGS_FIRST_COL:FM00037.DWGS_LAST_COL+1]):
+                if value == None or value == "":
+                    continue
+                else:
+                    empty_row = False
+                    break
+                
+            if empty_row == True:
+                continue
+            if row[FM00037.DISPOSITION_COL] == "Old Product":
                 continue
-            else:
-                empty_row = False
-                break
             
-        if empty_row == True:
-            continue
-        if row[FM00037.DISPOSITION_COL] == "Old Product":
-            continue
-        
-        try:    # Try except for integer revisions
-            new_revision = row[FM00037.REV_COL].lstrip("-")
-        except AttributeError:
-            new_revision = row[FM00037.REV_COL]
-        
-        ecn_changes.append(EcnChange(i, value, new_revision, row[FM00037.DISPOSITION_COL]))
+            try:    # Try except for integer revisions
+                new_revision = row[FM00037.REV_COL].lstrip("-")
+            except AttributeError:
+                new_revision = row[FM00037.REV_COL]
+            
+            ecn_changes.append(EcnChange(i, value, new_revision, row[FM00037.DISPOSITION_COL]))
+    finally:
+        wb.close()
 
     return ecn_changes
-    
-    
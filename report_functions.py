@@ -0,0 +1,161 @@
+"""Functions for building read only reports of the production drawings and writing them to csv or excel
+    Author: NNP"""
+
+# Imports
+import csv
+from pathlib import Path, WindowsPath, PosixPath
+from typing import NamedTuple, Iterable, Iterator
+
+from StandardOSILib.osi_functions import revision_key
+from project_functions import get_dwg_number_rev, get_latest_revision
+
+import openpyxl
+
+def write_rows(file_path: Path|WindowsPath|PosixPath, headers: tuple[str], rows: Iterable[tuple]) -> int:
+    """Streams rows to a csv file, or to an excel file if the path ends in .xlsx. Rows are written as they are
+    generated so memory does not grow with the size of the report.
+
+    Args:
+        file_path (Path | WindowsPath | PosixPath): File the rows are written to
+        headers (tuple[str]): Column names written as the first row
+        rows (Iterable[tuple]): Rows to write, can be a generator
+
+    Returns:
+        int: Number of rows written, not counting the headers
+    """
+    count = 0
+    if file_path.suffix.lower() == ".xlsx":
+        wb = openpyxl.Workbook(write_only=True)     # Write only mode streams rows to disk
+        ws = wb.create_sheet()
+        ws.append(headers)
+        for row in rows:
+            ws.append([str(value) if isinstance(value, Path) else value for value in row])
+            count += 1
+        wb.save(file_path)
+    else:
+        with open(file_path, "w", newline="") as csv_file:
+            csv_writer = csv.writer(csv_file)
+            csv_writer.writerow(headers)
+            for row in rows:
+                csv_writer.writerow(row)
+                count += 1
+    return count
+
+TABLE_HEADERS = ("Drawing Number", "Revision", "Folder", "Location")
+
+def get_file_table_rows(file_table: dict[str, list[Path]]) -> Iterator[tuple[str, str, Path, Path]]:
+    """Yields a row for every production copy in the file table in drawing number order"""
+    for dwg_number in sorted(file_table.keys()):
+        for location in file_table[dwg_number]:
+            yield dwg_number, get_dwg_number_rev(location)[1], location.parent, location
+
+REVISION_HEADERS = ("Drawing Number", "Revision", "Latest", "Location")
+
+def get_revision_rows(revision_index: dict[str, dict[str, Path]]) -> Iterator[tuple[str, str, bool, Path]]:
+    """Yields a row for every revision in the revision index in drawing number and revision order"""
+    for dwg_number in sorted(revision_index.keys()):
+        revisions = revision_index[dwg_number]
+        latest = get_latest_revision(revisions)[0]
+        for rev in sorted(revisions.keys(), key=revision_key):
+            yield dwg_number, rev, rev == latest, revisions[rev]
+
+class StaleLocation(NamedTuple):
+    dwg_number: str
+    folder: Path
+    location: Path
+    current_revision: str
+    latest_revision: str
+
+STALE_HEADERS = ("Drawing Number", "Folder", "Location", "Current Revision", "Latest Revision")
+
+def get_stale_locations(file_table: dict[str, list[Path]],
+                        revision_index: dict[str, dict[str, Path]]) -> Iterator[StaleLocation]:
+    """Joins the file table with the revision index in one pass and yields every production copy whose revision
+    is older than the latest revision in the engineering directory. Nothing is read from the drive.
+
+    Args:
+        file_table (dict[str, list[Path]]): File table of the production copies
+        revision_index (dict[str, dict[str, Path]]): Revision index returned by build_revision_index
+
+    Yields:
+        Iterator[StaleLocation]: Stale production copies in drawing number order
+    """
+    for dwg_number in sorted(file_table.keys()):
+        latest = get_latest_revision(revision_index.get(dwg_number))
+        if latest is None:      # Drawing is not in the engineering directory
+            continue
+        latest_rev = latest[0]
+        for location in file_table[dwg_number]:
+            current_rev = get_dwg_number_rev(location)[1]
+            if revision_key(current_rev) < revision_key(latest_rev):
+                yield StaleLocation(dwg_number, location.parent, location, current_rev, latest_rev)
+
+FOLDER_HEADERS = ("Folder", "Stale Copies", "Drawing Numbers")
+
+def summarize_by_folder(stale_locations: Iterable[StaleLocation]) -> Iterator[tuple[Path, int, str]]:
+    """Groups stale production copies by their folder, yields rows of folder, stale copies, and drawing numbers"""
+    folders: dict[Path, list[str]] = dict()
+    for stale in stale_locations:
+        folders.setdefault(stale.folder, list()).append(stale.dwg_number)
+    for folder in sorted(folders.keys()):
+        yield folder, folders[folder].__len__(), " ".join(sorted(set(folders[folder])))
+
+FAMILY_HEADERS = ("Product Family", "Drawings", "Copies", "Stale Copies")
+
+class TableChange(NamedTuple):
+    change: str         # ADDED, REMOVED, MOVED, REVISED, or RENAMED
+    dwg_number: str
+    old_location: Path|None
+    new_location: Path|None
+    old_revision: str
+    new_revision: str
+
+CHANGE_HEADERS = ("Change", "Drawing Number", "Old Location", "New Location", "Old Revision", "New Revision")
+
+def diff_file_tables(old_table: dict[str, list[Path]], new_table: dict[str, list[Path]]) -> Iterator[TableChange]:
+    """Compares two file tables in one pass over the drawing numbers and yields every location that changed.
+    Copies in the same folder are compared by revision, a copy that left one folder and appeared in another
+    is reported as moved.
+
+    Args:
+        old_table (dict[str, list[Path]]): File table before the changes
+        new_table (dict[str, list[Path]]): File table after the changes
+
+    Yields:
+        Iterator[TableChange]: Changes in drawing number order
+    """
+    def _by_folder(locations: list[Path]) -> dict[Path, list[Path]]:
+        folders: dict[Path, list[Path]] = dict()
+        for location in locations:
+            folders.setdefault(location.parent, list()).append(location)
+        return folders
+    
+    def _rev(location: Path) -> str:
+        return get_dwg_number_rev(location)[1]
+    
+    for dwg_number in sorted(old_table.keys() | new_table.keys()):
+        old_locations = old_table.get(dwg_number, list())
+        new_locations = new_table.get(dwg_number, list())
+        if old_locations == new_locations:
+            continue
+        old_folders = _by_folder(old_locations)
+        new_folders = _by_folder(new_locations)
+        removed: list[Path] = list()
+        added: list[Path] = list()
+        
+        for folder in sorted(old_folders.keys() | new_folders.keys()):
+            old_files = [file for file in old_folders.get(folder, list()) if file not in new_folders.get(folder, list())]
+            new_files = [file for file in new_folders.get(folder, list()) if file not in old_folders.get(folder, list())]
+            # Copies replaced in the same folder are revised, or renamed if only the index changed
+            for old_file, new_file in zip(old_files, new_files):
+                change = "REVISED" if _rev(old_file) != _rev(new_file) else "RENAMED"
+                yield TableChange(change, dwg_number, old_file, new_file, _rev(old_file), _rev(new_file))
+            removed.extend(old_files[new_files.__len__():])
+            added.extend(new_files[old_files.__len__():])
+        
+        for old_file, new_file in zip(removed, added):
+            yield TableChange("MOVED", dwg_number, old_file, new_file, _rev(old_file), _rev(new_file))
+        for old_file in removed[added.__len__():]:
+            yield TableChange("REMOVED", dwg_number, old_file, None, _rev(old_file), "")
+        for new_file in added[removed.__len__():]:
+            yield TableChange("ADDED", dwg_number, None, new_file, "", _rev(new_file))
@@ -0,0 +1,150 @@
+"""Functions for finding drawings by the text in their pdfs, such as title block descriptions and materials
+    Author: NNP"""
+
+# Imports
+import re
+from math import log
+from heapq import nlargest
+from operator import itemgetter
+from pathlib import Path, WindowsPath, PosixPath
+from typing import NamedTuple
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from StandardOSILib.osi_functions import osi_file_load, osi_file_store
+from StandardOSILib.osi_directory_append import PREFIX_LOOKUP_TABLE
+from StandardOSILib.osi_filesystem import get_filesystem
+from StandardOSILib.osi_trace import traced, trace_count
+from project_functions import get_dwg_number_rev
+from project_data import PROJDATA, PRODUCTION_ROOTS
+from PyPDF2 import PdfReader
+
+TERM_REGEX = re.compile(r"[A-Z0-9]+(?:[.\-/][A-Z0-9]+)*")   # Keeps part numbers, sizes, and decimals in one term
+
+def get_terms(text: str) -> list[str]:
+    """Splits text into upper case search terms, single characters are dropped"""
+    return [term for term in TERM_REGEX.findall(text.upper()) if term.__len__() > 1]
+
+def read_pdf_terms(file: Path|WindowsPath|PosixPath) -> dict[str, int]:
+    """Returns how many times each term is in the text of every page of the pdf, safe to run on a process pool.
+    Pdfs that cannot be read have no terms"""
+    try:
+        pdf_reader = PdfReader(file)
+        text = "\n".join(page.extract_text() for page in pdf_reader.pages)
+    except Exception as error:     # PyPDF2 raises many error types on damaged or encrypted drawings
+        print(f"Could not read text from {file}: {error}")
+        return dict()
+    return dict(Counter(get_terms(text)))
+
+class SearchResult(NamedTuple):
+    score: float
+    dwg_number: str|None
+    location: Path
+
+class TextIndex():
+    """ Inverted index of the text in every drawing pdf under the roots. Each pdf is stored with its size and
+        modified time so a refresh only reads new and changed pdfs """
+
+    def _is_pdf(self, file_name: str) -> bool:
+        return file_name[file_name.__len__()-4:].lower() == ".pdf"
+
+    def _stat_pdf(self, file: Path) -> tuple[int, int]|None:
+        try:
+            file_stat = get_filesystem().stat(file)
+        except FileNotFoundError:   # Removed since the walk
+            return None
+        return file_stat.size, file_stat.mtime_ns
+
+    def _add_document(self, file: Path, terms: dict[str, int]):
+        for term, count in terms.items():
+            self.postings.setdefault(term, dict())[file] = count
+
+    def _remove_document(self, file: Path):
+        for term in self.documents.pop(file)[2]:
+            postings = self.postings[term]
+            postings.pop(file, None)
+            if not postings:
+                del self.postings[term]
+
+    @traced("TextIndex.refresh")
+    def refresh(self) -> list[Path]:
+        """Walks the roots and reads the text of pdfs that are new or changed on a process pool, pdfs that were
+        removed are dropped from the index.
+
+        Returns:
+            list[Path]: Pdfs that were read
+        """
+        # Find every pdf, network stats are run concurrently
+        files: list[Path] = list()
+        for root in self.roots:
+            for folder, dirs, file_names in get_filesystem().walk(root):
+                files.extend(folder.joinpath(name) for name in file_names if self._is_pdf(name))
+        with ThreadPoolExecutor() as executor:
+            file_stats = dict(zip(files, executor.map(self._stat_pdf, files)))
+
+        # Drop pdfs that were removed, then find the ones that changed
+        for file in [file for file in self.documents if file_stats.get(file) is None]:
+            self._remove_document(file)
+        changed = [file for file, file_stat in file_stats.items()
+                   if file_stat is not None and self.documents.get(file, (None, None))[:2] != file_stat]
+
+        # Read the changed pdfs across all cores
+        if changed:
+            with ProcessPoolExecutor() as executor:
+                for file, terms in zip(changed, executor.map(read_pdf_terms, changed, chunksize=16)):
+                    if file in self.documents:
+                        self._remove_document(file)
+                    self.documents[file] = (*file_stats[file], terms)
+                    self._add_document(file, terms)
+        trace_count("pdfs_opened", changed.__len__())
+        return changed
+
+    def search(self, query: str, limit: int = 20) -> list[SearchResult]:
+        """Ranks the pdfs by how well they match every term in the query. Each term is weighted by how rare it
+        is across all pdfs, so a material or description outranks words in every title block.
+
+        Args:
+            query (str): Words to find, E.G. "304 STAINLESS BRACKET"
+            limit (int, optional): Most results returned. Defaults to 20.
+
+        Returns:
+            list[SearchResult]: Best match first
+        """
+        scores: dict[Path, float] = dict()
+        document_count = self.documents.__len__()
+        for term in set(get_terms(query)):
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            idf = log(1 + document_count / postings.__len__())
+            for file, count in postings.items():
+                scores[file] = scores.get(file, 0) + (1 + log(count)) * idf
+
+        best = nlargest(limit, scores.items(), key=itemgetter(1))
+        results: list[SearchResult] = list()
+        for file, score in best:
+            dwg_number_rev = get_dwg_number_rev(file)
+            results.append(SearchResult(round(score, 3), None if dwg_number_rev is None else dwg_number_rev[0], file))
+        return results
+
+    def store(self):
+        osi_file_store((self.roots, self.documents), self.index_path)
+
+    def __init__(self, roots: tuple[Path] = None, index_path: Path = PROJDATA.TEXT_INDEX):
+        if roots is None:
+            roots = (*PRODUCTION_ROOTS, *dict.fromkeys(PREFIX_LOOKUP_TABLE.values()))
+        self.roots = tuple(roots)
+        self.index_path = index_path
+        self.documents: dict[Path, tuple[int, int, dict[str, int]]] = dict()   # Pdf is key, size, mtime, and term counts is value
+        self.postings: dict[str, dict[Path, int]] = dict()                      # Term is key, count in each pdf is value
+
+        # Only the documents are stored, the postings are rebuilt from them. An index of other roots is not reused
+        try:
+            stored_roots, documents = osi_file_load(index_path)
+            if stored_roots == self.roots:
+                self.documents = documents
+        except (FileNotFoundError, EOFError):
+            pass
+        for file, (size, mtime, terms) in self.documents.items():
+            self._add_document(file, terms)
+        self.refresh()
@@ -1,5 +1,4 @@
 from ttkbootstrap.dialogs import Querybox
-import ttkbootstrap as tk
 from os import mkdir
 from project_data import PROJDIR
 
@@ -0,0 +1,18 @@
+"""Points the project at a stand in drive with its own config files before any project module is imported, the
+tests never touch the engineering drive"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+DRIVE = Path(tempfile.mkdtemp(prefix="osi-test-drive-"))
+CONFIG = DRIVE.joinpath("PROGRAMS/DirectoryProject/config")
+CONFIG.mkdir(parents=True)
+CONFIG.joinpath("StandardDrawingPrefixes.csv").write_text("0,FP,5\n1,MSA,4\n2,C,4\n")
+CONFIG.joinpath("ConfigDrawingPrefixes.csv").write_text("")
+CONFIG.joinpath("ProductLines.csv").write_text("Oil Water Seperators,CoolSkim,SkimPro\nBelt Skimmers,Tube Skimmer\n")
+os.environ["OSI_DRIVE"] = str(DRIVE)
+os.environ.pop("OSI_INDEX_SERVICE", None)
+os.environ.pop("OSI_TRACE", None)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,55 @@
+"""Checking production copies and backups against the engineering drawings they were copied from"""
+
+import os
+from pathlib import Path
+
+from audit_functions import ReadLimiter, HashCache, audit_files, get_backup_files
+
+class CountingHashCache(HashCache):
+    def _hash_file(self, file: Path) -> str:
+        self.hashed.append(file)
+        return super()._hash_file(file)
+
+    def __init__(self, limiter: ReadLimiter, cache_path: Path):
+        self.hashed: list[Path] = list()
+        super().__init__(limiter, cache_path)
+
+def test_every_problem_is_reported(tmp_path: Path):
+    engineering = tmp_path.joinpath("ENGINEERING")
+    production = tmp_path.joinpath("PRODUCTION")
+    engineering.mkdir()
+    production.mkdir()
+    masters = {"FP-00001": b"abcd", "FP-00002": b"abcd", "FP-00003": b"xyz", "FP-00004": b"abcd", "FP-00006": b"abcd"}
+    copies = {"001-FP-00001-A.pdf": b"abcd", "002-FP-00002-A.pdf": b"abce", "003-FP-00003-A.pdf": b"xy",
+              "005-FP-00005-B.pdf": b"abcd", "006-FP-00006-A.pdf": b"abcd"}
+    for dwg, data in masters.items():
+        engineering.joinpath(f"{dwg}-A.pdf").write_bytes(data)
+    for name, data in copies.items():
+        production.joinpath(name).write_bytes(data)
+    revision_index = {dwg: {"A": engineering.joinpath(f"{dwg}-A.pdf")} for dwg in masters}
+    engineering.joinpath("FP-00006-A.pdf").unlink()     # Removed after the revision index was built
+    locations = [production.joinpath(name) for name in copies] + [production.joinpath("004-FP-00004-A.pdf")]
+
+    hash_cache = CountingHashCache(ReadLimiter(), tmp_path.joinpath("hash_cache.pickle"))
+    results = list(audit_files(locations, revision_index, hash_cache, max_workers=2))
+    assert sorted((result.status, result.dwg_number) for result in results) == [
+        ("MISMATCH", "FP-00002"), ("MISSING", "FP-00004"), ("ORPHAN", "FP-00005"), ("ORPHAN", "FP-00006"),
+        ("TRUNCATED", "FP-00003")]
+    assert sorted(file.name for file in hash_cache.hashed) == [
+        "001-FP-00001-A.pdf", "002-FP-00002-A.pdf", "FP-00001-A.pdf", "FP-00002-A.pdf"]    # Only matching sizes are hashed
+    hash_cache.store()
+
+    hash_cache = CountingHashCache(ReadLimiter(), tmp_path.joinpath("hash_cache.pickle"))
+    fixed = production.joinpath("002-FP-00002-A.pdf")
+    modified = fixed.stat().st_mtime_ns
+    fixed.write_bytes(b"abcd")
+    os.utime(fixed, ns=(modified + 10**9, modified + 10**9))     # Same size, only the modified time shows the change
+    results = list(audit_files(locations, revision_index, hash_cache, max_workers=2))
+    assert ("MISMATCH", "FP-00002") not in [(result.status, result.dwg_number) for result in results]
+    assert [file.name for file in hash_cache.hashed] == ["002-FP-00002-A.pdf"]     # The rest come from the cache
+
+def test_backup_files_are_drawings_only(tmp_path: Path):
+    tmp_path.joinpath("001-FP-00001-A.pdf").write_bytes(b"")
+    tmp_path.joinpath("notes.txt").write_bytes(b"")
+    tmp_path.joinpath("FP-00002-A").mkdir()
+    assert get_backup_files(tmp_path) == [tmp_path.joinpath("001-FP-00001-A.pdf")]
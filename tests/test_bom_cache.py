@@ -0,0 +1,49 @@
+"""Drawings that cannot be read do not stop the BOM cache"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import bom_functions
+from StandardOSILib.osi_functions import osi_file_load, osi_file_store
+from bom_functions import BomCache, get_bom_part_numbers_cached
+
+def test_unreadable_drawings_are_cached_empty(tmp_path: Path, capsys):
+    empty = tmp_path.joinpath("FP-00001-A.pdf")
+    empty.write_bytes(b"")
+    damaged = tmp_path.joinpath("FP-00002-A.pdf")
+    damaged.write_bytes(b"%PDF-1.4 not a pdf")
+    missing = tmp_path.joinpath("FP-00003-A.pdf")
+    cache_path = tmp_path.joinpath("bom_cache.pickle")
+    with ThreadPoolExecutor() as executor:
+        bom_part_numbers = get_bom_part_numbers_cached([empty, damaged, missing], cache_path, executor)
+    assert bom_part_numbers == {empty: [], damaged: [], missing: []}
+    assert "2 drawings could not be read" in capsys.readouterr().out
+    entries = osi_file_load(cache_path)["entries"]
+    assert entries[empty][2] == [] and entries[damaged][2] == []
+    assert missing not in entries
+
+def test_cache_is_read_once_and_stored_when_changed(tmp_path: Path, monkeypatch):
+    drawing = tmp_path.joinpath("FP-00001-A.pdf")
+    drawing.write_bytes(b"")
+    cache_path = tmp_path.joinpath("bom_cache.pickle")
+    read_files: list[Path] = list()
+    stored: list[Path] = list()
+    monkeypatch.setattr(bom_functions, "read_bom_part_numbers", lambda file: read_files.append(file) or ["FP-00002"])
+    monkeypatch.setattr(bom_functions, "osi_file_store", lambda data, path: stored.append(path) or osi_file_store(data, path))
+    
+    with ThreadPoolExecutor() as executor:
+        bom_cache = BomCache(cache_path)
+        assert bom_cache.get_part_numbers([drawing], executor) == {drawing: ["FP-00002"]}
+        assert bom_cache.get_part_numbers([drawing], executor) == {drawing: ["FP-00002"]}   # Next level of an explosion
+        bom_cache.store()
+        assert read_files == [drawing] and stored == [cache_path]
+        
+        bom_cache = BomCache(cache_path)
+        assert bom_cache.get_part_numbers([drawing], executor) == {drawing: ["FP-00002"]}
+        bom_cache.store()
+        assert read_files == [drawing] and stored == [cache_path]     # Nothing changed, nothing is stored
+        
+        drawing.write_bytes(b"changed")
+        assert bom_cache.get_part_numbers([drawing], executor) == {drawing: ["FP-00002"]}
+        bom_cache.store()
+        assert read_files == [drawing, drawing] and stored == [cache_path, cache_path]
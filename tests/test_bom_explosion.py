@@ -0,0 +1,39 @@
+"""Exploding the bill of materials of an assembly into every drawing it uses"""
+
+from pathlib import Path
+
+import pytest
+
+import bom_functions
+from benchmarks.generate_tree import make_pdf, bom_page
+from bom_functions import explode_bom, build_kit_folder
+
+@pytest.fixture
+def engineering(tmp_path: Path, monkeypatch) -> Path:
+    """MSA-0001 uses FP-00001, MSA-0002 and FP-00009 which has no drawing, MSA-0002 uses FP-00001 and FP-00002"""
+    engineering = tmp_path.joinpath("ENGINEERING")
+    engineering.mkdir()
+    for dwg, rev, children in (("MSA-0001", "A", ["FP-00001", "MSA-0002", "FP-00009"]),
+                               ("MSA-0002", "A", ["FP-00003"]),      # Older revision, not followed
+                               ("MSA-0002", "B", ["FP-00001", "FP-00002"]),
+                               ("FP-00001", "A", []), ("FP-00002", "C", [])):
+        engineering.joinpath(f"{dwg}-{rev}.pdf").write_bytes(make_pdf([bom_page(dwg, rev, children)]))
+    monkeypatch.setattr(bom_functions, "PREFIX_LOOKUP_TABLE", {"MSA": engineering, "FP": engineering})
+    return engineering
+
+def test_every_drawing_is_found_once(engineering: Path, tmp_path: Path):
+    explosion = explode_bom(engineering.joinpath("MSA-0001-A.pdf"), tmp_path.joinpath("bom_cache.pickle"))
+    assert explosion.top_drawing == "MSA-0001"
+    assert explosion.children == {"MSA-0001": ["FP-00001", "MSA-0002", "FP-00009"], "FP-00001": [],
+                                  "MSA-0002": ["FP-00001", "FP-00002"], "FP-00002": []}
+    assert explosion.drawings["MSA-0002"] == engineering.joinpath("MSA-0002-B.pdf")
+    assert explosion.order == ["MSA-0001", "FP-00001", "MSA-0002", "FP-00002"]
+    assert explosion.missing == ["FP-00009"]
+
+    kit = build_kit_folder(explosion, tmp_path.joinpath("KIT"))
+    assert [path.name for path in kit] == ["001-MSA-0001-A.pdf", "002-FP-00001-A.pdf", "003-MSA-0002-B.pdf", "004-FP-00002-C.pdf"]
+
+def test_assembly_that_contains_itself(engineering: Path, tmp_path: Path):
+    engineering.joinpath("MSA-0002-C.pdf").write_bytes(make_pdf([bom_page("MSA-0002", "C", ["MSA-0001"])]))
+    with pytest.raises(ValueError, match="MSA-0001 -> MSA-0002 -> MSA-0001"):
+        explode_bom(engineering.joinpath("MSA-0001-A.pdf"), tmp_path.joinpath("bom_cache.pickle"))
@@ -0,0 +1,37 @@
+"""Where used queries from the stored BOM graph, only drawings with a new revision are read again"""
+
+from pathlib import Path
+
+from benchmarks.generate_tree import make_pdf, bom_page
+from bom_functions import BomGraph
+from project_functions import get_revision_index
+
+def write_drawing(engineering: Path, dwg: str, rev: str, children: list[str]):
+    engineering.joinpath(f"{dwg}-{rev}.pdf").write_bytes(make_pdf([bom_page(dwg, rev, children)]))
+
+def test_where_used_follows_new_revisions(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)     # The BOM cache is stored relative to the working directory
+    engineering = tmp_path.joinpath("ENGINEERING")
+    engineering.mkdir()
+    write_drawing(engineering, "MSA-0001", "A", ["FP-00001", "MSA-0002"])
+    write_drawing(engineering, "MSA-0002", "A", ["FP-00001", "FP-00002"])
+    write_drawing(engineering, "FP-00001", "A", [])
+    write_drawing(engineering, "FP-00002", "A", [])
+    graph_path = tmp_path.joinpath("bom_graph.pickle")
+
+    graph = BomGraph(graph_path)
+    assert sorted(graph.update(get_revision_index(engineering))) == ["FP-00001", "FP-00002", "MSA-0001", "MSA-0002"]
+    assert graph.where_used("FP-00001") == {"MSA-0001", "MSA-0002"}
+    assert graph.ecn_impact(["FP-00002"]) == {"FP-00002": {"MSA-0001", "MSA-0002"}}
+    graph.store()
+
+    graph = BomGraph(graph_path)    # The where used index is rebuilt from the stored graph
+    assert graph.update(get_revision_index(engineering)) == []
+    assert graph.where_used("FP-00001") == {"MSA-0001", "MSA-0002"}
+
+    write_drawing(engineering, "MSA-0002", "B", ["FP-00002"])
+    engineering.joinpath("FP-00001-A.pdf").unlink()
+    assert graph.update(get_revision_index(engineering)) == ["MSA-0002"]
+    assert graph.where_used("FP-00001") == {"MSA-0001"}
+    assert graph.ancestry("FP-00002") == {"MSA-0001", "MSA-0002"}
+    assert "FP-00001" not in graph.revisions
@@ -0,0 +1,48 @@
+"""Config reloads, a bad config file or subscriber does not stop the watcher"""
+
+import os
+from pathlib import Path
+from time import sleep
+
+from StandardOSILib.osi_config import ConfigManager
+
+def _write(csv_path: Path, text: bytes, generation: int):
+    csv_path.write_bytes(text)
+    os.utime(csv_path, ns=(generation * 10 ** 9, generation * 10 ** 9))     # Changes the stamp on fast filesystems
+
+def _config_files(tmp_path: Path) -> tuple[Path, Path, Path]:
+    standard_csv, config_csv, product_lines_csv = (tmp_path.joinpath(name) for name in ("standard.csv", "config.csv", "lines.csv"))
+    _write(standard_csv, b"0,FP,5\n", 1)
+    _write(config_csv, b"", 1)
+    _write(product_lines_csv, b"Belt Skimmers,Tube Skimmer\n", 1)
+    return standard_csv, config_csv, product_lines_csv
+
+def test_failing_subscriber_does_not_stop_the_others(tmp_path: Path):
+    standard_csv, config_csv, product_lines_csv = _config_files(tmp_path)
+    manager = ConfigManager(standard_csv, config_csv, product_lines_csv)
+    reloads = list()
+    manager.subscribe(lambda old, new: 1 / 0)
+    manager.subscribe(lambda old, new: reloads.append(new.generation))
+    _write(standard_csv, b"0,FP,5\n1,MSA,4\n", 2)
+    assert manager.check()
+    assert reloads == [1]
+    assert manager.config.part_num_pattern.search("MSA-0001")
+
+def test_watcher_survives_a_file_that_cannot_be_decoded(tmp_path: Path):
+    standard_csv, config_csv, product_lines_csv = _config_files(tmp_path)
+    manager = ConfigManager(standard_csv, config_csv, product_lines_csv)
+    manager.subscribe(lambda old, new: 1 / 0)
+    watcher = manager.watch(interval=0.01)
+    try:
+        _write(product_lines_csv, b"Belt Skimmers,\xff\xfe\n", 2)
+        sleep(0.1)
+        assert watcher.is_alive() and manager.config.generation == 0
+        _write(product_lines_csv, b"Belt Skimmers,Tube Skimmer,Mini Skimmer\n", 3)
+        for _ in range(100):
+            if manager.config.generation:
+                break
+            sleep(0.01)
+        assert watcher.is_alive()
+        assert manager.config.prod_families["Belt Skimmers"] == ["Tube Skimmer", "Mini Skimmer"]
+    finally:
+        manager.stop()
@@ -0,0 +1,60 @@
+"""Updating a list of drawings without any input, every entry is checked before any file is replaced"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+import main_console
+from main_console import run_batch
+from project_data import PROJDATA, PROJDIR
+from project_functions import FileTable
+
+@pytest.fixture
+def drive(tmp_path: Path, monkeypatch):
+    """A production folder with two indexed copies of FP-00001 and one of FP-00002, and their revisions"""
+    monkeypatch.chdir(tmp_path)     # The file table is stored relative to the working directory
+    folder = tmp_path.joinpath("PRODUCTION", "WI-001")
+    folder.mkdir(parents=True)
+    for name in ("001-FP-00001-A.pdf", "002-FP-00001-A.pdf", "003-FP-00002-A.pdf"):
+        folder.joinpath(name).write_bytes(b"old")
+    engineering = tmp_path.joinpath("FABRICATED PARTS")
+    engineering.mkdir()
+    for name in ("FP-00001-A.pdf", "FP-00001-B.pdf", "FP-00002-A.pdf", "FP-00002-C.pdf"):
+        engineering.joinpath(name).write_bytes(name.encode())
+    backup = tmp_path.joinpath("BACKUP")
+    backup.mkdir()
+    monkeypatch.setattr(main_console, "PREFIX_LOOKUP_TABLE", {"FP": engineering})
+    monkeypatch.setattr(PROJDIR, "BACKUP", backup)
+    FileTable(tmp_path.joinpath("PRODUCTION"), PROJDATA.FILE_TABLE, use_service=False).commit(overwrite=True)
+    return folder
+
+def run(tmp_path: Path, rows: str) -> tuple[int, list[dict]]:
+    tmp_path.joinpath("batch.csv").write_text(rows)
+    code = run_batch(str(tmp_path.joinpath("batch.csv")), tmp_path.joinpath("result.json"))
+    return code, json.loads(tmp_path.joinpath("result.json").read_text())
+
+def test_batch_keeps_the_index_of_every_copy(drive: Path, tmp_path: Path):
+    code, results = run(tmp_path, "FP-00001,B\nFP-00002,latest\n")
+    assert code == 0
+    assert [(result["drawing"], result["revision"], result["status"]) for result in results] == [
+        ("FP-00001", "B", "updated"), ("FP-00002", "C", "updated")]
+    assert sorted(path.name for path in drive.iterdir()) == ["001-FP-00001-B.pdf", "002-FP-00001-B.pdf", "003-FP-00002-C.pdf"]
+    assert drive.joinpath("002-FP-00001-B.pdf").read_bytes() == b"FP-00001-B.pdf"
+    assert sorted(FileTable().file_table["FP-00001"]) == [drive.joinpath("001-FP-00001-B.pdf"), drive.joinpath("002-FP-00001-B.pdf")]
+
+def test_invalid_entry_replaces_nothing(drive: Path, tmp_path: Path):
+    code, results = run(tmp_path, "FP-00001,B\nFP-00002,Z\nFP-00003,A\n")
+    assert code == 1
+    assert [(result["status"], result.get("error")) for result in results] == [
+        ("skipped", None), ("error", "Revision not Available"), ("error", "Drawing not in Production Drive")]
+    assert sorted(path.name for path in drive.iterdir()) == ["001-FP-00001-A.pdf", "002-FP-00001-A.pdf", "003-FP-00002-A.pdf"]
+
+def test_copies_replaced_by_the_same_file_are_rejected(drive: Path, tmp_path: Path):
+    drive.joinpath("FP-00002-A.pdf").write_bytes(b"old")      # Copies without an index both become FP-00002-C.pdf
+    drive.joinpath("FP-00002-B.pdf").write_bytes(b"old")
+    FileTable(tmp_path.joinpath("PRODUCTION"), PROJDATA.FILE_TABLE, use_service=False).commit(overwrite=True)
+    code, results = run(tmp_path, "FP-00002,C\n")
+    assert code == 1
+    assert results[0]["error"] == "Copies of the drawing would be replaced by the same file"
+    assert not drive.joinpath("FP-00002-C.pdf").exists()
@@ -0,0 +1,51 @@
+"""ECN workbooks that cannot be read do not stop the ECN index"""
+
+from pathlib import Path
+
+import openpyxl
+
+from ecn_functions import EcnIndex
+
+def _write_ecn(ecn_root: Path, ecn_name: str, sheet: str) -> Path:
+    ecn_folder = ecn_root.joinpath(ecn_name)
+    ecn_folder.joinpath("Updated Drawings").mkdir(parents=True)
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = sheet
+    ws.append(["ENGINEERING CHANGE NOTICE", ecn_name])
+    ws.append([])
+    ws.append(["Level 0"])
+    ws.append(["FP-00001"] + [None] * 10 + ["-B", "Running Change"])
+    workbook = ecn_folder.joinpath(ecn_name + ".xlsx")
+    wb.save(workbook)
+    return workbook
+
+def test_bad_workbook_is_recorded(tmp_path: Path):
+    ecn_root = tmp_path.joinpath("ECN")
+    _write_ecn(ecn_root, "ECN-00001", "Bill of Materials")
+    _write_ecn(ecn_root, "ECN-00002", "Sheet1")         # No BOM sheet
+    ecn_root.joinpath("ECN-00003").mkdir()
+    ecn_root.joinpath("ECN-00003", "ECN-00003.xlsx").write_bytes(b"")
+    ecn_index = EcnIndex(ecn_root, tmp_path.joinpath("ecn_index.pickle"))
+    assert [history.ecn_name for history in ecn_index.get_drawing_history("FP-00001")] == ["ECN-00001"]
+    assert sorted(ecn_index.ecn_errors.keys()) == ["ECN-00002", "ECN-00003"]
+    assert ecn_index.ecn_errors["ECN-00002"].startswith("KeyError")
+    assert ecn_index.get_ecn("00002").ecn_name == "ECN-00002"
+
+    _write_ecn(ecn_root.joinpath("fixed"), "ECN-00002", "Bill of Materials").replace(
+        ecn_root.joinpath("ECN-00002", "ECN-00002.xlsx"))
+    assert ecn_index.refresh() == ["ECN-00002", "ECN-00003"]
+    assert sorted(ecn_index.ecn_errors.keys()) == ["ECN-00003"]
+
+def test_changes_after_a_long_gap_are_read(tmp_path: Path):
+    ecn_root = tmp_path.joinpath("ECN")
+    workbook = _write_ecn(ecn_root, "ECN-00001", "Bill of Materials")
+    wb = openpyxl.load_workbook(workbook)
+    wb["Bill of Materials"]["B30"] = "FP-00002"
+    wb["Bill of Materials"]["L30"] = "-C"
+    wb["Bill of Materials"]["M30"] = "Use As Is"
+    wb.save(workbook)
+    ecn_index = EcnIndex(ecn_root, tmp_path.joinpath("ecn_index.pickle"))
+    changes = ecn_index.read_ecn_changes("ECN-00001")
+    assert [(change.level, change.dwg_number, change.new_revision) for change in changes] == [(0, "FP-00001", "B"), (1, "FP-00002", "C")]
+    assert ecn_index.read_ecn_changes("ECN-00001") == changes
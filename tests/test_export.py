@@ -0,0 +1,42 @@
+"""Streaming the file table and the revision index to csv and excel"""
+
+import csv
+from pathlib import Path
+
+import openpyxl
+import pytest
+
+from report_functions import write_rows, get_file_table_rows, get_revision_rows, TABLE_HEADERS, REVISION_HEADERS
+
+FOLDER = Path("CS-500/WI-001")
+FILE_TABLE = {
+    "MSA-0001": [FOLDER.joinpath("002-MSA-0001-B.pdf")],
+    "FP-00001": [FOLDER.joinpath("001-FP-00001-A.pdf"), FOLDER.joinpath("003-FP-00001-A.pdf")],
+}
+
+def test_file_table_to_csv(tmp_path: Path):
+    output = tmp_path.joinpath("file_table.csv")
+    assert write_rows(output, TABLE_HEADERS, get_file_table_rows(FILE_TABLE)) == 3
+    with open(output, newline="") as csv_file:
+        rows = list(csv.reader(csv_file))
+    assert rows == [
+        list(TABLE_HEADERS),
+        ["FP-00001", "A", str(FOLDER), str(FOLDER.joinpath("001-FP-00001-A.pdf"))],
+        ["FP-00001", "A", str(FOLDER), str(FOLDER.joinpath("003-FP-00001-A.pdf"))],
+        ["MSA-0001", "B", str(FOLDER), str(FOLDER.joinpath("002-MSA-0001-B.pdf"))],
+    ]
+
+def test_revisions_to_excel(tmp_path: Path):
+    revision_index = {"FP-00001": {"B": Path("FP-00001-B.pdf"), "A": Path("FP-00001-A.pdf")}}
+    output = tmp_path.joinpath("revisions.xlsx")
+    assert write_rows(output, REVISION_HEADERS, get_revision_rows(revision_index)) == 2
+    rows = list(openpyxl.load_workbook(output).active.iter_rows(values_only=True))
+    assert rows == [REVISION_HEADERS, ("FP-00001", "A", False, "FP-00001-A.pdf"), ("FP-00001", "B", True, "FP-00001-B.pdf")]
+
+def test_rows_are_streamed(tmp_path: Path):
+    def rows():
+        yield "FP-00001", "A", FOLDER, FOLDER.joinpath("001-FP-00001-A.pdf")
+        raise RuntimeError("stopped")
+    with pytest.raises(RuntimeError):
+        write_rows(tmp_path.joinpath("file_table.csv"), TABLE_HEADERS, rows())
+    assert "001-FP-00001-A.pdf" in tmp_path.joinpath("file_table.csv").read_text()   # Written before the generator failed
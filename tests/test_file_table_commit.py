@@ -0,0 +1,87 @@
+"""Storing the file table when several programs change it at once, and the lock that keeps their writes apart"""
+
+import os
+from pathlib import Path
+from time import time
+
+import pytest
+
+from StandardOSILib.osi_functions import osi_file_load, osi_file_lock
+from project_functions import FileTable
+
+@pytest.fixture
+def table_path(tmp_path: Path) -> Path:
+    """A table file holding two drawings in one folder, built from the drive"""
+    root = tmp_path.joinpath("CS-500", "WI-001")
+    root.mkdir(parents=True)
+    root.joinpath("001-FP-00001-A.pdf").write_bytes(b"")
+    root.joinpath("002-FP-00002-A.pdf").write_bytes(b"")
+    table_path = tmp_path.joinpath("file_table.pickle")
+    FileTable(tmp_path.joinpath("CS-500"), table_path, use_service=False).commit(overwrite=True)
+    return table_path
+
+def stored_table(table_path: Path) -> dict[str, list[Path]]:
+    return osi_file_load(table_path)["file_table"]
+
+def test_tables_loaded_together_merge_their_changes(table_path: Path, tmp_path: Path):
+    first, second = FileTable(table_path=table_path), FileTable(table_path=table_path)
+    assert first.generation == second.generation == 1
+    folder = tmp_path.joinpath("CS-500", "WI-001")
+    first.update_file_table("FP-00001", folder.joinpath("001-FP-00001-A.pdf"), folder.joinpath("001-FP-00001-B.pdf"))
+    first.commit()
+    second.update_file_table("FP-00002", folder.joinpath("002-FP-00002-A.pdf"))
+    second.add_file_table_entry("FP-00003", folder.joinpath("003-FP-00003-A.pdf"))
+    second.commit()
+
+    expected = {"FP-00001": [folder.joinpath("001-FP-00001-B.pdf")], "FP-00003": [folder.joinpath("003-FP-00003-A.pdf")]}
+    assert stored_table(table_path) == expected
+    assert second.file_table == expected
+    assert second.generation == 3
+
+def test_overwrite_replaces_the_stored_table(table_path: Path, tmp_path: Path):
+    first, second = FileTable(table_path=table_path), FileTable(table_path=table_path)
+    folder = tmp_path.joinpath("CS-500", "WI-001")
+    first.add_file_table_entry("FP-00003", folder.joinpath("003-FP-00003-A.pdf"))
+    first.commit()
+    second.update_file_table("FP-00002", folder.joinpath("002-FP-00002-A.pdf"))
+    second.commit(overwrite=True)
+    assert stored_table(table_path) == second.file_table
+    assert "FP-00003" not in second.file_table and not second.file_table["FP-00002"]
+
+def test_missing_table_file(tmp_path: Path, table_path: Path):
+    with pytest.raises(FileNotFoundError):
+        FileTable(table_path=tmp_path.joinpath("missing.pickle"))
+    new_path = tmp_path.joinpath("new.pickle")
+    file_table = FileTable(table_path=table_path)
+    file_table.table_path = new_path
+    file_table.commit()     # Nothing stored yet, the table is stored as it is
+    assert stored_table(new_path) == stored_table(table_path)
+
+def test_damaged_table_file_is_raised_unless_overwritten(table_path: Path):
+    file_table = FileTable(table_path=table_path)
+    table_path.write_bytes(b"")
+    with pytest.raises(EOFError):
+        FileTable(table_path=table_path)
+    with pytest.raises(EOFError):
+        file_table.commit()
+    file_table.commit(overwrite=True)
+    assert stored_table(table_path) == file_table.file_table
+
+def test_held_lock_times_out(tmp_path: Path):
+    file_path = tmp_path.joinpath("file_table.pickle")
+    with osi_file_lock(file_path):
+        with pytest.raises(TimeoutError):
+            with osi_file_lock(file_path, timeout=0.2):
+                pass
+    with osi_file_lock(file_path, timeout=0.2):     # Released by the first holder
+        pass
+    assert not tmp_path.joinpath("file_table.pickle.lock").exists()
+
+def test_stale_lock_is_taken_over(tmp_path: Path):
+    file_path = tmp_path.joinpath("file_table.pickle")
+    lock_path = tmp_path.joinpath("file_table.pickle.lock")
+    lock_path.write_text("1234")    # Left by a program that crashed
+    os.utime(lock_path, (time() - 600, time() - 600))
+    with osi_file_lock(file_path, timeout=0.2, stale=300):
+        assert lock_path.read_text() == str(os.getpid())
+    assert not lock_path.exists()
@@ -0,0 +1,57 @@
+"""Refreshing the stored shard of a production root, only folders that changed are listed again"""
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+import project_functions
+from project_functions import FileTableShard
+
+@pytest.fixture
+def root(tmp_path: Path) -> Path:
+    root = tmp_path.joinpath("CS-500")
+    for folder, name in (("WI-001", "001-FP-00001-A.pdf"), ("WI-001/SUB/DEEP", "001-FP-00002-A.pdf"),
+                         ("WI-002", "001-MSA-0001-A.pdf")):
+        root.joinpath(folder).mkdir(parents=True, exist_ok=True)
+        root.joinpath(folder, name).write_bytes(b"")
+    return root
+
+def refreshed(root: Path, tmp_path: Path) -> tuple[FileTableShard, int]:
+    """Refreshes the shard as it was stored by the last refresh"""
+    shard = FileTableShard(root, tmp_path.joinpath("shards"))
+    return shard, shard.refresh()
+
+def test_change_deep_in_the_tree_is_found(root: Path, tmp_path: Path):
+    shard, rescanned = refreshed(root, tmp_path)
+    assert rescanned == 5       # Every folder is listed the first time
+    root.joinpath("WI-001/SUB/DEEP", "002-FP-00003-A.pdf").write_bytes(b"")
+    shard, rescanned = refreshed(root, tmp_path)
+    assert rescanned == 1
+    assert shard.get_drawings()["FP-00003"] == [root.joinpath("WI-001/SUB/DEEP", "002-FP-00003-A.pdf")]
+
+def test_deleted_folder_drops_its_drawings(root: Path, tmp_path: Path):
+    refreshed(root, tmp_path)
+    shutil.rmtree(root.joinpath("WI-001", "SUB"))
+    shard, rescanned = refreshed(root, tmp_path)
+    assert rescanned == 1       # Only WI-001 changed
+    assert sorted(shard.get_drawings().keys()) == ["FP-00001", "MSA-0001"]
+    assert not any(folder.is_relative_to(root.joinpath("WI-001", "SUB")) for folder in shard.folders)
+
+def test_unchanged_root_is_not_listed_again(root: Path, tmp_path: Path, monkeypatch):
+    shard, rescanned = refreshed(root, tmp_path)
+    drawings = shard.get_drawings()
+    listed: list[Path] = list()
+    filesystem = project_functions.get_filesystem()
+
+    class CountingFileSystem():
+        def __getattr__(self, name):
+            return getattr(filesystem, name)
+        def scandir(self, folder):
+            listed.append(folder)
+            return filesystem.scandir(folder)
+    monkeypatch.setattr(project_functions, "get_filesystem", CountingFileSystem)
+
+    shard, rescanned = refreshed(root, tmp_path)
+    assert rescanned == 0 and listed == []
+    assert shard.get_drawings() == drawings
@@ -0,0 +1,43 @@
+"""Filesystem backends, and drive operations going through get_filesystem"""
+
+from pathlib import Path
+
+import pytest
+
+from StandardOSILib.osi_filesystem import FileSystem, MemoryFileSystem, CachingFileSystem, set_filesystem
+from audit_functions import get_backup_files
+from bom_functions import BomExplosion, build_kit_folder
+
+ENG = Path("/drive/FABRICATED PARTS")
+KIT = Path("/drive/KITS/MSA-0001")
+
+def test_backend_must_implement_every_operation():
+    class ListingOnly(FileSystem):
+        def scandir(self, directory: Path):
+            return iter(())
+    with pytest.raises(TypeError):
+        ListingOnly()
+
+@pytest.fixture
+def cached_drive():
+    memory = MemoryFileSystem()
+    memory.mkdir(ENG, parents=True)
+    memory.write_bytes(ENG.joinpath("MSA-0001-A.pdf"), b"assembly")
+    memory.write_bytes(ENG.joinpath("FP-00001-B.pdf"), b"part")
+    filesystem = CachingFileSystem(memory)
+    previous = set_filesystem(filesystem)
+    yield filesystem
+    set_filesystem(previous)
+
+def test_kit_folder_is_built_through_the_backend(cached_drive: CachingFileSystem):
+    assert not cached_drive.exists(KIT)     # Cached as missing until the kit folder is made
+    explosion = BomExplosion("MSA-0001", {"MSA-0001": ENG.joinpath("MSA-0001-A.pdf"), "FP-00001": ENG.joinpath("FP-00001-B.pdf")},
+                             {"MSA-0001": ["FP-00001"], "FP-00001": []}, ["MSA-0001", "FP-00001"], [])
+    copies = build_kit_folder(explosion, KIT)
+    assert copies == [KIT.joinpath("001-MSA-0001-A.pdf"), KIT.joinpath("002-FP-00001-B.pdf")]
+    assert cached_drive.listdir(KIT) == ["001-MSA-0001-A.pdf", "002-FP-00001-B.pdf"]
+    assert cached_drive.read_bytes(copies[1]) == b"part"
+
+def test_backup_files_are_listed_through_the_backend(cached_drive: CachingFileSystem):
+    cached_drive.write_bytes(ENG.joinpath("~FP-00002-A.pdf.old"), b"held")
+    assert sorted(get_backup_files(ENG)) == [ENG.joinpath("FP-00001-B.pdf"), ENG.joinpath("MSA-0001-A.pdf")]
@@ -0,0 +1,56 @@
+"""Reading only the first page of a drawing pdf for its bill of materials"""
+
+from pathlib import Path
+
+import pytest
+from PyPDF2 import PdfReader
+from PyPDF2.errors import PdfReadError
+
+from benchmarks.generate_tree import make_pdf, bom_page
+from bom_functions import get_first_page, extract_bom_text, get_bom_part_numbers
+
+def make_nested_pdf(pages: list[list[str]]) -> bytes:
+    """Pdf with the pages under a second level of the page tree, the font and page size are only set on the nodes
+    above the pages and are inherited"""
+    page_ids = [4 + i * 2 for i in range(pages.__len__())]
+    font_id = 4 + pages.__len__() * 2
+    objects: list[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [3 0 R] /Count {pages.__len__()} /Resources << /Font << /F1 {font_id} 0 R >> >> >>".encode(),
+        f"<< /Type /Pages /Parent 2 0 R /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {pages.__len__()} "
+        f"/MediaBox [0 0 612 792] >>".encode(),
+    ]
+    for page_id, lines in zip(page_ids, pages):
+        text = "".join(f"BT /F1 9 Tf 36 {756 - i * 12} Td ({line}) Tj ET\n" for i, line in enumerate(lines)).encode()
+        objects.append(f"<< /Type /Page /Parent 3 0 R /Contents {page_id + 1} 0 R >>".encode())
+        objects.append(b"<< /Length " + str(text.__len__()).encode() + b" >>\nstream\n" + text + b"endstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets: list[int] = list()
+    for i, obj in enumerate(objects):
+        offsets.append(pdf.__len__())
+        pdf += f"{i + 1} 0 obj\n".encode() + obj + b"\nendobj\n"
+    xref = pdf.__len__()
+    pdf += f"xref\n0 {objects.__len__() + 1}\n0000000000 65535 f \n".encode()
+    pdf += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    pdf += f"trailer\n<< /Size {objects.__len__() + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(pdf)
+
+SHEETS = [bom_page("MSA-0001", "A", ["FP-00001", "FP-00002"]), ["SHEET 2 DETAIL", "1 FP-00003 NOT IN THE BOM"]]
+
+@pytest.mark.parametrize("pdf", [make_pdf(SHEETS), make_nested_pdf(SHEETS)], ids=["flat", "nested"])
+def test_first_page_matches_the_full_reader(pdf: bytes, tmp_path: Path):
+    file = tmp_path.joinpath("MSA-0001-A.pdf")
+    file.write_bytes(pdf)
+    first_page = get_first_page(PdfReader(file))
+    assert first_page["/MediaBox"] == [0, 0, 612, 792]
+    assert first_page.extract_text() == PdfReader(file).pages[0].extract_text()
+    assert extract_bom_text(file) == PdfReader(file).pages[0].extract_text()
+    assert get_bom_part_numbers(file) == ["FP-00001", "FP-00002"]     # Nothing from the second sheet
+
+def test_pdf_without_pages(tmp_path: Path):
+    file = tmp_path.joinpath("MSA-0001-A.pdf")
+    file.write_bytes(make_nested_pdf([]))
+    with pytest.raises(PdfReadError):
+        extract_bom_text(file)
@@ -0,0 +1,28 @@
+"""Pushing updated drawings to several production roots, each root is all or nothing"""
+
+from pathlib import Path
+
+from ecn_functions import push_to_roots
+from project_functions import FileTable
+
+def test_failed_root_does_not_undo_the_others(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)     # Shards are stored relative to the working directory
+    updated = tmp_path.joinpath("UPDATED")
+    updated.mkdir()
+    updated.joinpath("FP-00001-B.pdf").write_bytes(b"new")
+    roots = (tmp_path.joinpath("CS-500"), tmp_path.joinpath("SKIMPRO"))
+    for root in roots:
+        root.joinpath("WI-001").mkdir(parents=True)
+        root.joinpath("WI-001", "001-FP-00001-A.pdf").write_bytes(b"old")
+        root.joinpath("WI-001", "002-FP-00001-A.pdf").write_bytes(b"old")
+    file_table = FileTable(roots=roots)
+    roots[1].joinpath("WI-001", "002-FP-00001-A.pdf").unlink()      # Removed after the table was built
+    
+    results = push_to_roots({"FP-00001": updated.joinpath("FP-00001-B.pdf")}, file_table, tmp_path.joinpath("BACKUP"))
+    assert [(result.root, result.error is None) for result in results] == [(roots[0], True), (roots[1], False)]
+    assert sorted(path.name for path in roots[0].joinpath("WI-001").iterdir()) == ["001-FP-00001-B.pdf", "002-FP-00001-B.pdf"]
+    assert sorted(path.name for path in roots[1].joinpath("WI-001").iterdir()) == ["001-FP-00001-A.pdf"]
+    assert roots[1].joinpath("WI-001", "001-FP-00001-A.pdf").read_bytes() == b"old"
+    assert sorted(file_table.file_table["FP-00001"]) == sorted([
+        roots[0].joinpath("WI-001", "001-FP-00001-B.pdf"), roots[0].joinpath("WI-001", "002-FP-00001-B.pdf"),
+        roots[1].joinpath("WI-001", "001-FP-00001-A.pdf"), roots[1].joinpath("WI-001", "002-FP-00001-A.pdf")])
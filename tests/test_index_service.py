@@ -0,0 +1,72 @@
+"""Index service and client against a stand in production tree and engineering directory"""
+
+from pathlib import Path
+from threading import Thread
+from urllib.error import HTTPError
+
+import pytest
+
+import project_functions
+from index_client import IndexClient
+from index_service import DrawingIndex, start_index_service
+from project_functions import FileTable, get_available_dwg_revisions
+
+@pytest.fixture
+def service(tmp_path: Path, monkeypatch):
+    production = tmp_path.joinpath("PRODUCTION")
+    production.joinpath("CoolSkim", "WI-001").mkdir(parents=True)
+    production.joinpath("CoolSkim", "WI-001", "001-FP-00001-A.pdf").write_bytes(b"")
+    production.joinpath("CoolSkim", "WI-001", "002-MSA-0001-B.pdf").write_bytes(b"")
+    engineering = tmp_path.joinpath("FABRICATED PARTS")
+    engineering.mkdir()
+    engineering.joinpath("FP-00001-A.pdf").write_bytes(b"")
+    engineering.joinpath("FP-00001-B.pdf").write_bytes(b"")
+    
+    index = DrawingIndex([production], [engineering])
+    server = start_index_service(index, port=0)
+    Thread(target=server.serve_forever, daemon=True).start()
+    client = IndexClient(f"http://127.0.0.1:{server.server_port}")
+    client.roots = [Path(root) for root in client._get("/health")["roots"]]
+    monkeypatch.setattr(project_functions, "get_index_client", lambda: client)
+    yield index, client, production, engineering
+    server.shutdown()
+    server.server_close()
+
+def test_lookup_and_search(service):
+    index, client, production, engineering = service
+    result = client.lookup("FP-00001")
+    assert result["locations"] == [production.joinpath("CoolSkim", "WI-001", "001-FP-00001-A.pdf")]
+    assert result["revisions"] == {"A": engineering.joinpath("FP-00001-A.pdf"), "B": engineering.joinpath("FP-00001-B.pdf")}
+    assert client.search("msa") == ["MSA-0001"]
+    assert client.search("-0", limit=1) == ["FP-00001"]
+
+def test_bad_search_limit_is_a_client_error(service):
+    index, client, production, engineering = service
+    with pytest.raises(HTTPError) as error:
+        client._get("/search", q="FP", limit="x")
+    assert error.value.code == 400
+    assert client.search("FP") == ["FP-00001"]      # The service still answers
+
+def test_refresh_picks_up_renamed_files(service):
+    index, client, production, engineering = service
+    folder = production.joinpath("CoolSkim", "WI-001")
+    folder.joinpath("001-FP-00001-A.pdf").rename(folder.joinpath("001-FP-00001-B.pdf"))
+    assert client.get_locations("FP-00001") == [folder.joinpath("001-FP-00001-A.pdf")]
+    client._post("/refresh")
+    assert client.get_locations("FP-00001") == [folder.joinpath("001-FP-00001-B.pdf")]
+
+def test_new_revision_is_found_without_a_refresh(service):
+    index, client, production, engineering = service
+    assert not index.check_directories()
+    engineering.joinpath("FP-00001-C.pdf").write_bytes(b"")
+    assert index.check_directories()
+    assert sorted(get_available_dwg_revisions("FP-00001").keys()) == ["A", "B", "C"]
+
+def test_file_table_only_uses_a_service_for_the_same_root(service, tmp_path: Path):
+    index, client, production, engineering = service
+    production.joinpath("CoolSkim", "WI-001", "003-C-0001-A.pdf").write_bytes(b"")     # Not in the service yet
+    assert "C-0001" not in FileTable(production, tmp_path.joinpath("table.pickle")).file_table
+    assert "C-0001" in FileTable(production, tmp_path.joinpath("table.pickle"), use_service=False).file_table
+    other = tmp_path.joinpath("OTHER")
+    other.mkdir()
+    assert FileTable(other, tmp_path.joinpath("table.pickle")).file_table == {}
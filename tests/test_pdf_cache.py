@@ -0,0 +1,89 @@
+"""Local pdf cache on the in memory drive"""
+
+from pathlib import Path
+from threading import Event, Thread
+
+import pytest
+
+from StandardOSILib.osi_filesystem import MemoryFileSystem, set_filesystem
+from viewer_functions import PdfCache
+
+DRIVE = Path("/drive/PRODUCTION/CoolSkim")
+CACHE = Path("/local/pdf cache")
+
+class LockedCopyFileSystem(MemoryFileSystem):
+    """Memory drive where cached copies in locked cannot be removed, like a pdf open in a viewer on Windows"""
+    def unlink(self, path: Path, missing_ok: bool = False):
+        if Path(path) in self.locked:
+            raise PermissionError(f"The file is in use: {path}")
+        super().unlink(path, missing_ok)
+
+    def replace(self, src: Path, dst: Path):
+        if self.fail_replace:
+            raise PermissionError(f"The file is in use: {dst}")
+        super().replace(src, dst)
+
+    def copy(self, src: Path, dst: Path) -> Path:
+        self.copies += 1
+        self.release.wait()
+        return super().copy(src, dst)
+
+    def __init__(self):
+        super().__init__()
+        self.locked: set[Path] = set()
+        self.fail_replace = False
+        self.copies = 0
+        self.release = Event()
+        self.release.set()
+
+@pytest.fixture
+def drive():
+    filesystem = LockedCopyFileSystem()
+    filesystem.mkdir(DRIVE, parents=True)
+    for i in range(3):
+        filesystem.write_bytes(DRIVE.joinpath(f"00{i}-FP-0000{i}-A.pdf"), b"x" * 100)
+    previous = set_filesystem(filesystem)
+    yield filesystem
+    set_filesystem(previous)
+
+def test_copy_that_cannot_be_removed_is_kept(drive: LockedCopyFileSystem):
+    cache = PdfCache(CACHE, max_bytes=150)
+    first = cache.get(DRIVE.joinpath("000-FP-00000-A.pdf"))
+    drive.locked.add(first)
+    second = cache.get(DRIVE.joinpath("001-FP-00001-A.pdf"))
+    assert drive.exists(first) and cache.cached_bytes == 200
+    drive.locked.clear()
+    cache.get(DRIVE.joinpath("002-FP-00002-A.pdf"))
+    assert not drive.exists(first) and not drive.exists(second) and cache.cached_bytes == 100
+
+def test_temp_file_is_removed_when_the_swap_fails(drive: LockedCopyFileSystem):
+    cache = PdfCache(CACHE)
+    drive.fail_replace = True
+    with pytest.raises(PermissionError):
+        cache.get(DRIVE.joinpath("000-FP-00000-A.pdf"))
+    assert drive.listdir(CACHE) == [] and cache.entries == {}
+
+def test_drawing_being_prefetched_is_not_copied_again(drive: LockedCopyFileSystem, tmp_path: Path):
+    cache = PdfCache(tmp_path)      # The manifest is a local pickle file written by close
+    source = DRIVE.joinpath("000-FP-00000-A.pdf")
+    drive.release.clear()
+    prefetch = cache.prefetch([source])[0]
+    while not cache._fetching:
+        pass
+    opened: list[Path] = list()
+    viewer = Thread(target=lambda: opened.append(cache.get(source)))
+    viewer.start()
+    drive.release.set()
+    viewer.join(5)
+    assert opened == [prefetch.result(5)]
+    assert drive.copies == 1
+    cache.close()
+
+def test_copies_are_removed_off_the_lock(drive: LockedCopyFileSystem):
+    cache = PdfCache(CACHE, max_bytes=150)
+    held: list[bool] = list()
+    unlink = drive.unlink
+    drive.unlink = lambda path, missing_ok=False: held.append(cache._lock.locked()) or unlink(path, missing_ok)
+    first = cache.get(DRIVE.joinpath("000-FP-00000-A.pdf"))
+    cache.get(DRIVE.joinpath("001-FP-00001-A.pdf"))
+    assert held == [False] and not drive.exists(first) and cache.cached_bytes == 100
@@ -0,0 +1,37 @@
+"""The product family index follows every edit of the file table, including changes merged from other programs"""
+
+from pathlib import Path
+
+import pytest
+
+from project_functions import FileTable, FamilyRollup, ProductFamilyIndex
+
+OWS, BELT = "Oil Water Seperators", "Belt Skimmers"
+
+@pytest.fixture
+def table_path(tmp_path: Path) -> Path:
+    production = tmp_path.joinpath("PRODUCTION")
+    for folder, name in (("CoolSkim/WI-001", "001-FP-00001-A.pdf"), ("Tube Skimmer/WI-002", "001-FP-00002-A.pdf")):
+        production.joinpath(folder).mkdir(parents=True)
+        production.joinpath(folder, name).write_bytes(b"")
+    table_path = tmp_path.joinpath("file_table.pickle")
+    FileTable(production, table_path, use_service=False).commit(overwrite=True)
+    return table_path
+
+def test_edits_and_merged_changes_are_indexed(table_path: Path, tmp_path: Path, monkeypatch):
+    coolskim = tmp_path.joinpath("PRODUCTION", "CoolSkim", "WI-001")
+    tube = tmp_path.joinpath("PRODUCTION", "Tube Skimmer", "WI-002")
+    first, second = FileTable(table_path=table_path), FileTable(table_path=table_path)
+    monkeypatch.setattr(ProductFamilyIndex, "sync", lambda *args: pytest.fail("the whole table was indexed again"))
+
+    first.update_file_table("FP-00001", coolskim.joinpath("001-FP-00001-A.pdf"), tube.joinpath("002-FP-00001-B.pdf"))
+    assert first.get_file_paths("FP-00001") == [(BELT, tube.joinpath("002-FP-00001-B.pdf"))]
+    first.commit()
+
+    second.add_file_table_entry("FP-00003", coolskim.joinpath("002-FP-00003-A.pdf"))
+    second.update_file_table("FP-00002", tube.joinpath("001-FP-00002-A.pdf"))
+    second.commit()     # Picks up the move stored by the first table
+    assert second.get_file_paths("FP-00001") == [(BELT, tube.joinpath("002-FP-00001-B.pdf"))]
+    assert second.family_index.rollup() == [FamilyRollup(BELT, 1, 1, None), FamilyRollup(OWS, 1, 1, None)]
+    monkeypatch.undo()
+    assert second.family_index.rollup() == ProductFamilyIndex(second.file_table).rollup()
@@ -0,0 +1,98 @@
+"""Replacement transactions on the in memory drive, including the rollback path"""
+
+from pathlib import Path
+
+import pytest
+
+from StandardOSILib.osi_filesystem import MemoryFileSystem, set_filesystem
+from StandardOSILib.osi_functions import replace_files, replace_file_indexed
+from project_functions import get_dwg_number_rev, get_drawings
+
+PROD = Path("/drive/PRODUCTION/CoolSkim/WI-001")
+NEW = Path("/drive/UPDATED")
+BACKUP = Path("/drive/BACKUP")
+
+class BackupFailsFileSystem(MemoryFileSystem):
+    """Memory drive that cannot write to the backup directory"""
+    def copy(self, src: Path, dst: Path) -> Path:
+        if Path(dst).parent == BACKUP:
+            raise PermissionError(f"Access is denied: {dst}")
+        return super().copy(src, dst)
+
+def _build(filesystem: MemoryFileSystem) -> MemoryFileSystem:
+    for folder in (PROD, NEW, BACKUP):
+        filesystem.mkdir(folder, parents=True)
+    filesystem.write_bytes(PROD.joinpath("001-FP-00001-A.pdf"), b"old 1")
+    filesystem.write_bytes(PROD.joinpath("002-FP-00002-A.pdf"), b"old 2")
+    filesystem.write_bytes(NEW.joinpath("FP-00001-B.pdf"), b"new 1")
+    filesystem.write_bytes(NEW.joinpath("FP-00002-B.pdf"), b"new 2")
+    return filesystem
+
+@pytest.fixture
+def memory_drive():
+    filesystem = _build(MemoryFileSystem())
+    previous = set_filesystem(filesystem)
+    yield filesystem
+    set_filesystem(previous)
+
+def test_rollback_restores_every_file(memory_drive: MemoryFileSystem):
+    replacements = [
+        (NEW.joinpath("FP-00001-B.pdf"), PROD.joinpath("001-FP-00001-A.pdf"), PROD.joinpath("001-FP-00001-B.pdf")),
+        (NEW.joinpath("FP-00002-B.pdf"), PROD.joinpath("002-FP-00002-A.pdf"), PROD.joinpath("002-FP-00002-B.pdf")),
+        (NEW.joinpath("FP-00002-B.pdf"), PROD.joinpath("003-FP-00002-A.pdf"), PROD.joinpath("003-FP-00002-B.pdf")),  # Missing
+    ]
+    with pytest.raises(FileNotFoundError):
+        replace_files(replacements, BACKUP)
+    assert memory_drive.listdir(PROD) == ["001-FP-00001-A.pdf", "002-FP-00002-A.pdf"]
+    assert memory_drive.read_bytes(PROD.joinpath("001-FP-00001-A.pdf")) == b"old 1"
+    assert memory_drive.read_bytes(PROD.joinpath("002-FP-00002-A.pdf")) == b"old 2"
+    assert memory_drive.listdir(BACKUP) == []
+
+def test_replace_files_moves_old_files_to_backup(memory_drive: MemoryFileSystem):
+    new_paths = replace_files([
+        (NEW.joinpath("FP-00001-B.pdf"), PROD.joinpath("001-FP-00001-A.pdf"), PROD.joinpath("001-FP-00001-B.pdf")),
+        (NEW.joinpath("FP-00002-B.pdf"), PROD.joinpath("002-FP-00002-A.pdf"), PROD.joinpath("002-FP-00002-B.pdf")),
+    ], BACKUP)
+    assert new_paths == [PROD.joinpath("001-FP-00001-B.pdf"), PROD.joinpath("002-FP-00002-B.pdf")]
+    assert memory_drive.listdir(PROD) == ["001-FP-00001-B.pdf", "002-FP-00002-B.pdf"]
+    assert memory_drive.read_bytes(PROD.joinpath("002-FP-00002-B.pdf")) == b"new 2"
+    assert memory_drive.listdir(BACKUP) == ["001-FP-00001-A.pdf", "002-FP-00002-A.pdf"]
+
+def test_backup_failure_after_swap_is_not_raised():
+    filesystem = _build(BackupFailsFileSystem())
+    previous = set_filesystem(filesystem)
+    try:
+        new_paths = replace_files([
+            (NEW.joinpath("FP-00001-B.pdf"), PROD.joinpath("001-FP-00001-A.pdf"), PROD.joinpath("001-FP-00001-B.pdf")),
+        ], BACKUP)
+    finally:
+        set_filesystem(previous)
+    assert new_paths == [PROD.joinpath("001-FP-00001-B.pdf")]
+    assert filesystem.read_bytes(PROD.joinpath("001-FP-00001-B.pdf")) == b"new 1"
+    assert "~001-FP-00001-A.pdf.old" in filesystem.listdir(PROD)     # Kept for someone to remove
+
+def test_replace_file_indexed(memory_drive: MemoryFileSystem):
+    new_path = replace_file_indexed(NEW.joinpath("FP-00001-B.pdf"), PROD.joinpath("001-FP-00001-A.pdf"),
+                                    PROD.joinpath("001-FP-00001-B.pdf"), BACKUP)
+    assert new_path == PROD.joinpath("001-FP-00001-B.pdf")
+    assert memory_drive.listdir(PROD) == ["001-FP-00001-B.pdf", "002-FP-00002-A.pdf"]
+    assert memory_drive.listdir(BACKUP) == ["001-FP-00001-A.pdf"]
+
+def test_journal_files_are_not_drawings(memory_drive: MemoryFileSystem):
+    assert get_dwg_number_rev(Path("~001-FP-00123-B.pdf.old")) is None
+    assert get_dwg_number_rev(Path("~001-FP-00123-B.pdf.tmp")) is None
+    assert get_dwg_number_rev(Path("001-FP-00123-B.pdf")) == ("FP-00123", "B")
+    memory_drive.write_bytes(PROD.joinpath("~001-FP-00001-A.pdf.old"), b"held")
+    memory_drive.write_bytes(PROD.joinpath("~002-FP-00002-B.pdf.tmp"), b"temp")
+    assert get_drawings(Path("/drive/PRODUCTION")) == {
+        "FP-00001": [PROD.joinpath("001-FP-00001-A.pdf")],
+        "FP-00002": [PROD.joinpath("002-FP-00002-A.pdf")],
+    }
+
+def test_duplicate_new_paths_are_rejected(memory_drive: MemoryFileSystem):
+    with pytest.raises(ValueError):
+        replace_files([
+            (NEW.joinpath("FP-00001-B.pdf"), PROD.joinpath("001-FP-00001-A.pdf"), PROD.joinpath("FP-00001-B.pdf")),
+            (NEW.joinpath("FP-00001-B.pdf"), PROD.joinpath("002-FP-00002-A.pdf"), PROD.joinpath("FP-00001-B.pdf")),
+        ], BACKUP)
+    assert memory_drive.listdir(PROD) == ["001-FP-00001-A.pdf", "002-FP-00002-A.pdf"]
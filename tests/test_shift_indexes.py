@@ -0,0 +1,41 @@
+"""Renumbering the indexed files of a production folder from the file manager"""
+
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("ttkbootstrap")     # The file manager module builds the Tk windows
+from main_interface import OsiFolder, shift_indexes
+from project_functions import FileTable
+import viewer_functions
+from viewer_functions import close_pdf_cache
+
+@pytest.fixture
+def folder(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)     # The pdf cache and file table are stored relative to the working directory
+    monkeypatch.setattr(viewer_functions, "_pdf_cache", None)     # Listing the folder copies its pdfs to a new pdf cache
+    root = tmp_path.joinpath("WI-001")
+    root.mkdir()
+    for name in ("001-FP-00001-A.pdf", "002-FP-00002-A.pdf", "003-FP-00003-A.pdf", "004-notes.txt", "README.txt"):
+        root.joinpath(name).write_bytes(b"")
+    yield OsiFolder(root), FileTable(root, tmp_path.joinpath("file_table.pickle"), use_service=False)
+    close_pdf_cache()
+
+def names(directory: OsiFolder) -> list[str]:
+    return sorted(path.name for path in directory.root.iterdir())
+
+def test_indexes_move_up_without_colliding(folder):
+    directory, file_table = folder
+    shift_indexes(directory, file_table, {i: 1 for i in range(1, directory.children.__len__())})
+    assert names(directory) == ["001-FP-00001-A.pdf", "003-FP-00002-A.pdf", "004-FP-00003-A.pdf", "005-notes.txt", "README.txt"]
+    assert file_table.file_table["FP-00002"] == [directory.root.joinpath("003-FP-00002-A.pdf")]
+    assert file_table.file_table["FP-00003"] == [directory.root.joinpath("004-FP-00003-A.pdf")]
+
+def test_gaps_close_after_a_delete(folder):
+    directory, file_table = folder
+    directory.root.joinpath("002-FP-00002-A.pdf").unlink()
+    file_table.update_file_table("FP-00002", directory.root.joinpath("002-FP-00002-A.pdf"))
+    shift_indexes(directory, file_table, {2: -1, 3: -1, 4: -1})     # Positions before the folder is listed again
+    assert names(directory) == ["001-FP-00001-A.pdf", "002-FP-00003-A.pdf", "003-notes.txt", "README.txt"]
+    assert file_table.file_table["FP-00003"] == [directory.root.joinpath("002-FP-00003-A.pdf")]
+    assert file_table.file_table["FP-00001"] == [directory.root.joinpath("001-FP-00001-A.pdf")]
@@ -0,0 +1,26 @@
+"""Production copies older than the latest engineering revision"""
+
+from pathlib import Path
+
+from StandardOSILib.osi_functions import sort_revisions
+from project_functions import get_latest_revision
+from report_functions import get_stale_locations, StaleLocation
+
+FOLDER = Path("CS-500/WI-001")
+ENGINEERING = Path("FABRICATED PARTS")
+
+def test_stale_copies_use_the_revision_order():
+    revision_index = {
+        "FP-00001": {"a": ENGINEERING.joinpath("FP-00001-a.pdf"), "B": ENGINEERING.joinpath("FP-00001-B.pdf")},
+        "FP-00002": {"B1": ENGINEERING.joinpath("FP-00002-B1.pdf"), "b": ENGINEERING.joinpath("FP-00002-b.pdf")},
+    }
+    file_table = {
+        "FP-00001": [FOLDER.joinpath("001-FP-00001-a.pdf"), FOLDER.joinpath("002-FP-00001-b.pdf")],
+        "FP-00002": [FOLDER.joinpath("003-FP-00002-B.pdf"), FOLDER.joinpath("004-FP-00002-b1.pdf")],
+        "FP-00003": [FOLDER.joinpath("005-FP-00003-A.pdf")],     # Not in the engineering directory
+    }
+    assert get_latest_revision(revision_index["FP-00002"])[0] == sort_revisions(revision_index["FP-00002"].keys())[-1].upper()
+    assert list(get_stale_locations(file_table, revision_index)) == [
+        StaleLocation("FP-00001", FOLDER, FOLDER.joinpath("001-FP-00001-a.pdf"), "a", "B"),
+        StaleLocation("FP-00002", FOLDER, FOLDER.joinpath("003-FP-00002-B.pdf"), "B", "B1"),
+    ]
@@ -0,0 +1,38 @@
+"""Comparing two file table snapshots"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+from report_functions import diff_file_tables, TableChange
+
+def test_diff_file_tables():
+    folder, other = Path("CS-500/WI-001"), Path("CS-500/WI-002")
+    old_table = {
+        "FP-00001": [folder.joinpath("001-FP-00001-A.pdf")],
+        "FP-00002": [folder.joinpath("002-FP-00002-A.pdf")],
+        "FP-00003": [folder.joinpath("003-FP-00003-A.pdf")],
+        "FP-00004": [folder.joinpath("004-FP-00004-A.pdf")],
+        "FP-00005": [folder.joinpath("005-FP-00005-A.pdf")],
+    }
+    new_table = {
+        "FP-00001": [folder.joinpath("001-FP-00001-B.pdf")],
+        "FP-00002": [folder.joinpath("006-FP-00002-A.pdf")],
+        "FP-00003": [other.joinpath("003-FP-00003-A.pdf")],
+        "FP-00005": [folder.joinpath("005-FP-00005-A.pdf")],
+        "MSA-0001": [other.joinpath("001-MSA-0001-A.pdf")],
+    }
+    assert list(diff_file_tables(old_table, new_table)) == [
+        TableChange("REVISED", "FP-00001", folder.joinpath("001-FP-00001-A.pdf"), folder.joinpath("001-FP-00001-B.pdf"), "A", "B"),
+        TableChange("RENAMED", "FP-00002", folder.joinpath("002-FP-00002-A.pdf"), folder.joinpath("006-FP-00002-A.pdf"), "A", "A"),
+        TableChange("MOVED", "FP-00003", folder.joinpath("003-FP-00003-A.pdf"), other.joinpath("003-FP-00003-A.pdf"), "A", "A"),
+        TableChange("REMOVED", "FP-00004", folder.joinpath("004-FP-00004-A.pdf"), None, "A", ""),
+        TableChange("ADDED", "MSA-0001", None, other.joinpath("001-MSA-0001-A.pdf"), "", "A"),
+    ]
+
+def test_missing_snapshot_is_an_error(tmp_path: Path):
+    script = Path(__file__).resolve().parents[1].joinpath("main_tablediff.py")
+    result = subprocess.run([sys.executable, str(script), str(tmp_path.joinpath("old.pickle")), str(tmp_path.joinpath("new.pickle"))],
+                            capture_output=True, text=True)
+    assert result.returncode == 2
+    assert "old.pickle does not exist" in result.stderr
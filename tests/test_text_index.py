@@ -0,0 +1,56 @@
+"""Finding drawings by the text in their pdfs, only new and changed pdfs are read on a refresh"""
+
+import os
+from pathlib import Path
+
+from benchmarks.generate_tree import make_pdf
+from search_functions import TextIndex, get_terms
+
+class RecordingTextIndex(TextIndex):
+    def refresh(self) -> list[Path]:
+        self.read = super().refresh()
+        return self.read
+
+def write_drawing(folder: Path, name: str, lines: list[str]) -> Path:
+    file = folder.joinpath(name)
+    file.write_bytes(make_pdf([lines]))
+    return file
+
+def test_get_terms():
+    assert get_terms("1/2-13 HEX NUT, 304 S.S. x") == ["1/2-13", "HEX", "NUT", "304", "S.S"]
+
+def test_search_ranks_rare_terms_first(tmp_path: Path):
+    folder = tmp_path.joinpath("WI-001")
+    folder.mkdir()
+    bracket = write_drawing(folder, "001-FP-00001-A.pdf", ["BRACKET 304 STAINLESS STEEL", "OIL SKIMMERS INC"])
+    plate = write_drawing(folder, "002-FP-00002-A.pdf", ["PLATE A36 STEEL", "OIL SKIMMERS INC"])
+    write_drawing(folder, "003-FP-00003-A.pdf", ["SHAFT 6061-T6 ALUMINUM", "OIL SKIMMERS INC"])
+    index_path = tmp_path.joinpath("text_index.pickle")
+
+    text_index = TextIndex((tmp_path,), index_path)
+    results = text_index.search("stainless steel bracket")
+    assert [(result.dwg_number, result.location) for result in results] == [("FP-00001", bracket), ("FP-00002", plate)]
+    assert results[0].score > results[1].score
+    assert text_index.search("aluminum", limit=1)[0].dwg_number == "FP-00003"
+    assert text_index.search("titanium") == []
+    text_index.store()
+
+    # Reloading only reads the pdf that changed, a removed pdf is dropped
+    modified = plate.stat().st_mtime_ns
+    write_drawing(folder, "002-FP-00002-A.pdf", ["PLATE 316 STAINLESS STEEL", "OIL SKIMMERS INC"])
+    os.utime(plate, ns=(modified + 10**9, modified + 10**9))
+    folder.joinpath("003-FP-00003-A.pdf").unlink()
+    text_index = RecordingTextIndex((tmp_path,), index_path)
+    assert text_index.read == [plate]
+    assert [result.dwg_number for result in text_index.search("316")] == ["FP-00002"]
+    assert text_index.search("aluminum") == []
+    assert "ALUMINUM" not in text_index.postings
+
+def test_index_of_other_roots_is_not_reused(tmp_path: Path):
+    first, second = tmp_path.joinpath("FIRST"), tmp_path.joinpath("SECOND")
+    first.mkdir()
+    second.mkdir()
+    write_drawing(first, "001-FP-00001-A.pdf", ["BRACKET"])
+    index_path = tmp_path.joinpath("text_index.pickle")
+    TextIndex((first,), index_path).store()
+    assert TextIndex((second,), index_path).search("bracket") == []
@@ -0,0 +1,49 @@
+"""Spans and I/O counters recorded as a Chrome trace"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from StandardOSILib import osi_trace
+from StandardOSILib.osi_trace import Tracer, traced, trace_span, trace_count, is_tracing
+
+@traced()
+def list_folder(folder: Path) -> list[str]:
+    trace_count("directories_listed")
+    return sorted(path.name for path in folder.iterdir())
+
+@pytest.fixture
+def tracer(tmp_path: Path, monkeypatch) -> Tracer:
+    tracer = Tracer(tmp_path.joinpath("traces", "trace.json"))
+    monkeypatch.setattr(osi_trace, "_tracer", tracer)
+    return tracer
+
+def test_counters_are_added_to_every_open_span(tracer: Tracer, tmp_path: Path):
+    with trace_span("refresh", root="CS-500"):
+        list_folder(tmp_path)
+        list_folder(tmp_path)
+        trace_count("bytes_copied", 100)
+    inner, _, outer = tracer.events
+    assert inner["name"] == "list_folder" and inner["args"] == {"directories_listed": 1}
+    assert outer["name"] == "refresh"
+    assert outer["args"] == {"root": "CS-500", "directories_listed": 2, "bytes_copied": 100}
+    assert outer["ts"] <= inner["ts"] and inner["dur"] <= outer["dur"]
+    assert tracer.totals == {"directories_listed": 2, "bytes_copied": 100}
+
+    tracer.store()
+    trace = json.loads(tracer.trace_path.read_text())
+    assert [event["name"] for event in trace["traceEvents"]] == ["list_folder", "list_folder", "refresh"]
+    assert trace["otherData"]["counters"] == tracer.totals
+
+def test_span_is_recorded_when_the_call_raises(tracer: Tracer, tmp_path: Path):
+    with pytest.raises(FileNotFoundError):
+        list_folder(tmp_path.joinpath("missing"))
+    assert [event["name"] for event in tracer.events] == ["list_folder"]
+
+def test_nothing_is_recorded_when_off(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(osi_trace, "_tracer", None)
+    assert not is_tracing()
+    with trace_span("refresh"):
+        assert list_folder(tmp_path) == []
+    assert not list(tmp_path.iterdir())
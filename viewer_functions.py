@@ -0,0 +1,207 @@
+"""Functions for viewing drawing pdfs on the shop floor, opened drawings are kept in a local cache so a drawing
+that was opened before, or prefetched from the folder being viewed, is read from the local disk
+    Author: NNP"""
+
+# Imports
+import hashlib
+from pathlib import Path, WindowsPath, PosixPath
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from threading import Lock, get_ident
+
+from StandardOSILib.osi_functions import osi_file_load, osi_file_store
+from StandardOSILib.osi_filesystem import get_filesystem
+from StandardOSILib.osi_trace import traced, trace_count
+from project_data import PROJDATA
+
+PDF_CACHE_SIZE = 2 * 1024 ** 3     # Bytes of drawings kept in the local cache
+
+class PdfCache():
+    """ Size bounded local copy of opened drawing pdfs. Each copy is stored with the size and modified time of the
+        drawing it came from, a copy is only used while the drawing is unchanged. The least recently opened
+        drawings are removed when the cache is full
+
+    Args:
+        cache_folder (Path): Local folder the copies are stored in
+        max_bytes (int): Most bytes of copies kept, the drawing being opened is always kept
+    """
+
+    def _local_path(self, source: Path) -> Path:
+        source_id = hashlib.md5(str(source).encode()).hexdigest()[:8]    # Drawings in different folders share names
+        return self.cache_folder.joinpath(f"{source_id}-{source.name}")
+
+    def _evict(self) -> list[tuple[Path, tuple[int, int, Path]]]:
+        """Drops the least recently opened copies from the cache until it fits, called with the lock held. Returns the
+        dropped drawings and their entries, the copies are removed by _remove once the lock is released"""
+        victims: list[tuple[Path, tuple[int, int, Path]]] = list()
+        for source in list(self.entries.keys())[:-1]:     # The newest copy is always kept
+            if self.cached_bytes <= self.max_bytes:
+                break
+            victims.append((source, self.entries.pop(source)))
+            self.cached_bytes -= victims[-1][1][0]
+        return victims
+    
+    def _remove(self, victims: list[tuple[Path, tuple[int, int, Path]]]):
+        """Removes the copies dropped by _evict. Copies that cannot be removed, such as one open in a viewer, are put
+        back as the least recently opened and tried again on the next eviction"""
+        filesystem = get_filesystem()
+        for source, entry in victims:
+            try:
+                filesystem.unlink(entry[2], missing_ok=True)
+            except OSError as error:
+                print(f"Could not remove {entry[2]} from the pdf cache, it is tried again later: {error}")
+                with self._lock:
+                    if source not in self.entries:      # Not cached again while it was being removed
+                        self.entries[source] = entry
+                        self.entries.move_to_end(source, last=False)
+                        self.cached_bytes += entry[0]
+
+    def _fetch(self, source: Path, size: int, mtime: int) -> Path:
+        """Copies the drawing into the cache, a drawing already being copied by another thread, such as a
+        prefetch, is waited on instead of copied again"""
+        with self._lock:
+            pending = self._fetching.get(source)
+            if pending is None:
+                pending = self._fetching[source] = Future()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            trace_count("pdf_cache_joins")
+            return pending.result()
+        try:
+            local = self._copy(source, size, mtime)
+            pending.set_result(local)
+            return local
+        except BaseException as error:
+            pending.set_exception(error)
+            raise
+        finally:
+            with self._lock:
+                self._fetching.pop(source, None)
+
+    def _copy(self, source: Path, size: int, mtime: int) -> Path:
+        """Copies the drawing into the cache under a temp name then swaps it in, a copy being viewed is never half
+        written. The temp file is removed if the copy fails"""
+        filesystem = get_filesystem()
+        local = self._local_path(source)
+        temp = local.with_name(f"~{local.name}.{get_ident()}.tmp")
+        try:
+            filesystem.copy(source, temp)
+            filesystem.replace(temp, local)
+        except OSError:
+            try:
+                filesystem.unlink(temp, missing_ok=True)
+            except OSError as error:
+                print(f"Could not remove {temp} from the pdf cache: {error}")
+            raise
+        with self._lock:
+            old = self.entries.pop(source, None)
+            if old is not None:
+                self.cached_bytes -= old[0]
+            self.entries[source] = (size, mtime, local)
+            self.cached_bytes += size
+            victims = self._evict()
+        self._remove(victims)       # Removing files on the lock would stall every other open and prefetch
+        return local
+
+    @traced("PdfCache.get")
+    def get(self, source: Path|WindowsPath|PosixPath) -> Path:
+        """Returns a local copy of the drawing, it is copied from the drive if it is not cached or changed since it
+        was cached. If the drive cannot be reached the cached copy is returned even if it may be out of date
+
+        Args:
+            source (Path | WindowsPath | PosixPath): Drawing pdf on the drive
+
+        Returns:
+            Path: Local copy of the drawing
+        """
+        filesystem = get_filesystem()
+        source = Path(source)
+        with self._lock:
+            entry = self.entries.get(source)
+        try:
+            file_stat = filesystem.stat(source)
+        except OSError:
+            if entry is None or not filesystem.exists(entry[2]):
+                raise
+            return entry[2]
+
+        if entry is not None and entry[:2] == (file_stat.size, file_stat.mtime_ns) and filesystem.exists(entry[2]):
+            with self._lock:
+                if source in self.entries:
+                    self.entries.move_to_end(source)
+            trace_count("pdf_cache_hits")
+            return entry[2]
+        return self._fetch(source, file_stat.size, file_stat.mtime_ns)
+
+    def prefetch(self, sources: list[Path|WindowsPath|PosixPath]) -> list[Future]:
+        """Caches the drawings in the background, E.G. every drawing in the folder being viewed. Drawings from an
+        earlier prefetch that have not started are dropped
+
+        Args:
+            sources (list[Path | WindowsPath | PosixPath]): Drawing pdfs on the drive
+
+        Returns:
+            list[Future]: A future for each drawing, the result is the local copy
+        """
+        for future in self._prefetches:
+            future.cancel()
+        self._prefetches = [self._executor.submit(self._prefetch, Path(source)) for source in sources]
+        return list(self._prefetches)
+
+    def _prefetch(self, source: Path) -> Path|None:
+        try:
+            return self.get(source)
+        except OSError as error:
+            print(f"Could not prefetch {source}: {error}")
+            return None
+
+    def store(self):
+        with self._lock:
+            osi_file_store(OrderedDict(self.entries), self.manifest_path)
+
+    def close(self):
+        """Drops prefetches that have not started, waits for the running ones, and stores the cache"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self.store()
+
+    def __init__(self, cache_folder: Path = PROJDATA.PDF_CACHE, max_bytes: int = PDF_CACHE_SIZE):
+        self.cache_folder = cache_folder
+        self.max_bytes = max_bytes
+        self.manifest_path = cache_folder.joinpath("manifest.pickle")
+        self.entries: OrderedDict[Path, tuple[int, int, Path]] = OrderedDict()     # Drawing is key, size, mtime, and copy is value, least recently used first
+        self.cached_bytes = 0
+        self._lock = Lock()
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="pdf-prefetch")
+        self._prefetches: list[Future] = list()
+        self._fetching: dict[Path, Future] = dict()     # Drawing is key, copy in progress is value
+        get_filesystem().mkdir(cache_folder, parents=True, exist_ok=True)
+
+        # Copies removed from the cache folder are dropped from the manifest, and files not in the manifest, such as
+        # copies made after the last store of a program that crashed, are removed
+        try:
+            entries: OrderedDict[Path, tuple[int, int, Path]] = osi_file_load(self.manifest_path)
+        except (FileNotFoundError, EOFError):
+            entries = OrderedDict()
+        local_files = set(get_filesystem().listdir(cache_folder))
+        self.entries = OrderedDict((source, entry) for source, entry in entries.items() if entry[2].name in local_files)
+        known_files = {entry[2].name for entry in self.entries.values()} | {self.manifest_path.name}
+        for file_name in local_files - known_files:
+            get_filesystem().unlink(cache_folder.joinpath(file_name), missing_ok=True)
+        self.cached_bytes = sum(entry[0] for entry in self.entries.values())
+        self._remove(self._evict())
+
+_pdf_cache: PdfCache = None     # Made on first use
+
+def get_pdf_cache() -> PdfCache:
+    """Returns the pdf cache shared by the program"""
+    global _pdf_cache
+    if _pdf_cache is None:
+        _pdf_cache = PdfCache()
+    return _pdf_cache
+
+def close_pdf_cache():
+    """Closes the pdf cache if it was used, called when the program exits"""
+    if _pdf_cache is not None:
+        _pdf_cache.close()